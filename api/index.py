@@ -1,22 +1,12 @@
 import sys
 import os
 
-# Add project root and backend directory to sys.path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(current_dir)
-backend_path = os.path.join(project_root, 'backend')
-
-if project_root not in sys.path:
-    sys.path.append(project_root)
+# Vercel entry point. The backend package imports itself as `app`, so only
+# backend/ needs to be on sys.path. With VERCEL=1 the app starts in fast-startup
+# mode (see backend/app/utils/startup.py); the schema comes from
+# `python -m app.commands.migrate`, run against the database on deploy.
+backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
 if backend_path not in sys.path:
-    sys.path.insert(0, backend_path) # Insert at the beginning to give priority
+    sys.path.insert(0, backend_path)
 
-try:
-    # Try importing the FastAPI app instance
-    from app.main import app
-except ImportError:
-    # Fallback to full path import if necessary
-    from backend.app.main import app
-except Exception as e:
-    print(f"Error starting serverless function: {e}")
-    raise e
+from app.main import app  # noqa: E402
@@ -0,0 +1,4 @@
+from dotenv import load_dotenv
+
+# The one place .env is read: every app module's settings are read after this
+load_dotenv()
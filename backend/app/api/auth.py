@@ -1,32 +1,49 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_db, get_current_user
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, Token
-from app.utils.security import hash_password, verify_password, create_access_token
+from app.utils.streaks import current_streak, ensure_streak
+from app.utils.security import PasswordHasherBusy, hash_password_async, verify_password_async, create_access_token
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+def _hasher_busy(exc: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 @router.post("/signup", response_model=UserResponse)
-def signup(user_data: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_pwd = hash_password(user_data.password)
+    # bcrypt runs on the dedicated worker pool, not the request threadpool
+    try:
+        hashed_pwd = await hash_password_async(user_data.password)
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
     new_user = User(email=user_data.email, hashed_password=hashed_pwd)
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    try:
+        password_ok = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -38,5 +55,12 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 
 # NEW: Protected route to get the current user profile
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def read_users_me(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Streaks live in user_streaks; the current one lapses by date, not by any write
+    state = await db.run_sync(ensure_streak, current_user.id)
+    profile = {
+        "id": current_user.id, "email": current_user.email,
+        "streak": current_streak(state), "longest_streak": state.longest,
+    }
+    await db.commit()  # persists the streak if it was just built
+    return profile
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+from app.api.deps import authenticate
+from app.db.session import session_scope
+from app.utils.auth_cache import AuthenticatedUser
+from app.utils.events import EVENTS_HEARTBEAT_SECONDS, PING, Subscription, get_event_broker
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+def _bearer(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+async def _authenticate(token: Optional[str]) -> Optional[AuthenticatedUser]:
+    # A short session of its own: a stream must not hold a DB connection while it is open
+    if not token:
+        return None
+    async with session_scope() as db:
+        try:
+            return await authenticate(token, db)
+        except HTTPException:
+            return None
+
+async def _sse(subscription: Subscription):
+    broker = get_event_broker()
+    broker.subscribe(subscription)
+    try:
+        # Reconnecting clients wait 3s; every stream starts with a resync
+        yield "retry: 3000\n\n"
+        subscription.resync()
+        while True:
+            payload = await subscription.get(EVENTS_HEARTBEAT_SECONDS)
+            yield f"data: {payload}\n\n" if payload is not None else ": ping\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+@router.get("/stream")
+async def event_stream(request: Request, token: Optional[str] = None):
+    """
+    Server-sent events for your tasks and transactions. Authenticate with the
+    usual `Authorization: Bearer` header, or `token` where the client cannot
+    set headers (browser EventSource).
+
+    Each message is JSON: `{"type": "change", "collection", "action", "version",
+    "ids"}` with action created, updated, deleted or decomposed, and `ids`
+    null for large batches. `{"type": "resync"}` comes first on every
+    (re)connect and whenever you fell behind: fetch `/{collection}/changes`
+    with the last version you saw.
+    """
+    user = await _authenticate(_bearer(request.headers.get("authorization")) or token)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return StreamingResponse(
+        _sse(Subscription(user.id)),
+        media_type="text/event-stream",
+        # No proxy buffering, or events sit in nginx until the buffer fills
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def event_socket(websocket: WebSocket, token: Optional[str] = None):
+    """
+    The same events over a WebSocket, as text frames, with `{"type": "ping"}`
+    heartbeats. Messages from the client are ignored.
+    """
+    user = await _authenticate(_bearer(websocket.headers.get("authorization")) or token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    subscription = Subscription(user.id)
+    broker = get_event_broker()
+    broker.subscribe(subscription)
+    subscription.resync()
+
+    async def send():
+        while True:
+            payload = await subscription.get(EVENTS_HEARTBEAT_SECONDS)
+            await websocket.send_text(payload if payload is not None else PING)
+
+    sender = asyncio.create_task(send())
+    try:
+        # Reading is how a disconnect shows up; a failed send ends in one too
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        broker.unsubscribe(subscription)
+        sender.cancel()
@@ -3,5 +3,5 @@ from fastapi import APIRouter
 router = APIRouter(prefix="/health", tags=["Health"])
 
 @router.get("/")
-def health_check():
+async def health_check():
     return {"status": "ok"}
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_db, get_current_user
+from app.models.job import Job
+from app.models.user import User
+from app.schemas.job import JobResponse
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int, 
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Poll a background job. `status` is queued, running, succeeded or failed;
+    `result` is set on success and `error` on the last failed attempt.
+    """
+    job = await db.scalar(select(Job).where(Job.id == job_id, Job.owner_id == current_user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or access denied")
+    return job
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils.metrics import render_metrics
+
+router = APIRouter(tags=["Health"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus scrape endpoint: per-route latency, SQL per request, DB pool,
+    AI provider and event stream stats for this process.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_db, get_current_user
+from app.models.user import User
+from app.schemas.search import SearchResults
+from app.utils.search import search_tasks, search_terms, search_transactions
+from app.utils.subtasks import attach_subtasks
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+@router.get("/", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Full-text search over the current user's task titles/descriptions and
+    transaction descriptions. Every word must match, as a prefix ("mee" finds
+    "meeting"); results are ranked best match first, `limit` per kind.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return {"tasks": [], "transactions": []}
+    
+    tasks = await db.run_sync(search_tasks, current_user.id, terms, limit)
+    await db.run_sync(attach_subtasks, tasks)
+    transactions = await db.run_sync(search_transactions, current_user.id, terms, limit)
+    return {"tasks": tasks, "transactions": transactions}
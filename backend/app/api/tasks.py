@@ -1,18 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import case, delete, func, insert, not_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
 from app.api.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
-from app.utils.ai_service import analyze_task_priority, decompose_task
+from app.models.subtask import Subtask
+from app.schemas.task import (
+    TaskActivity, TaskBatchResult, TaskBatchSelection, TaskBatchUpdate, TaskChanges, TaskCreate, TaskFilter, TaskResponse,
+    TaskUpdate,
+)
+from app.schemas.subtask import SubtaskCreate, SubtaskMove, SubtaskResponse, SubtaskUpdate
+from app.schemas.bulk import BulkImportResult
+from app.schemas.job import JobResponse
+from app.utils.ai_service import analyze_task_priority_async, analyze_task_priorities_async
+from app.utils.bulk_import import (
+    DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, OPENAPI_BODY, UnsupportedContentType, import_records,
+)
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from app.utils.export import MEDIA_TYPES, stream_export
+from app.utils import job_handlers  # noqa: F401  (register the job kinds enqueued here)
+from app.utils.events import queue_event
+from app.utils.jobs import RUN_JOBS_INLINE, enqueue, job_queue, run_now
+from app.utils.serialization import RowSerializer, fast_response
+from app.utils.subtasks import (
+    attach_subtasks, ensure_normalized, parse_steps, replace_subtasks, slot_position, step_rows, subtask_views,
+)
+from app.utils.sync import (
+    DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT, TASKS, bump_version, changes, conditional, current_version, record_deletes,
+    stamp_rows,
+)
+from app.utils.streaks import (
+    activity_days, completion_day, current_streak, ensure_streak, record_completions, utc_day, utc_now,
+)
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
+# List endpoints select these columns and build TaskResponse payloads from them directly
+TASK_COLUMNS = [
+    Task.id, Task.title, Task.description, Task.is_completed, Task.priority, Task.legacy_subtasks,
+    Task.created_at, Task.updated_at, Task.owner_id, Task.row_version,
+]
+task_rows = RowSerializer(TaskResponse, TASK_COLUMNS, computed=("subtasks", "subtasks_done", "subtasks_total"))
+
+def _task_payloads(db: Session, rows) -> List[dict]:
+    payloads = task_rows.dump_all(rows)
+    views = subtask_views(db, [(row.id, row.legacy_subtasks) for row in rows])
+    for payload in payloads:
+        view = views.get(payload["id"])
+        if view is not None:
+            payload["subtasks"], payload["subtasks_done"], payload["subtasks_total"] = view
+    return payloads
+
+def _task_criteria(owner_id: int, task_filter: TaskFilter) -> list:
+    criteria = [Task.owner_id == owner_id]
+    if task_filter.is_completed is not None:
+        criteria.append(Task.is_completed == task_filter.is_completed)
+    if task_filter.priority is not None:
+        criteria.append(Task.priority == task_filter.priority)
+    if task_filter.created_from is not None:
+        criteria.append(Task.created_at >= task_filter.created_from)
+    if task_filter.created_to is not None:
+        criteria.append(Task.created_at < task_filter.created_to)
+    return criteria
+
+def _batch_criteria(owner_id: int, selection: TaskBatchSelection) -> list:
+    if selection.ids is not None:
+        return [Task.owner_id == owner_id, Task.id.in_(selection.ids)]
+    return _task_criteria(owner_id, selection.filter)
+
 @router.post("/", response_model=TaskResponse)
-def create_task(
+async def create_task(
     task_data: TaskCreate, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_db), 
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -20,102 +84,549 @@ def create_task(
     The task is automatically linked to the authenticated user.
     """
     # AI Analysis: Predict priority based on title and description
-    predicted_priority = analyze_task_priority(task_data.title, task_data.description)
+    predicted_priority = await analyze_task_priority_async(task_data.title, task_data.description)
     
     new_task = Task(
-        **task_data.model_dump(exclude={"priority"}), 
+        **task_data.model_dump(exclude={"priority", "subtasks"}), 
         priority=predicted_priority,
         owner_id=current_user.id
     )
+    if new_task.is_completed:
+        await db.run_sync(ensure_streak, current_user.id)
+        new_task.completed_at = utc_now()
+    new_task.row_version = await db.run_sync(bump_version, current_user.id, TASKS)
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    await db.flush()
+    if new_task.is_completed:
+        await db.run_sync(record_completions, current_user.id, [utc_day(new_task.completed_at)])
+    steps = parse_steps(task_data.subtasks)
+    if steps:
+        await db.execute(insert(Subtask), step_rows(new_task.id, steps))
+    queue_event(db, current_user.id, TASKS, "created", new_task.row_version, [new_task.id])
+    await db.commit()
+    await db.refresh(new_task)
+    await db.run_sync(attach_subtasks, [new_task])
     return new_task
 
+@router.post("/bulk", response_model=BulkImportResult, openapi_extra=OPENAPI_BODY)
+async def bulk_create_tasks(
+    request: Request,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE),
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import many tasks at once from a JSON array, NDJSON or CSV body.
+    Priorities are predicted per chunk and each chunk is one multi-row INSERT
+    and one commit. Invalid rows are skipped and reported by row number.
+    """
+    async def insert_chunk(items: List[TaskCreate]):
+        priorities = await analyze_task_priorities_async([(t.title, t.description) for t in items])
+        completed = sum(1 for t in items if t.is_completed)
+        if completed:
+            await db.run_sync(ensure_streak, current_user.id)
+        now = utc_now()
+        version = await db.run_sync(bump_version, current_user.id, TASKS)
+        rows = [
+            {
+                **t.model_dump(exclude={"priority", "subtasks"}),
+                "priority": priority, "owner_id": current_user.id, "row_version": version,
+                "completed_at": now if t.is_completed else None,
+            }
+            for t, priority in zip(items, priorities)
+        ]
+        if any(t.subtasks for t in items):
+            task_ids = (await db.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows)).all()
+            steps = [row for task_id, t in zip(task_ids, items) for row in step_rows(task_id, parse_steps(t.subtasks))]
+            if steps:
+                await db.execute(insert(Subtask), steps)
+        else:
+            task_ids = None
+            await db.execute(insert(Task), rows)
+        if completed:
+            await db.run_sync(record_completions, current_user.id, [utc_day(now)] * completed)
+        queue_event(db, current_user.id, TASKS, "created", version, task_ids)
+        await db.commit()
+
+    try:
+        return await import_records(request, TaskCreate, insert_chunk, db, chunk_size)
+    except UnsupportedContentType as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+
+@router.post("/reprioritize", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def reprioritize_tasks(
+    response: Response,
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Re-run AI priority prediction over all of your tasks in the background,
+    e.g. after the rules changed. Poll the returned job for progress.
+    """
+    job = await db.run_sync(
+        enqueue, "reprioritize_tasks", current_user.id, None, f"reprioritize_tasks:{current_user.id}"
+    )
+    result = JobResponse.model_validate(job)
+    await db.commit()
+    job_queue.notify()
+    response.headers["Location"] = f"/jobs/{result.id}"
+    return result
+
 @router.get("/", response_model=List[TaskResponse])
-def get_tasks(
-    db: Session = Depends(get_db), 
+async def get_tasks(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    is_completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get tasks for the authenticated user only, one page at a time.
+    Sorted by newest first. Pass the `X-Next-Cursor` response header back as
+    `after` to fetch the next page; the header is absent on the last page.
+    Send the ETag back in `If-None-Match` to get a 304 while nothing changed.
+    """
+    cached = await conditional(request, response, db, current_user.id, TASKS)
+    if cached is not None:
+        return cached
+
+    stmt = select(*TASK_COLUMNS).where(*_task_criteria(current_user.id, TaskFilter(
+        is_completed=is_completed, priority=priority, created_from=created_from, created_to=created_to,
+    )))
+
+    try:
+        rows, next_cursor = await db.run_sync(keyset_page, stmt, Task, current_user.id, limit, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    payloads = await db.run_sync(_task_payloads, rows)
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return fast_response(payloads, response)
+
+def _subtask_count(*criteria):
+    return (
+        select(func.count()).where(Subtask.task_id == Task.id, *criteria)
+        .correlate(Task).scalar_subquery()
+    )
+
+EXPORT_COLUMNS = [
+    Task.id, Task.title, Task.description, Task.is_completed, Task.priority,
+    _subtask_count(Subtask.is_done.is_(True)).label("subtasks_done"),
+    _subtask_count().label("subtasks_total"),
+    Task.created_at, Task.updated_at, Task.owner_id,
+]
+
+@router.get("/export")
+async def export_tasks(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all tasks for the authenticated user only.
-    Sorted by newest first.
+    Stream every task of the current user as NDJSON or CSV, newest first.
     """
-    return db.query(Task).filter(Task.owner_id == current_user.id).order_by(Task.created_at.desc()).all()
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(Task.owner_id == current_user.id)
+        .order_by(Task.created_at.desc(), Task.id.desc())
+    )
+    return StreamingResponse(
+        stream_export(stmt, [c.key for c in EXPORT_COLUMNS], format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+@router.get("/changes", response_model=TaskChanges)
+async def get_task_changes(
+    response: Response,
+    since: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Incremental sync: tasks created or changed after version `since`, and ids
+    of tasks deleted after it. Start with since=0, then pass the returned
+    `version`. While `X-Next-Cursor` is set, pass it as `after` for the rest;
+    deletions come with the last page.
+    """
+    try:
+        version, rows, deleted, next_cursor = await db.run_sync(
+            changes, Task, current_user.id, TASKS, since, limit, after, TASK_COLUMNS
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    payloads = await db.run_sync(_task_payloads, rows)
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return fast_response({"version": version, "changed": payloads, "deleted": deleted}, response)
+
+@router.get("/activity", response_model=TaskActivity)
+async def get_task_activity(
+    days: int = Query(365, ge=1, le=366),
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Completion heatmap: tasks completed per UTC day over the last `days` days,
+    listing only days with any, plus your current and longest streak.
+    """
+    state = await db.run_sync(ensure_streak, current_user.id)
+    today = utc_now().date()
+    rows = await db.run_sync(activity_days, current_user.id, today - timedelta(days=days - 1))
+    result = {
+        "current_streak": current_streak(state, today),
+        "longest_streak": state.longest,
+        "days": [{"day": day, "completed": completed} for day, completed in rows],
+    }
+    await db.commit()  # persists the streak if it was just built
+    return result
+
+def _batch_update(db: Session, owner_id: int, batch: TaskBatchUpdate) -> Tuple[List[int], int]:
+    values = batch.set.model_dump(exclude_none=True)
+    criteria = _batch_criteria(owner_id, batch)
+    completing = values.get("is_completed")
+    flipped = []
+    if completing is not None:
+        # Only tasks whose state actually changes count towards the streak
+        ensure_streak(db, owner_id)
+        was_completed = Task.is_completed.is_(True)
+        flipped = db.execute(
+            select(Task.completed_at, Task.updated_at, Task.created_at)
+            .where(*criteria, not_(was_completed) if completing else was_completed)
+        ).all()
+        now = utc_now()
+        values["completed_at"] = case((was_completed, Task.completed_at), else_=now) if completing else None
+    version = bump_version(db, owner_id, TASKS)
+    affected = db.scalars(
+        update(Task)
+        .where(*criteria)
+        .values(**values, row_version=version)
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if affected:
+        queue_event(db, owner_id, TASKS, "updated", version, affected)
+    if flipped:
+        if completing:
+            record_completions(db, owner_id, [utc_day(now)] * len(flipped))
+        else:
+            record_completions(db, owner_id, [completion_day(row) for row in flipped], -1)
+    return list(affected), version
+
+def _batch_delete(db: Session, owner_id: int, selection: TaskBatchSelection) -> Tuple[List[int], int]:
+    # Ids first, so the steps and the tasks are deleted for exactly the same set
+    task_ids = db.scalars(select(Task.id).where(*_batch_criteria(owner_id, selection))).all()
+    if not task_ids:
+        return [], current_version(db, owner_id, TASKS)
+    db.execute(delete(Subtask).where(Subtask.task_id.in_(task_ids)))
+    affected = db.scalars(
+        delete(Task)
+        .where(Task.owner_id == owner_id, Task.id.in_(task_ids))
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    version = bump_version(db, owner_id, TASKS)
+    record_deletes(db, owner_id, TASKS, affected, version)
+    return list(affected), version
+
+@router.patch("/batch", response_model=TaskBatchResult)
+async def batch_update_tasks(
+    batch: TaskBatchUpdate,
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Apply `set` to many tasks at once, e.g. "complete all". Select them by
+    `ids` (up to 10000) or by `filter`; ids that are not yours are skipped.
+    One UPDATE and one commit however many tasks match; `affected` lists
+    the ids that changed.
+    """
+    affected, version = await db.run_sync(_batch_update, current_user.id, batch)
+    if not affected:
+        # Nothing matched: leave the collection version (and clients' ETags) alone
+        await db.rollback()
+        version = await db.run_sync(current_version, current_user.id, TASKS)
+    await db.commit()
+    return {"affected": affected, "version": version}
+
+@router.delete("/batch", response_model=TaskBatchResult)
+async def batch_delete_tasks(
+    selection: TaskBatchSelection,
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delete many tasks and their steps at once, e.g. "clear completed" with
+    `{"filter": {"is_completed": true}}`. Select them by `ids` (up to 10000)
+    or by `filter`; ids that are not yours are skipped. One transaction;
+    `affected` lists the deleted ids.
+    """
+    affected, version = await db.run_sync(_batch_delete, current_user.id, selection)
+    await db.commit()
+    return {"affected": affected, "version": version}
 
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task(
+async def get_task(
     task_id: int, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_db), 
     current_user: User = Depends(get_current_user)
 ):
     """
     Get a specific task by ID.
     Access Control: Checks if the task exists AND if it belongs to the current user.
     """
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.owner_id == current_user.id))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found or access denied")
+    await db.run_sync(attach_subtasks, [task])
     return task
 
 @router.patch("/{task_id}", response_model=TaskResponse)
-def update_task(
+async def update_task(
     task_id: int, 
     task_update: TaskUpdate, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_db), 
     current_user: User = Depends(get_current_user)
 ):
     """
     Update a task.
     Access Control: Only owners can update their own tasks.
     """
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.owner_id == current_user.id))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found or access denied")
     
     update_data = task_update.model_dump(exclude_unset=True)
+    completion = None
+    if "is_completed" in update_data and bool(update_data["is_completed"]) != bool(task.is_completed):
+        # Built before the task changes, which it would otherwise count twice
+        await db.run_sync(ensure_streak, current_user.id)
+        if update_data["is_completed"]:
+            task.completed_at = utc_now()
+            completion = (utc_day(task.completed_at), 1)
+        else:
+            completion = (completion_day(task), -1)
+            task.completed_at = None
+    if "subtasks" in update_data:
+        # Whole-list replacement, kept for older clients; prefer the /subtasks endpoints
+        await db.run_sync(replace_subtasks, task.id, parse_steps(update_data.pop("subtasks")))
     for key, value in update_data.items():
         setattr(task, key, value)
+    if completion is not None:
+        day, sign = completion
+        await db.run_sync(record_completions, current_user.id, [day], sign)
+    task.row_version = await db.run_sync(bump_version, current_user.id, TASKS)
+    queue_event(db, current_user.id, TASKS, "updated", task.row_version, [task.id])
     
-    db.commit()
-    db.refresh(task)
+    await db.commit()
+    await db.refresh(task)
+    await db.run_sync(attach_subtasks, [task])
     return task
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     task_id: int, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_db), 
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete a task.
     Access Control: Only owners can delete their own tasks.
     """
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.owner_id == current_user.id))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found or access denied")
     
-    db.delete(task)
-    db.commit()
+    await db.execute(delete(Subtask).where(Subtask.task_id == task.id))
+    await db.delete(task)
+    version = await db.run_sync(bump_version, current_user.id, TASKS)
+    await db.run_sync(record_deletes, current_user.id, TASKS, [task.id], version)
+    await db.commit()
     return None
 
-@router.post("/{task_id}/decompose", response_model=TaskResponse)
-def ai_decompose_task(
+@router.post("/{task_id}/decompose", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def ai_decompose_task(
     task_id: int, 
-    db: Session = Depends(get_db), 
+    response: Response,
+    db: AsyncSession = Depends(get_db), 
     current_user: User = Depends(get_current_user)
 ):
     """
     Magic Wand Endpoint: AI breaks down the task into sub-steps.
+    Runs as a background job: poll the returned job (also in the Location
+    header) and re-fetch the task once it has succeeded. Repeated requests
+    while a decomposition is pending return the same job. Where no worker
+    would pick the job up (JOB_WORKERS=0, serverless) it runs in the request,
+    and the finished job comes back with 200.
     """
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.owner_id == current_user.id))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found or access denied")
     
-    # Generate sub-steps via AI
-    steps_json = decompose_task(task.title)
-    task.subtasks = steps_json
-    
-    db.commit()
-    db.refresh(task)
+    job = await db.run_sync(
+        enqueue, "decompose_task", current_user.id, {"task_id": task.id}, f"decompose_task:{task.id}"
+    )
+    result = JobResponse.model_validate(job)
+    await db.commit()
+    response.headers["Location"] = f"/jobs/{result.id}"
+    if RUN_JOBS_INLINE:
+        await run_in_threadpool(run_now, result.id)
+        await db.refresh(job)
+        result = JobResponse.model_validate(job)
+        if result.status not in ("queued", "running"):
+            response.status_code = status.HTTP_200_OK
+        return result
+    job_queue.notify()
+    return result
+
+def _owned_subtask(task_id: int, subtask_id: int, owner_id: int):
+    # Ownership is checked inside the single UPDATE/DELETE statement
+    return (
+        Subtask.id == subtask_id,
+        Subtask.task_id == task_id,
+        Subtask.task_id.in_(select(Task.id).where(Task.id == task_id, Task.owner_id == owner_id)),
+    )
+
+async def _get_owned_task(db: AsyncSession, task_id: int, owner_id: int) -> Task:
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.owner_id == owner_id))
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found or access denied")
+    await db.run_sync(ensure_normalized, task)
     return task
+
+@router.get("/{task_id}/subtasks", response_model=List[SubtaskResponse])
+async def get_subtasks(
+    task_id: int, 
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The task's steps in order, with their ids and completion state.
+    """
+    await _get_owned_task(db, task_id, current_user.id)
+    subtasks = (await db.scalars(
+        select(Subtask).where(Subtask.task_id == task_id).order_by(Subtask.position)
+    )).all()
+    result = [SubtaskResponse.model_validate(s) for s in subtasks]
+    await db.commit()
+    return result
+
+@router.post("/{task_id}/subtasks", response_model=SubtaskResponse, status_code=status.HTTP_201_CREATED)
+async def create_subtask(
+    task_id: int, 
+    subtask_data: SubtaskCreate, 
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Insert one step at `index` (0-based), or append it when `index` is omitted.
+    """
+    await _get_owned_task(db, task_id, current_user.id)
+    position = await db.run_sync(slot_position, task_id, subtask_data.index)
+    subtask = Subtask(task_id=task_id, position=position, title=subtask_data.title)
+    db.add(subtask)
+    # Steps are part of the task's representation (subtasks_done/total)
+    await db.run_sync(stamp_rows, Task, current_user.id, TASKS, [task_id])
+    await db.flush()
+    await db.refresh(subtask)
+    result = SubtaskResponse.model_validate(subtask)
+    await db.commit()
+    return result
+
+@router.patch("/{task_id}/subtasks/{subtask_id}", response_model=SubtaskResponse)
+async def update_subtask(
+    task_id: int, 
+    subtask_id: int, 
+    subtask_update: SubtaskUpdate, 
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Rename a step or set its completion state. One single-row UPDATE.
+    """
+    stmt = update(Subtask).where(*_owned_subtask(task_id, subtask_id, current_user.id))
+    update_data = subtask_update.model_dump(exclude_unset=True)
+    if update_data:
+        subtask = await db.scalar(stmt.values(**update_data).returning(Subtask))
+    else:
+        subtask = await db.scalar(select(Subtask).where(*_owned_subtask(task_id, subtask_id, current_user.id)))
+    if not subtask:
+        raise HTTPException(status_code=404, detail="Subtask not found or access denied")
+    result = SubtaskResponse.model_validate(subtask)
+    if update_data:
+        await db.run_sync(stamp_rows, Task, current_user.id, TASKS, [task_id])
+    await db.commit()
+    return result
+
+@router.post("/{task_id}/subtasks/{subtask_id}/toggle", response_model=SubtaskResponse)
+async def toggle_subtask(
+    task_id: int, 
+    subtask_id: int, 
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Flip a step between done and not done, atomically in the database.
+    """
+    subtask = await db.scalar(
+        update(Subtask)
+        .where(*_owned_subtask(task_id, subtask_id, current_user.id))
+        .values(is_done=not_(Subtask.is_done))
+        .returning(Subtask)
+    )
+    if not subtask:
+        raise HTTPException(status_code=404, detail="Subtask not found or access denied")
+    result = SubtaskResponse.model_validate(subtask)
+    await db.run_sync(stamp_rows, Task, current_user.id, TASKS, [task_id])
+    await db.commit()
+    return result
+
+@router.post("/{task_id}/subtasks/{subtask_id}/move", response_model=SubtaskResponse)
+async def move_subtask(
+    task_id: int, 
+    subtask_id: int, 
+    move: SubtaskMove, 
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Move a step to `index` (0-based) among the task's steps. Only the moved
+    step's position changes.
+    """
+    subtask = await db.scalar(select(Subtask).where(*_owned_subtask(task_id, subtask_id, current_user.id)))
+    if not subtask:
+        raise HTTPException(status_code=404, detail="Subtask not found or access denied")
+    subtask.position = await db.run_sync(slot_position, task_id, move.index, subtask.id)
+    await db.run_sync(stamp_rows, Task, current_user.id, TASKS, [task_id])
+    await db.flush()
+    await db.refresh(subtask)
+    result = SubtaskResponse.model_validate(subtask)
+    await db.commit()
+    return result
+
+@router.delete("/{task_id}/subtasks/{subtask_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_subtask(
+    task_id: int, 
+    subtask_id: int, 
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delete one step.
+    """
+    result = await db.execute(delete(Subtask).where(*_owned_subtask(task_id, subtask_id, current_user.id)))
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Subtask not found or access denied")
+    await db.run_sync(stamp_rows, Task, current_user.id, TASKS, [task_id])
+    await db.commit()
+    return None
@@ -1,70 +1,359 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timezone
 from app.api.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.transaction import Transaction
-from app.schemas.transaction import TransactionCreate, TransactionResponse
-from app.utils.ai_service import categorize_transaction
-from sqlalchemy import func
+from app.schemas.transaction import TransactionChanges, TransactionCreate, TransactionResponse, FinanceAnalytics
+from app.schemas.bulk import BulkImportResult
+from app.schemas.job import JobResponse
+from app.utils.ai_service import categorize_transaction_async, categorize_transactions_async
+from app.utils.bulk_import import (
+    DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, OPENAPI_BODY, UnsupportedContentType, import_records,
+)
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from app.utils.export import MEDIA_TYPES, stream_export
+from app.utils.currency import CURRENCY_PATTERN, DEFAULT_CURRENCY, convert, from_minor, missing_rates, rates_version
+from app.utils.finance_rollup import apply_rows, apply_transaction, ensure_rollup, income_expense_sums
+from app.utils import job_handlers  # noqa: F401  (register the job kinds enqueued here)
+from app.utils.events import queue_event
+from app.utils.jobs import enqueue, job_queue
+from app.utils.serialization import RowSerializer, fast_response
+from app.utils.sync import DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT, TRANSACTIONS, bump_version, changes, conditional
+from sqlalchemy import func, insert, select
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
+# List endpoints select these columns and build TransactionResponse payloads from them directly
+TRANSACTION_COLUMNS = [
+    Transaction.id, Transaction.amount, Transaction.currency, Transaction.type, Transaction.description,
+    Transaction.category, Transaction.created_at, Transaction.owner_id, Transaction.row_version,
+]
+transaction_rows = RowSerializer(TransactionResponse, TRANSACTION_COLUMNS)
+
 @router.post("/", response_model=TransactionResponse)
-def create_transaction(
+async def create_transaction(
     trans_data: TransactionCreate, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_db), 
     current_user: User = Depends(get_current_user)
 ):
     """
     Record a new financial transaction (Income or Expense).
     AI automatically categorizes it based on description.
     """
-    category = categorize_transaction(trans_data.description)
+    category = await categorize_transaction_async(trans_data.description)
+    await db.run_sync(ensure_rollup, current_user.id)
     
     new_trans = Transaction(
-        amount=trans_data.amount,
-        type=trans_data.type,
-        description=trans_data.description,
+        **trans_data.column_values(),
         category=category,
         owner_id=current_user.id
     )
+    new_trans.row_version = await db.run_sync(bump_version, current_user.id, TRANSACTIONS)
     db.add(new_trans)
-    db.commit()
-    db.refresh(new_trans)
+    await db.flush()
+    await db.refresh(new_trans)  # load server-side created_at for the monthly rollup
+    await db.run_sync(apply_transaction, new_trans)
+    queue_event(db, current_user.id, TRANSACTIONS, "created", new_trans.row_version, [new_trans.id])
+    await db.commit()
+    await db.refresh(new_trans)
     return new_trans
 
+@router.post("/bulk", response_model=BulkImportResult, openapi_extra=OPENAPI_BODY)
+async def bulk_create_transactions(
+    request: Request,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE),
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import many transactions (e.g. a bank statement) from a JSON array, NDJSON
+    or CSV body. Each chunk is categorized in one pass, inserted with one
+    multi-row INSERT and folded into the finance rollups in the same commit.
+    """
+    await db.run_sync(ensure_rollup, current_user.id)
+    await db.commit()
+
+    async def insert_chunk(items: List[TransactionCreate]):
+        categories = await categorize_transactions_async([t.description for t in items])
+        version = await db.run_sync(bump_version, current_user.id, TRANSACTIONS)
+        inserted = await db.execute(
+            insert(Transaction).returning(
+                Transaction.category, Transaction.created_at, Transaction.type, Transaction.currency,
+                Transaction.amount_minor,
+            ),
+            [
+                {**t.column_values(), "category": category, "owner_id": current_user.id, "row_version": version}
+                for t, category in zip(items, categories)
+            ],
+        )
+        await db.run_sync(apply_rows, current_user.id, inserted.all())
+        queue_event(db, current_user.id, TRANSACTIONS, "created", version)
+        await db.commit()
+
+    try:
+        return await import_records(request, TransactionCreate, insert_chunk, db, chunk_size)
+    except UnsupportedContentType as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+
+@router.post("/recategorize", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def recategorize_transactions(
+    response: Response,
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Re-run AI categorization over all of your transactions in the background,
+    e.g. after the category rules changed. Summaries stay consistent while it
+    runs. Poll the returned job for progress.
+    """
+    job = await db.run_sync(
+        enqueue, "recategorize_transactions", current_user.id, None, f"recategorize_transactions:{current_user.id}"
+    )
+    result = JobResponse.model_validate(job)
+    await db.commit()
+    job_queue.notify()
+    response.headers["Location"] = f"/jobs/{result.id}"
+    return result
+
 @router.get("/", response_model=List[TransactionResponse])
-def get_transactions(
-    db: Session = Depends(get_db), 
+async def get_transactions(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    type: Optional[str] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get transactions for the current user, one page at a time (newest first).
+    Pass the `X-Next-Cursor` response header back as `after` for the next page.
+    Send the ETag back in `If-None-Match` to get a 304 while nothing changed.
+    """
+    cached = await conditional(request, response, db, current_user.id, TRANSACTIONS)
+    if cached is not None:
+        return cached
+
+    stmt = select(*TRANSACTION_COLUMNS).where(Transaction.owner_id == current_user.id)
+    if type is not None:
+        stmt = stmt.where(Transaction.type == type)
+    if category is not None:
+        stmt = stmt.where(Transaction.category == category)
+    if created_from is not None:
+        stmt = stmt.where(Transaction.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Transaction.created_at < created_to)
+
+    try:
+        rows, next_cursor = await db.run_sync(keyset_page, stmt, Transaction, current_user.id, limit, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return fast_response(transaction_rows.dump_all(rows), response)
+
+EXPORT_COLUMNS = [
+    Transaction.id, Transaction.amount, Transaction.currency, Transaction.type, Transaction.description,
+    Transaction.category, Transaction.created_at, Transaction.owner_id,
+]
+
+@router.get("/export")
+async def export_transactions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream every transaction of the current user as NDJSON or CSV, newest first.
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(Transaction.owner_id == current_user.id)
+        .order_by(Transaction.created_at.desc(), Transaction.id.desc())
+    )
+    return StreamingResponse(
+        stream_export(stmt, [c.key for c in EXPORT_COLUMNS], format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'},
+    )
+
+@router.get("/changes", response_model=TransactionChanges)
+async def get_transaction_changes(
+    response: Response,
+    since: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all transactions for the current user.
+    Incremental sync: transactions created or changed after version `since`.
+    Start with since=0, then pass the returned `version`. While `X-Next-Cursor`
+    is set, pass it as `after` for the rest of the changes.
+    """
+    try:
+        version, rows, deleted, next_cursor = await db.run_sync(
+            changes, Transaction, current_user.id, TRANSACTIONS, since, limit, after, TRANSACTION_COLUMNS
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return fast_response({"version": version, "changed": transaction_rows.dump_all(rows), "deleted": deleted}, response)
+
+async def _convert_groups(
+    db: AsyncSession, groups: Dict[object, Dict[str, list]], currency: str, as_of: date,
+) -> Tuple[Dict[object, list], Dict[str, list]]:
+    """
+    Convert {key: {currency: [amounts in minor units]}} to `currency` at the
+    rates of `as_of`, as floats. Currencies without a usable rate are left out
+    of the conversion rather than failing it; they come back separately,
+    summed over all keys in their own units: (converted, {currency: amounts}).
     """
-    return db.query(Transaction).filter(Transaction.owner_id == current_user.id).order_by(Transaction.created_at.desc()).all()
+    def run(sync_db):
+        missing = set(missing_rates(sync_db, {c for totals in groups.values() for c in totals}, currency, as_of))
+        converted, unconverted = {}, {}
+        for key, totals in groups.items():
+            width = len(next(iter(totals.values())))
+            usable = {c: values for c, values in totals.items() if c not in missing}
+            converted[key] = [float(v) for v in convert(sync_db, usable, currency, as_of)] if usable else [0.0] * width
+            for c in totals.keys() & missing:
+                sums = unconverted.setdefault(c, [0] * width)
+                for i, minor in enumerate(totals[c]):
+                    sums[i] += minor
+        return converted, {c: [float(from_minor(minor, c)) for minor in sums] for c, sums in sorted(unconverted.items())}
+
+    return await db.run_sync(run)
 
 @router.get("/summary")
-def get_finance_summary(
-    db: Session = Depends(get_db),
+async def get_finance_summary(
+    request: Request,
+    response: Response,
+    currency: str = Query(DEFAULT_CURRENCY, pattern=CURRENCY_PATTERN),
+    as_of: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get total income, expense, and balance (Legacy: Assumes all in UZS now).
+    Get total income, expense, and balance in `currency`, converting other
+    currencies at the exchange rates of `as_of` (default: today, UTC).
+    Currencies with no rate yet are not in the totals: `converted` is false
+    and `unconverted` has their totals in their own units. Served from the
+    user's per-currency finance rollups with one primary-key range read, or
+    a 304 when `If-None-Match` carries the current ETag.
     """
-    transactions = db.query(Transaction).filter(Transaction.owner_id == current_user.id).all()
-    
-    total_income = 0.0
-    total_expense = 0.0
-    
-    for t in transactions:
-        if t.type == "income":
-            total_income += t.amount
-        else:
-            total_expense += t.amount
-    
+    as_of = as_of or datetime.now(timezone.utc).date()
+    # The converted totals also change with the day and whenever rates are loaded
+    variant = f"{as_of}|{await db.run_sync(rates_version)}"
+    cached = await conditional(request, response, db, current_user.id, TRANSACTIONS, variant)
+    if cached is not None:
+        return cached
+
+    rollups = await db.run_sync(ensure_rollup, current_user.id)
+    totals = {
+        rollup.currency: [rollup.total_income, rollup.total_expense, rollup.total_income - rollup.total_expense]
+        for rollup in rollups
+    }
+    await db.commit()  # persists the rollups if they were just built
+    converted, unconverted = await _convert_groups(db, {None: totals}, currency, as_of)
+    income, expense, balance = converted[None]
+    return {
+        "currency": currency,
+        "as_of": as_of.isoformat(),
+        "total_income": income,
+        "total_expense": expense,
+        "net_balance": balance,
+        "converted": not unconverted,
+        "unconverted": [
+            {"currency": c, "total_income": inc, "total_expense": exp, "net_balance": bal}
+            for c, (inc, exp, bal) in unconverted.items()
+        ],
+    }
+
+def _period_bucket(db: AsyncSession, period: str):
+    """
+    SQL expression labelling each transaction with the start date (YYYY-MM-DD)
+    of its day/week/month. Weeks start on Monday on both backends.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return func.to_char(func.date_trunc(period, Transaction.created_at), "YYYY-MM-DD")
+    if period == "day":
+        return func.date(Transaction.created_at)
+    if period == "week":
+        return func.date(Transaction.created_at, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", Transaction.created_at)
+
+@router.get("/analytics", response_model=FinanceAnalytics)
+async def get_finance_analytics(
+    period: str = Query("month", pattern="^(day|week|month)$"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    currency: str = Query(DEFAULT_CURRENCY, pattern=CURRENCY_PATTERN),
+    as_of: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Totals by category and by day/week/month over an optional date range, in
+    `currency`. Both breakdowns are grouped in SQL per currency; only those
+    aggregated rows reach Python, where each is converted at the exchange
+    rates of `as_of` (default: today, UTC), the same rates the summary uses.
+    As there, currencies with no rate yet are left out and reported in
+    `unconverted`, with `converted` false.
+    """
+    filters = [Transaction.owner_id == current_user.id]
+    if created_from is not None:
+        filters.append(Transaction.created_at >= created_from)
+    if created_to is not None:
+        filters.append(Transaction.created_at < created_to)
+
+    income, expense = income_expense_sums()
+    as_of = as_of or datetime.now(timezone.utc).date()
+
+    async def breakdown(key):
+        rows = (await db.execute(
+            select(key, Transaction.currency, income, expense, func.count(Transaction.id))
+            .where(*filters)
+            .group_by(key, Transaction.currency)
+            .order_by(key)
+        )).all()
+        groups: Dict[object, Dict[str, list]] = {}
+        counts: Dict[object, Dict[str, int]] = {}
+        for value, row_currency, inc, exp, count in rows:
+            groups.setdefault(value, {})[row_currency] = [inc or 0, exp or 0]
+            counts.setdefault(value, {})[row_currency] = count
+        converted, unconverted = await _convert_groups(db, groups, currency, as_of)
+        # Counts of the rows that made it into each converted total
+        return converted, {
+            value: sum(n for c, n in by_currency.items() if c not in unconverted)
+            for value, by_currency in counts.items()
+        }, unconverted, counts
+
+    by_category, category_counts, unconverted, counts = await breakdown(Transaction.category)
+    by_period, period_counts, _, _ = await breakdown(_period_bucket(db, period).label("bucket"))
+
     return {
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "net_balance": total_income - total_expense
+        "period": period,
+        "currency": currency,
+        "converted": not unconverted,
+        "unconverted": [
+            {"currency": c, "total_income": inc, "total_expense": exp,
+             "count": sum(by_currency.get(c, 0) for by_currency in counts.values())}
+            for c, (inc, exp) in unconverted.items()
+        ],
+        "by_category": [
+            {"category": category, "total_income": inc, "total_expense": exp, "count": category_counts[category]}
+            for category, (inc, exp) in by_category.items()
+        ],
+        "by_period": [
+            {"period_start": start, "total_income": inc, "total_expense": exp, "count": period_counts[start]}
+            for start, (inc, exp) in by_period.items()
+        ],
     }
@@ -0,0 +1,60 @@
+"""
+Load exchange rates from files into the exchange_rates table. There is no
+live rate service: publish rate files (e.g. the central bank's daily rates)
+and load them after each one arrives.
+
+    python -m app.commands.exchange_rates load rates/2026-10.csv [more.csv ...]
+    python -m app.commands.exchange_rates show USD [--on 2026-10-01]
+
+Files are CSV with the header `date,currency,rate`, where `rate` is the value
+of one unit of the currency in UZS. Loading a (currency, date) again replaces
+its rate. Running API processes pick new rates up within
+EXCHANGE_RATE_CACHE_SECONDS.
+"""
+import argparse
+import sys
+from datetime import date, datetime, timezone
+
+from app.db.database import Base, SessionLocal, engine
+from app.models import exchange_rate
+from app.utils.currency import BASE_CURRENCY, CURRENCIES, MissingRate, load_rates, rate_on, read_rates_file
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load or look up exchange rates.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    load = subparsers.add_parser("load", help="Insert or replace the rates in CSV files")
+    load.add_argument("files", nargs="+")
+    show = subparsers.add_parser("show", help="Print the rate in effect for a currency on a day")
+    show.add_argument("currency", choices=sorted(CURRENCIES))
+    show.add_argument("--on", type=date.fromisoformat, default=None, help="YYYY-MM-DD, default today (UTC)")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine, tables=[exchange_rate.ExchangeRate.__table__])
+
+    db = SessionLocal()
+    try:
+        if args.command == "load":
+            try:
+                rows = [row for path in args.files for row in read_rates_file(path)]
+            except (OSError, ValueError) as e:
+                print(e, file=sys.stderr)
+                return 1
+            loaded = load_rates(db, rows)
+            db.commit()
+            print(f"Loaded {loaded} exchange rates")
+            return 0
+
+        day = args.on or datetime.now(timezone.utc).date()
+        try:
+            print(f"1 {args.currency} = {rate_on(db, args.currency, day)} {BASE_CURRENCY} on {day.isoformat()}")
+        except MissingRate as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Maintenance commands for the materialized finance rollups.
+
+    python -m app.commands.finance_rollup rebuild [--batch-size 500]
+    python -m app.commands.finance_rollup check [--batch-size 500]
+"""
+import argparse
+import sys
+
+from app.db.database import Base, SessionLocal, engine
+from app.models import finance_rollup, subtask, task, transaction, user  # noqa: F401  (register tables)
+from app.utils.finance_rollup import check_rollups, rebuild_rollups
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild or verify per-user finance rollups.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--batch-size", type=int, default=500, help="Users processed per DB transaction")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine, tables=[
+        finance_rollup.UserFinanceRollup.__table__,
+        finance_rollup.UserCategoryRollup.__table__,
+    ])
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            processed = rebuild_rollups(db, batch_size=args.batch_size)
+            print(f"Rebuilt finance rollups for {processed} users")
+            return 0
+
+        mismatches = check_rollups(db, batch_size=args.batch_size)
+        for m in mismatches:
+            print(f"owner={m['owner_id']} category={m['category']} month={m['month']} currency={m['currency']} "
+                  f"expected={m['expected']} actual={m['actual']}")
+        print(f"{len(mismatches)} mismatching rollups")
+        return 1 if mismatches else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
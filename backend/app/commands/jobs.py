@@ -0,0 +1,80 @@
+"""
+Background job maintenance.
+
+    python -m app.commands.jobs enqueue recategorize_transactions [--owner-id 7]
+    python -m app.commands.jobs enqueue reprioritize_tasks [--owner-id 7]
+    python -m app.commands.jobs enqueue backfill_streaks [--owner-id 7]
+    python -m app.commands.jobs status JOB_ID
+    python -m app.commands.jobs work [--workers 2]
+
+`enqueue` without --owner-id walks every user's rows. `work` runs job workers
+without the API, e.g. when the API runs with JOB_WORKERS=0.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.db.database import Base, SessionLocal, engine
+from app.models import finance_rollup, job, streak, subtask, task, transaction, user  # noqa: F401  (register tables)
+from app.utils import job_handlers  # noqa: F401  (register job kinds)
+from app.utils.jobs import JOB_WORKERS, JobQueue, enqueue
+
+BATCH_KINDS = ["recategorize_transactions", "reprioritize_tasks", "backfill_streaks"]
+
+
+async def _work(workers: int):
+    queue = JobQueue(workers=workers)
+    await queue.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await queue.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Enqueue, inspect or run background jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    enqueue_parser = commands.add_parser("enqueue")
+    enqueue_parser.add_argument("kind", choices=BATCH_KINDS)
+    enqueue_parser.add_argument("--owner-id", type=int, help="Only this user's rows")
+    status_parser = commands.add_parser("status")
+    status_parser.add_argument("job_id", type=int)
+    work_parser = commands.add_parser("work")
+    work_parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1))
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine, tables=[job.Job.__table__])
+
+    if args.command == "work":
+        try:
+            asyncio.run(_work(args.workers))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    db = SessionLocal()
+    try:
+        if args.command == "enqueue":
+            scope = f"{args.owner_id}" if args.owner_id is not None else "all"
+            new_job = enqueue(db, args.kind, args.owner_id, None, f"{args.kind}:{scope}")
+            db.commit()
+            print(f"Job {new_job.id} {new_job.status}")
+            return 0
+
+        found = db.get(job.Job, args.job_id)
+        if found is None:
+            print(f"Job {args.job_id} not found")
+            return 1
+        print(f"Job {found.id} {found.kind}: {found.status}, attempt {found.attempts}/{found.max_attempts}, "
+              f"{found.processed} rows processed")
+        if found.result:
+            print(f"result: {found.result}")
+        if found.error:
+            print(f"error: {found.error}")
+        return 0 if found.status != "failed" else 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
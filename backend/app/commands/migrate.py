@@ -0,0 +1,41 @@
+"""
+Bring the database schema up to date. Run once per deploy, before the new
+code serves traffic; the API itself doesn't create tables (except for a
+throwaway in-memory SQLite DB, or a local SQLite file outside fast-startup mode).
+
+    python -m app.commands.migrate
+    python -m app.commands.migrate --status
+
+Creates missing tables, then applies pending revisions from app/db/migrations
+(see its docstring for writing online-safe ones). Idempotent.
+"""
+import argparse
+import sys
+
+from app.db.database import DATABASE_URL, get_engine
+from app.db.schema import create_schema
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Create missing tables and apply pending schema revisions.")
+    parser.add_argument("--status", action="store_true", help="List applied and pending revisions, change nothing")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        from app.db.migrations import applied_revisions, revisions
+
+        done = set(applied_revisions(get_engine()))
+        for revision in revisions():
+            state = "applied" if revision.REVISION in done else "pending"
+            print(f"{revision.REVISION} {state:8} {revision.DESCRIPTION}")
+        return 0
+
+    applied = create_schema()
+    for revision in applied:
+        print(f"Applied revision {revision}")
+    print(f"Schema is up to date on {DATABASE_URL.split('://', 1)[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
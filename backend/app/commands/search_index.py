@@ -0,0 +1,34 @@
+"""
+Create and fill the full-text search index on a database whose tables predate it.
+
+    python -m app.commands.search_index [--batch-size 50000]
+
+Safe to re-run: the index is cleared and rebuilt from the tasks and transactions
+tables. New databases get the index from create_all, and `python -m
+app.commands.migrate` builds it once on existing ones (revision 0003); this is
+for rebuilding it later.
+"""
+import argparse
+import sys
+
+from app.db.database import SessionLocal
+from app.models import subtask, task, transaction, user  # noqa: F401  (register tables)
+from app.utils.search import install_search_index
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build the full-text search index.")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows indexed per DB transaction")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        install_search_index(db, batch_size=args.batch_size)
+        print("Search index is up to date")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Where startup time goes: imports the app in a fresh interpreter under
+`python -X importtime` and summarizes the result.
+
+    python -m app.commands.startup_profile [--module app.main] [--top 20] [--json]
+    FAST_STARTUP=1 python -m app.commands.startup_profile
+
+Reports self time summed per top-level package (fastapi, sqlalchemy, app, ...)
+and the slowest modules by cumulative and by self time. Times are in ms.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import List, NamedTuple
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us), depth))
+    return timings
+
+
+def profile(module: str) -> List[ImportTiming]:
+    backend = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend, env=dict(os.environ), capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(timings: List[ImportTiming], top: int) -> dict:
+    def ms(us):
+        return round(us / 1000, 1)
+
+    packages = defaultdict(int)
+    for timing in timings:
+        packages[timing.module.split(".")[0]] += timing.self_us
+    by_cumulative = sorted((t for t in timings if t.module.startswith("app")), key=lambda t: -t.cumulative_us)
+    by_self = sorted(timings, key=lambda t: -t.self_us)
+    return {
+        "total_ms": ms(sum(t.self_us for t in timings)),
+        "modules": len(timings),
+        "packages_ms": {name: ms(us) for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+        "app_modules_cumulative_ms": {t.module: ms(t.cumulative_us) for t in by_cumulative[:top]},
+        "slowest_self_ms": {t.module: ms(t.self_us) for t in by_self[:top]},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Profile the imports behind a cold start.")
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=20, help="Rows per section")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of tables")
+    args = parser.parse_args(argv)
+
+    report = summarize(profile(args.module), args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"import {args.module}: {report['total_ms']} ms across {report['modules']} modules")
+    for title, key in (
+        ("Self time by package", "packages_ms"),
+        ("App modules by cumulative time", "app_modules_cumulative_ms"),
+        ("Slowest modules by self time", "slowest_self_ms"),
+    ):
+        print(f"\n{title}:")
+        for name, value in report[key].items():
+            print(f"  {value:>8.1f}  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Move the JSON `tasks.subtasks` values into the normalized subtasks table.
+
+    python -m app.commands.subtasks migrate [--batch-size 500]
+
+Resumable and safe to run while the API is serving: tasks are processed in id
+order, one commit per batch, and tasks the API has already normalized are skipped.
+"""
+import argparse
+import sys
+
+from app.db.database import Base, SessionLocal, engine
+from app.models import subtask, task, transaction, user  # noqa: F401  (register tables)
+from app.utils.subtasks import migrate_legacy_subtasks
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Migrate legacy JSON subtasks to the subtasks table.")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("--batch-size", type=int, default=500, help="Tasks processed per DB transaction")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine, tables=[subtask.Subtask.__table__])
+
+    db = SessionLocal()
+    try:
+        migrated, skipped = migrate_legacy_subtasks(db, batch_size=args.batch_size)
+        print(f"Migrated subtasks of {migrated} tasks, skipped {skipped} with unreadable values")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,221 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DisconnectionError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+from typing import Callable, List
 import os
-from dotenv import load_dotenv
-load_dotenv()
+import threading
+import time
 
 # Vercel Compatibility:
 # 1. If DATABASE_URL is missing, default to a temporary SQLite file in /tmp (writable in serverless).
 # 2. If running locally, it uses .env value or falls back to local file.
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Vercel compatibility: 
+# Vercel compatibility:
 if os.getenv("VERCEL") == "1":
     if not DATABASE_URL:
         DATABASE_URL = "sqlite:///:memory:"
     elif DATABASE_URL.startswith("postgres://"):
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-connect_args = {}
-if DATABASE_URL and "sqlite" in DATABASE_URL:
-    connect_args = {"check_same_thread": False}
+# SQLAlchemy 2.1 maps a bare postgresql:// to psycopg 3; we ship psycopg2
+if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
+    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://", 1)
+
+SERVERLESS = os.getenv("VERCEL") == "1"
+
+# Pooling strategy:
+#   queue  keep up to DB_POOL_SIZE (+ DB_MAX_OVERFLOW) connections open per process
+#   null   open a connection per session and close it after; for use behind an
+#          external pooler such as PgBouncer, which does the reuse instead
+DB_POOL = os.getenv("DB_POOL", "queue")
+# Serverless instances serve one request at a time, so a warm instance needs one connection
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 1 if SERVERLESS else 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 2 if SERVERLESS else 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Connections older than this are replaced on checkout (servers and proxies drop idle ones)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Ping a pooled connection on checkout only if it sat idle longer than this;
+# 0 pings on every checkout, -1 never pings
+DB_PING_IDLE_SECONDS = float(os.getenv("DB_PING_IDLE_SECONDS", 30))
+# Compiled SQL kept per engine, so repeated statements skip compilation
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", 1000))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", 10))
+
+# psycopg2: multi-row INSERT ... VALUES pages, and execute_batch pages for UPDATE/DELETE executemany
+DB_INSERTMANYVALUES_PAGE_SIZE = int(os.getenv("DB_INSERTMANYVALUES_PAGE_SIZE", 1000))
+DB_EXECUTEMANY_PAGE_SIZE = int(os.getenv("DB_EXECUTEMANY_PAGE_SIZE", 500))
+# asyncpg prepared statements cached per connection; PgBouncer in transaction
+# mode can't keep them, so the null pool turns them off
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 0 if DB_POOL == "null" else 100))
+
+# SQLite pragmas, applied to every new connection
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # durable in WAL mode, fewer fsyncs than FULL
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", 256))
+
+# Every connection to sqlite:///:memory: is a separate, empty database, so an
+# in-memory DB is one connection shared by all threads (sessions take turns on it)
+IN_MEMORY = ":memory:" in (DATABASE_URL or "")
+
+# Async mode (DB_ASYNC=1): request handlers talk to the DB through an AsyncSession
+# on asyncpg/aiosqlite instead of borrowing threadpool workers. The sync engine
+# stays available for schema creation and maintenance commands.
+# An in-memory SQLite DB can't be shared between two engines, so it stays sync.
+DB_ASYNC = os.getenv("DB_ASYNC") == "1" and not IN_MEMORY
+
+def _async_url(url: str) -> str:
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    return url
+
+
+def engine_options(url: str, pool: str = DB_POOL, is_async: bool = False) -> dict:
+    """
+    create_engine() keyword arguments for `url` under the configured pooling strategy.
+    """
+    options = {"query_cache_size": DB_QUERY_CACHE_SIZE, "connect_args": {}}
+    if ":memory:" in url:
+        options["poolclass"] = StaticPool
+    elif pool == "null":
+        options["poolclass"] = NullPool
+    elif pool == "queue":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            # Most recently used first: the pool shrinks back to what the load needs
+            pool_use_lifo=True,
+            pool_pre_ping=DB_PING_IDLE_SECONDS == 0,
+        )
+        if not is_async:
+            options["poolclass"] = QueuePool
+    else:
+        raise ValueError(f"Unknown DB_POOL: {pool}")
+
+    if url.startswith("sqlite"):
+        options["connect_args"]["check_same_thread"] = False
+    elif url.startswith("postgresql+psycopg2"):
+        options.update(
+            executemany_mode="values_plus_batch",
+            insertmanyvalues_page_size=DB_INSERTMANYVALUES_PAGE_SIZE,
+            executemany_batch_page_size=DB_EXECUTEMANY_PAGE_SIZE,
+        )
+        options["connect_args"]["connect_timeout"] = DB_CONNECT_TIMEOUT
+    elif url.startswith("postgresql+asyncpg"):
+        options["connect_args"].update(timeout=DB_CONNECT_TIMEOUT, statement_cache_size=DB_STATEMENT_CACHE_SIZE)
+        if DB_STATEMENT_CACHE_SIZE == 0:
+            # SQLAlchemy's own prepared-statement cache, also unsafe behind PgBouncer
+            options["connect_args"]["prepared_statement_cache_size"] = 0
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    if SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+    cursor.close()
+
+
+def _mark_checkin(dbapi_connection, connection_record):
+    connection_record.info["checked_in_at"] = time.monotonic()
+
+
+def configure_engine(engine: Engine):
+    """
+    Connection-level setup shared by the sync engine and an async engine's
+    sync_engine: SQLite pragmas and the idle-only ping.
+    """
+    if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+
+    if DB_PING_IDLE_SECONDS > 0 and isinstance(engine.pool, QueuePool):
+        dialect = engine.dialect
+
+        def ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+            checked_in_at = connection_record.info.get("checked_in_at")
+            if checked_in_at is None or time.monotonic() - checked_in_at < DB_PING_IDLE_SECONDS:
+                return
+            try:
+                dialect.do_ping(dbapi_connection)
+            except Exception as e:
+                # The pool discards the connection and retries with a fresh one
+                raise DisconnectionError() from e
+
+        event.listen(engine.pool, "checkin", _mark_checkin)
+        event.listen(engine.pool, "checkout", ping_if_idle)
+
+
+# Engines are created on first use rather than at import, so a cold start that
+# never touches the DB doesn't load the driver or build a pool
+_lock = threading.RLock()
+_state: dict = {}
+_engine_hooks: List[Callable[[Engine], None]] = []
+
+
+def on_engine_created(hook: Callable[[Engine], None]):
+    """
+    Call `hook(engine)` for every engine, now for those already created and
+    later for the rest. Async engines are passed as their sync_engine.
+    """
+    with _lock:
+        _engine_hooks.append(hook)
+        engines = [_state[name] for name in ("engine", "async_engine") if _state.get(name) is not None]
+    for engine in engines:
+        hook(getattr(engine, "sync_engine", engine))
+
+
+def get_engine() -> Engine:
+    with _lock:
+        if "engine" not in _state:
+            engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+            configure_engine(engine)
+            _state["engine"] = engine
+            _state["SessionLocal"] = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+            for hook in _engine_hooks:
+                hook(engine)
+        return _state["engine"]
+
+
+def get_async_engine():
+    """
+    The async engine in async mode, otherwise None.
+    """
+    if not DB_ASYNC:
+        return None
+    with _lock:
+        if "async_engine" not in _state:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            url = _async_url(DATABASE_URL)
+            async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+            configure_engine(async_engine.sync_engine)
+            _state["async_engine"] = async_engine
+            # Handlers serialize ORM objects after commit; expiring them would force a
+            # lazy load outside the async context.
+            _state["AsyncSessionLocal"] = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+            for hook in _engine_hooks:
+                hook(async_engine.sync_engine)
+        return _state["async_engine"]
+
+
+def __getattr__(name: str):
+    # `from app.db.database import engine` (and friends) keeps working, creating the engine then
+    if name in ("engine", "SessionLocal"):
+        get_engine()
+        return _state[name]
+    if name in ("async_engine", "AsyncSessionLocal"):
+        return _state[name] if get_async_engine() is not None else None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args=connect_args,
-    pool_pre_ping=True  # Automatically check connection before using it
-)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 Base = declarative_base()
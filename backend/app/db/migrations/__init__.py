@@ -0,0 +1,183 @@
+"""
+Schema revisions: numbered modules in this package (r0001_owner_indexes.py,
+...) applied in order by `python -m app.commands.migrate` and recorded in the
+schema_migrations table. Tables that don't exist yet come from the models via
+create_all(); revisions change the tables that do.
+
+A revision defines REVISION ("0002"), DESCRIPTION and upgrade(op: Operations).
+Every step must be idempotent: on Postgres each one runs and commits on its
+own (CREATE INDEX CONCURRENTLY can't run inside a transaction), so a
+revision that fails halfway is simply run again.
+
+Online-safe changes on large tables
+-----------------------------------
+- Indexes: op.create_index() / op.drop_index() build and drop them
+  CONCURRENTLY on Postgres, so writes continue meanwhile; a build that failed
+  leaves an INVALID index, which the next attempt drops and rebuilds. SQLite
+  blocks writers (not WAL readers) for the length of the build, so run those
+  revisions at low traffic.
+- DDL takes an ACCESS EXCLUSIVE lock, however briefly. op sets lock_timeout
+  (MIGRATION_LOCK_TIMEOUT), so a statement stuck behind a long transaction
+  fails fast instead of queueing every query behind it; rerun the migration.
+- Columns: add them nullable or with a constant default (instant on Postgres
+  11+ and SQLite), backfill in batches that commit as they go (op.backfill(),
+  a job, or a command like `python -m app.commands.subtasks migrate`), and only then
+  tighten them: NOT NULL via a CHECK ... NOT VALID constraint followed by
+  VALIDATE CONSTRAINT, which doesn't block writes.
+- Never rewrite a big table in one statement (a type change, a volatile
+  default, an UPDATE of every row): add a new column, backfill it, switch
+  the code over, drop the old one.
+- Expand, then contract: additive revisions ship before the code that needs
+  them; drops ship in a release after the code stopped using what they drop.
+- Every per-user table is indexed with owner_id first and every query filters
+  on it, so the big tables can later be hash-partitioned by owner_id (on
+  Postgres their primary keys would then become (id, owner_id)).
+"""
+import importlib
+import os
+import pkgutil
+import re
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+# Postgres: give up on a DDL statement that waits this long for its lock
+MIGRATION_LOCK_TIMEOUT = os.getenv("MIGRATION_LOCK_TIMEOUT", "5s")
+# Rows per committed UPDATE in op.backfill()
+MIGRATION_BACKFILL_BATCH_SIZE = int(os.getenv("MIGRATION_BACKFILL_BATCH_SIZE", 5000))
+
+_REVISION_MODULE = re.compile(r"r(\d{4})_\w+")
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("revision", String, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def revisions() -> list:
+    """
+    Every revision module, oldest first.
+    """
+    names = sorted(
+        info.name for info in pkgutil.iter_modules(__path__) if _REVISION_MODULE.fullmatch(info.name)
+    )
+    return [importlib.import_module(f"{__name__}.{name}") for name in names]
+
+
+class Operations:
+    """
+    The steps a revision can take. Each runs and commits on its own.
+    """
+
+    def __init__(self, bind: Engine):
+        self.bind = bind
+        self.dialect = bind.dialect.name
+
+    def _quote(self, name: str) -> str:
+        return self.bind.dialect.identifier_preparer.quote(name)
+
+    def _connect(self, autocommit: bool = False) -> Connection:
+        conn = self.bind.connect()
+        if autocommit:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        if self.dialect == "postgresql":
+            conn.execute(text(f"SET lock_timeout = '{MIGRATION_LOCK_TIMEOUT}'"))
+        return conn
+
+    def execute(self, sql: str, **params):
+        with self._connect() as conn:
+            conn.execute(text(sql), params)
+            conn.commit()
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in {c["name"] for c in inspect(self.bind).get_columns(table)}
+
+    def add_column(self, table: str, column: str, column_type: str, default: Optional[str] = None):
+        """
+        Add a column unless it exists: nullable without a default, or NOT NULL
+        with the constant string `default`.
+        """
+        if self.has_column(table, column):
+            return
+        definition = f"{self._quote(column)} {column_type}"
+        if default is not None:
+            definition += " NOT NULL DEFAULT '{}'".format(default.replace("'", "''"))
+        self.execute(f"ALTER TABLE {self._quote(table)} ADD COLUMN {definition}")
+
+    def backfill(self, table: str, column: str, expression: str):
+        """
+        Set `column` to the SQL `expression` where it is NULL, walking the id
+        range MIGRATION_BACKFILL_BATCH_SIZE rows per commit, so no statement
+        locks or rewrites the whole table.
+        """
+        with self._connect() as conn:
+            last_id = conn.scalar(text(f"SELECT max(id) FROM {self._quote(table)}")) or 0
+        for start in range(0, last_id, MIGRATION_BACKFILL_BATCH_SIZE):
+            self.execute(
+                f"UPDATE {self._quote(table)} SET {self._quote(column)} = {expression} "
+                f"WHERE id > :start AND id <= :end AND {self._quote(column)} IS NULL",
+                start=start, end=start + MIGRATION_BACKFILL_BATCH_SIZE,
+            )
+
+    def create_index(self, name: str, table: str, columns: Sequence[str] = (), expression: Optional[str] = None,
+                     using: Optional[str] = None):
+        """
+        Index `columns`, or the SQL `expression` instead, with the index method
+        `using` (e.g. GIN) if given.
+        """
+        column_list = expression or ", ".join(self._quote(column) for column in columns)
+        target = self._quote(table) + (f" USING {using}" if using else "")
+        if self.dialect != "postgresql":
+            self.execute(f"CREATE INDEX IF NOT EXISTS {self._quote(name)} ON {target} ({column_list})")
+            return
+        with self._connect(autocommit=True) as conn:
+            invalid = conn.scalar(text(
+                "SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+            ), {"name": name})
+            if invalid:
+                # Left behind by a concurrent build that failed
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {self._quote(name)}"))
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self._quote(name)} ON {target} ({column_list})"
+            ))
+
+    def drop_index(self, name: str):
+        if self.dialect != "postgresql":
+            self.execute(f"DROP INDEX IF EXISTS {self._quote(name)}")
+            return
+        with self._connect(autocommit=True) as conn:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {self._quote(name)}"))
+
+
+def applied_revisions(bind: Engine) -> List[str]:
+    schema_migrations.create(bind, checkfirst=True)
+    with bind.connect() as conn:
+        return list(conn.scalars(select(schema_migrations.c.revision).order_by(schema_migrations.c.revision)))
+
+
+def pending_revisions(bind: Engine) -> list:
+    done = set(applied_revisions(bind))
+    return [revision for revision in revisions() if revision.REVISION not in done]
+
+
+def upgrade(bind: Engine, target: Optional[str] = None) -> List[str]:
+    """
+    Apply pending revisions up to `target` (all by default), in order.
+    Returns the revisions applied.
+    """
+    applied = []
+    op = Operations(bind)
+    for revision in pending_revisions(bind):
+        if target is not None and revision.REVISION > target:
+            break
+        revision.upgrade(op)
+        with bind.begin() as conn:
+            conn.execute(schema_migrations.insert().values(
+                revision=revision.REVISION, description=revision.DESCRIPTION, applied_at=datetime.now(timezone.utc),
+            ))
+        applied.append(revision.REVISION)
+    return applied
@@ -0,0 +1,38 @@
+"""
+Columns added since the first release, and indexes that match the queries.
+
+Databases created before these columns and indexes existed only got what
+create_all() makes for missing tables, so everything here is ensured, not
+assumed. Every router query filters on owner_id; each index leads with it:
+
+- (owner_id, created_at, id) on tasks and transactions: list pages
+  (keyset, newest first), exports and the created_from/created_to filters
+- (owner_id, row_version, id) on tasks and transactions: /changes
+- (owner_id, is_completed, created_at, id) on tasks: the is_completed list
+  filter, pages included, and the streak backfill
+- (owner_id, type, category) on transactions: the type/category list
+  filters
+
+tasks.title was indexed but is never filtered on (search uses the full-text
+index), and the id indexes repeat the primary key; dropping them saves a
+b-tree update on every write.
+"""
+
+REVISION = "0001"
+DESCRIPTION = "Owner-leading indexes; drop unused title and id indexes"
+
+
+def upgrade(op):
+    op.add_column("tasks", "row_version", "INTEGER")
+    op.add_column("tasks", "completed_at", "TIMESTAMP WITH TIME ZONE" if op.dialect == "postgresql" else "DATETIME")
+    op.add_column("transactions", "row_version", "INTEGER")
+
+    op.create_index("ix_tasks_owner_created_id", "tasks", ["owner_id", "created_at", "id"])
+    op.create_index("ix_tasks_owner_row_version_id", "tasks", ["owner_id", "row_version", "id"])
+    op.create_index("ix_tasks_owner_completed_created_id", "tasks", ["owner_id", "is_completed", "created_at", "id"])
+    op.create_index("ix_transactions_owner_created_id", "transactions", ["owner_id", "created_at", "id"])
+    op.create_index("ix_transactions_owner_row_version_id", "transactions", ["owner_id", "row_version", "id"])
+    op.create_index("ix_transactions_owner_type_category", "transactions", ["owner_id", "type", "category"])
+
+    for name in ("ix_tasks_title", "ix_tasks_id", "ix_transactions_id", "ix_subtasks_id"):
+        op.drop_index(name)
@@ -0,0 +1,26 @@
+"""
+Transaction currencies and exact amounts.
+
+- transactions.currency: every existing row was recorded in UZS, so the
+  column is added with that as its constant default (no table rewrite)
+- transactions.amount_minor: the amount in integer minor units, which every
+  sum now uses; backfilled from the float amount in committed batches (UZS
+  has two decimal places). amount stays for display and older readers.
+  The previous release keeps writing rows without it until it is replaced,
+  so sums fall back to the float amount where it is NULL; NOT NULL can come
+  in a later revision, after a second backfill
+- Rollups are now kept per currency in new tables, created empty like any
+  new table; ensure_rollup() builds each user's on first use (or run
+  `python -m app.commands.finance_rollup rebuild` after deploying). The old
+  user_finance_rollups and user_category_rollups are no longer written, and
+  are left for a later revision to drop once no running release reads them
+"""
+
+REVISION = "0002"
+DESCRIPTION = "Transaction currency and minor-unit amounts; per-currency rollups"
+
+
+def upgrade(op):
+    op.add_column("transactions", "currency", "VARCHAR(3)", default="UZS")
+    op.add_column("transactions", "amount_minor", "BIGINT")
+    op.backfill("transactions", "amount_minor", "CAST(ROUND(amount * 100) AS BIGINT)")
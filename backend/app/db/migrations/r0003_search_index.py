@@ -0,0 +1,26 @@
+"""
+Full-text search on databases whose tasks and transactions tables predate it.
+
+New tables get the search structures from create_all (see app.utils.search);
+existing ones got nothing, so /search failed on them.
+
+- Postgres: the GIN expression indexes, built CONCURRENTLY
+- SQLite: the FTS5 tables and their sync triggers, then every existing row
+  indexed in committed batches (install_search_index, which also backs
+  `python -m app.commands.search_index`). Re-running rebuilds the index
+"""
+from sqlalchemy.orm import Session
+
+from app.utils.search import POSTGRES_SEARCH_INDEXES, install_search_index
+
+REVISION = "0003"
+DESCRIPTION = "Full-text search index on existing tasks and transactions"
+
+
+def upgrade(op):
+    if op.dialect == "postgresql":
+        for name, table, expression in POSTGRES_SEARCH_INDEXES:
+            op.create_index(name, table, expression=expression, using="GIN")
+        return
+    with Session(op.bind) as db:
+        install_search_index(db)
@@ -0,0 +1,20 @@
+from typing import List, Optional
+
+from sqlalchemy.engine import Engine
+
+from app.db.database import Base, get_engine
+
+
+def create_schema(bind: Optional[Engine] = None) -> List[str]:
+    """
+    Create missing tables (with their indexes and search triggers), then
+    apply pending revisions from app/db/migrations to the tables that
+    already existed. Returns the revisions applied.
+    """
+    import app.models  # noqa: F401  (register tables)
+    import app.utils.search  # noqa: F401  (full-text index DDL runs after its tables)
+    from app.db.migrations import upgrade
+
+    bind = bind or get_engine()
+    Base.metadata.create_all(bind=bind)
+    return upgrade(bind)
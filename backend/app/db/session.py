@@ -0,0 +1,156 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+from weakref import WeakKeyDictionary
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool, StaticPool
+from app.db import database
+
+# One semaphore per event loop, sized to the connection pool (see ThreadedSession)
+_connection_slots: "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = WeakKeyDictionary()
+
+
+def _pool_capacity(session: Session) -> Optional[int]:
+    pool = session.get_bind().pool
+    if isinstance(pool, QueuePool) and pool._max_overflow >= 0:
+        return pool.size() + pool._max_overflow
+    if isinstance(pool, StaticPool):
+        # One shared connection: sessions must not interleave their transactions on it
+        return 1
+    return None
+
+
+class ThreadedSession:
+    """
+    Sync-mode stand-in for AsyncSession: the same awaitable API, with every
+    blocking call run on Starlette's threadpool. Lets handlers be written once
+    and run unchanged whether DB_ASYNC is on or off.
+
+    A request holds its pooled connection across several threadpool hops, so
+    more in-flight requests than pool slots could leave every worker thread
+    blocked on the pool while the requests that own the connections wait for
+    a thread. To rule that out, a session takes a slot before its first DB call
+    and gives it back when it commits, rolls back or closes, which is exactly
+    when SQLAlchemy returns the connection.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+        self._slots = None
+        self._holding = False
+        capacity = _pool_capacity(session)
+        if capacity is not None:
+            loop = asyncio.get_running_loop()
+            self._slots = _connection_slots.get(loop)
+            if self._slots is None:
+                self._slots = _connection_slots[loop] = asyncio.Semaphore(capacity)
+
+    async def _run(self, fn, *args, _release: bool = False, **kwargs):
+        if self._slots is not None and not self._holding:
+            await self._slots.acquire()
+            self._holding = True
+        try:
+            return await run_in_threadpool(fn, *args, **kwargs)
+        finally:
+            if _release and self._holding:
+                self._holding = False
+                self._slots.release()
+
+    @property
+    def bind(self):
+        return self.sync_session.bind
+
+    @property
+    def info(self):
+        return self.sync_session.info
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def delete(self, instance):
+        await self._run(self.sync_session.delete, instance)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await self._run(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await self._run(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await self._run(self.sync_session.scalars, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await self._run(self.sync_session.get, entity, ident, **kwargs)
+
+    async def flush(self):
+        await self._run(self.sync_session.flush)
+
+    async def commit(self):
+        await self._run(self.sync_session.commit, _release=True)
+
+    async def rollback(self):
+        await self._run(self.sync_session.rollback, _release=True)
+
+    async def refresh(self, instance, attribute_names=None):
+        await self._run(self.sync_session.refresh, instance, attribute_names)
+
+    async def stream(self, statement, *args, **kwargs):
+        """
+        Like AsyncSession.stream: pair with execution_options(yield_per=N) so rows
+        are fetched from a server-side cursor partition by partition.
+        """
+        result = await self._run(self.sync_session.execute, statement, *args, **kwargs)
+        return ThreadedResult(self, result)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        """
+        Run `fn(session, *args, **kwargs)` in one threadpool hop, like AsyncSession.run_sync.
+        """
+        return await self._run(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        if self._holding:
+            await self._run(self.sync_session.close, _release=True)
+        else:
+            # No connection checked out, nothing to wait for
+            self.sync_session.close()
+
+
+class ThreadedResult:
+    """
+    The subset of AsyncResult that streaming code uses, for ThreadedSession.
+    """
+
+    def __init__(self, session: ThreadedSession, result):
+        self._session = session
+        self._result = result
+
+    async def partitions(self, size: Optional[int] = None):
+        iterator = self._result.partitions(size)
+        while True:
+            partition = await self._session._run(next, iterator, None)
+            if partition is None:
+                return
+            yield partition
+
+
+@asynccontextmanager
+async def session_scope():
+    """
+    An AsyncSession in async mode (DB_ASYNC=1), otherwise a ThreadedSession
+    wrapping a regular Session. Both expose the same awaitable API.
+    """
+    if database.AsyncSessionLocal is not None:
+        async with database.AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = ThreadedSession(database.SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
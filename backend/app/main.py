@@ -1,29 +1,62 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
 import os
 
-# Load environment variables
-load_dotenv()
+from app.db.database import DATABASE_URL, IN_MEMORY, on_engine_created
+from app.utils.metrics import MetricsMiddleware, instrument_engine
+from app.utils.rate_limit import RateLimitMiddleware
+from app.utils.startup import FAST_STARTUP, LazyRouters, include_router_module
 
-from app.api.health import router as health_router
-from app.api.auth import router as auth_router
-from app.api.tasks import router as tasks_router
-from app.api.transactions import router as transactions_router
-from app.db.database import engine, Base
-from app.models import user, task, transaction
+# URL prefix -> router module, imported at startup or, in fast-startup mode, on first use
+ROUTERS = {
+    "/health": "app.api.health",
+    "/metrics": "app.api.metrics",
+    "/auth": "app.api.auth",
+    "/tasks": "app.api.tasks",
+    "/transactions": "app.api.transactions",
+    "/search": "app.api.search",
+    "/jobs": "app.api.jobs",
+    "/events": "app.api.events",
+}
 
-# Initialize DB tables
-if os.getenv("VERCEL") == "1":
-    Base.metadata.create_all(bind=engine)
-elif "sqlite" in os.getenv("DATABASE_URL", "") and "/tmp" not in os.getenv("DATABASE_URL", ""):
-    Base.metadata.create_all(bind=engine)
+# Initialize DB tables. Persistent databases get them from `python -m app.commands.migrate`;
+# an in-memory DB has nothing to migrate, and local SQLite files keep the old convenience.
+if IN_MEMORY or (not FAST_STARTUP and "sqlite" in (DATABASE_URL or "") and "/tmp" not in DATABASE_URL):
+    from app.db.schema import create_schema
+    create_schema()
+
+on_engine_created(instrument_engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.utils import job_handlers  # noqa: F401  (register job kinds)
+    from app.utils.jobs import job_queue
+
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+
+    from app.utils.security import shutdown_password_executor
+    from app.utils.ai_service import shutdown_ai_executor
+    shutdown_password_executor()
+    shutdown_ai_executor()
 
 app = FastAPI(
     title="AI Task Manager API",
+    lifespan=lifespan,
     root_path="/api" if os.getenv("VERCEL") == "1" else ""
 )
 
+if FAST_STARTUP:
+    app.add_middleware(LazyRouters, fastapi_app=app, routers=ROUTERS)
+else:
+    for module in ROUTERS.values():
+        include_router_module(app, module)
+
+# In front of routing (and lazy router imports), behind CORS so browsers can read its 429/503s
+app.add_middleware(RateLimitMiddleware)
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -31,13 +64,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Location", "ETag", "Retry-After"],
 )
-
-app.include_router(health_router)
-app.include_router(auth_router)
-app.include_router(tasks_router)
-app.include_router(transactions_router)
+# Outermost, so the timing includes CORS handling
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "AI Task Manager API is running"}
@@ -0,0 +1,3 @@
+# Importing any model registers them all, so relationship("Task") and friends
+# resolve however lazily the routers that use them are loaded
+from app.models import exchange_rate, finance_rollup, job, streak, subtask, sync, task, transaction, user  # noqa: F401
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Date, DateTime, String
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class ExchangeRate(Base):
+    """
+    What one unit of `currency` was worth in the base currency (UZS) on `day`,
+    loaded from rate files by `python -m app.commands.exchange_rates load`.
+    A rate holds from its day until the next one for that currency.
+    """
+    __tablename__ = "exchange_rates"
+
+    # The primary key doubles as the (currency, day) lookup index
+    currency = Column(String(3), primary_key=True)
+    day = Column(Date, primary_key=True)
+    # Decimal text, so rates stay exact on every backend
+    rate = Column(String, nullable=False)
+    loaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
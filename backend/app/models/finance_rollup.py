@@ -0,0 +1,30 @@
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey
+from app.db.database import Base
+
+class UserFinanceRollup(Base):
+    """
+    Running income/expense totals per (user, currency) in minor units,
+    maintained on every transaction write. A user whose rollups were built
+    has at least a row for the default currency.
+    """
+    __tablename__ = "user_currency_rollups"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    total_income = Column(BigInteger, nullable=False, default=0)
+    total_expense = Column(BigInteger, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+class UserCategoryRollup(Base):
+    """
+    Running totals per (user, category, month, currency). `month` is "YYYY-MM".
+    """
+    __tablename__ = "user_category_currency_rollups"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    category = Column(String, primary_key=True)
+    month = Column(String(7), primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    total_income = Column(BigInteger, nullable=False, default=0)
+    total_expense = Column(BigInteger, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued") # queued, running, succeeded, failed
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True) # None: system-wide job
+    # Identifies duplicate requests, e.g. "decompose_task:42"; a queued or running
+    # job with the same key is returned instead of enqueuing another
+    dedupe_key = Column(String, nullable=True, index=True)
+    payload = Column(String, nullable=True) # JSON
+    result = Column(String, nullable=True) # JSON
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    # Batch jobs checkpoint the last processed id, so a retry resumes where it stopped
+    cursor = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime(timezone=True), nullable=False)
+    # A running job whose lease has expired (its worker died) can be claimed again
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Workers claim the oldest due job
+        Index("ix_jobs_status_run_after_id", "status", "run_after", "id"),
+    )
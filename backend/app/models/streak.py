@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Date, Integer, ForeignKey
+from app.db.database import Base
+
+class DailyActivity(Base):
+    """
+    Tasks completed per user and UTC day, maintained when tasks are completed
+    or reopened. Days that went back to zero are kept with completed = 0.
+    """
+    __tablename__ = "daily_activity"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    completed = Column(Integer, nullable=False, default=0)
+
+class UserStreak(Base):
+    """
+    The user's run of consecutive active days ending at `last_day`, and the
+    longest run so far. The run only counts as current while `last_day` is
+    today or yesterday (see app/utils/streaks.py).
+    """
+    __tablename__ = "user_streaks"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    current = Column(Integer, nullable=False, default=0)
+    longest = Column(Integer, nullable=False, default=0)
+    last_day = Column(Date, nullable=True)
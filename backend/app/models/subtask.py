@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class Subtask(Base):
+    __tablename__ = "subtasks"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    # Sparse ordering key (steps are spaced POSITION_GAP apart), so inserting or
+    # moving one step only rewrites that step's row
+    position = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    is_done = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # A task's steps, in order, are one range scan
+        Index("ix_subtasks_task_position", "task_id", "position"),
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.db.database import Base
+
+class CollectionVersion(Base):
+    """
+    Per-user version of a collection ("tasks", "transactions"), bumped by every
+    committed write to it. Serves as the lists' ETag and the sync cursor.
+    """
+    __tablename__ = "collection_versions"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    collection = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class Tombstone(Base):
+    """
+    A deleted row, so incremental sync can tell clients to drop it.
+    """
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    collection = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_tombstones_owner_collection_version", "owner_id", "collection", "version"),
+    )
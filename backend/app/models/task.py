@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -6,16 +6,36 @@ from app.db.database import Base
 class Task(Base):
     __tablename__ = "tasks"
 
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    title = Column(String, nullable=False)
     description = Column(String, nullable=True)
     is_completed = Column(Boolean, default=False)
     priority = Column(String, default="Medium")
-    subtasks = Column(String, nullable=True) # JSON string of steps
+    # Pre-normalization JSON list of steps; emptied by `python -m app.commands.subtasks migrate`
+    legacy_subtasks = Column("subtasks", String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # When is_completed last became true; NULL for open tasks and ones completed before it was tracked
+    completed_at = Column(DateTime(timezone=True), nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # The owner's "tasks" collection version when this row last changed (see app/utils/sync.py);
+    # NULL for rows that predate versioning
+    row_version = Column(Integer, nullable=True)
 
     owner = relationship("User", back_populates="tasks")
 
+    # Read-only views filled in from the subtasks table by attach_subtasks()
+    subtasks = None
+    subtasks_done = 0
+    subtasks_total = 0
+
+    __table_args__ = (
+        # Keyset pagination: every page is one range scan per owner
+        Index("ix_tasks_owner_created_id", "owner_id", "created_at", "id"),
+        # Incremental sync: rows changed since a version
+        Index("ix_tasks_owner_row_version_id", "owner_id", "row_version", "id"),
+        # The is_completed filter, pages included
+        Index("ix_tasks_owner_completed_created_id", "owner_id", "is_completed", "created_at", "id"),
+    )
+
 # Also need to update User model to have a relationship back to tasks
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import BigInteger, Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -6,12 +6,28 @@ from app.db.database import Base
 class Transaction(Base):
     __tablename__ = "transactions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
+    # The amount as a float, for display and for readers that predate amount_minor
     amount = Column(Float, nullable=False)
+    # The exact amount in the currency's minor units (tiyin, cents); every sum uses this.
+    # NULL in rows written by a release that predates it (see amount_minor_sql())
+    amount_minor = Column(BigInteger, nullable=True)
+    currency = Column(String(3), nullable=False, default="UZS", server_default="UZS")
     type = Column(String, nullable=False) # "income" or "expense"
     description = Column(String, nullable=False)
     category = Column(String, default="General") # AI inferred
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # The owner's "transactions" collection version when this row last changed; NULL before versioning
+    row_version = Column(Integer, nullable=True)
 
     owner = relationship("User", back_populates="transactions")
+
+    __table_args__ = (
+        # Keyset pagination: every page is one range scan per owner
+        Index("ix_transactions_owner_created_id", "owner_id", "created_at", "id"),
+        # Incremental sync: rows changed since a version
+        Index("ix_transactions_owner_row_version_id", "owner_id", "row_version", "id"),
+        # The type and category filters
+        Index("ix_transactions_owner_type_category", "owner_id", "type", "category"),
+    )
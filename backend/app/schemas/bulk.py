@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import List
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import List
+from app.schemas.task import TaskResponse
+from app.schemas.transaction import TransactionResponse
+
+class SearchResults(BaseModel):
+    tasks: List[TaskResponse]
+    transactions: List[TransactionResponse]
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class SubtaskCreate(BaseModel):
+    title: str = Field(..., min_length=1)
+    # 0-based place among the task's steps; appended when omitted
+    index: Optional[int] = Field(None, ge=0)
+
+class SubtaskUpdate(BaseModel):
+    title: Optional[str] = Field(None, min_length=1)
+    is_done: Optional[bool] = None
+
+class SubtaskMove(BaseModel):
+    index: int = Field(..., ge=0)
+
+class SubtaskResponse(BaseModel):
+    id: int
+    task_id: int
+    position: int
+    title: str
+    is_done: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,14 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Literal, Optional
+from app.utils.subtasks import parse_steps
+
+def _check_steps(value: Optional[str]) -> Optional[str]:
+    if value is not None:
+        try:
+            parse_steps(value)
+        except ValueError:
+            raise ValueError("subtasks must be a JSON list of strings")
+    return value
 
 class TaskBase(BaseModel):
     title: str
@@ -9,7 +18,7 @@ class TaskBase(BaseModel):
     subtasks: Optional[str] = None
 
 class TaskCreate(TaskBase):
-    pass
+    _steps = field_validator("subtasks")(_check_steps)
 
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
@@ -17,15 +26,73 @@ class TaskUpdate(BaseModel):
     is_completed: Optional[bool] = None
     subtasks: Optional[str] = None
 
-from datetime import datetime
+    _steps = field_validator("subtasks")(_check_steps)
+
+from datetime import date, datetime
 
 class TaskResponse(TaskBase):
     id: int
     owner_id: int
     priority: str
     subtasks: Optional[str] = None
+    subtasks_done: int = 0
+    subtasks_total: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+class TaskChanges(BaseModel):
+    version: int
+    changed: List[TaskResponse]
+    deleted: List[int]
+
+# Ids accepted by one batch call; filters have no limit
+MAX_BATCH_IDS = 10000
+
+class TaskFilter(BaseModel):
+    """
+    The same predicates as GET /tasks/; an empty filter matches every task.
+    """
+    is_completed: Optional[bool] = None
+    priority: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class TaskBatchSelection(BaseModel):
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=MAX_BATCH_IDS)
+    filter: Optional[TaskFilter] = None
+
+    @model_validator(mode="after")
+    def _one_selector(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("give either ids or filter")
+        return self
+
+class TaskBatchChanges(BaseModel):
+    is_completed: Optional[bool] = None
+    priority: Optional[Literal["High", "Medium", "Low"]] = None
+
+    @model_validator(mode="after")
+    def _not_empty(self):
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("nothing to set")
+        return self
+
+class TaskBatchUpdate(TaskBatchSelection):
+    set: TaskBatchChanges
+
+class TaskBatchResult(BaseModel):
+    affected: List[int]
+    # The tasks collection version after the change (see GET /tasks/changes)
+    version: int
+
+class ActivityDay(BaseModel):
+    day: date
+    completed: int
+
+class TaskActivity(BaseModel):
+    current_streak: int
+    longest_streak: int
+    days: List[ActivityDay]
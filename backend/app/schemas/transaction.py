@@ -1,14 +1,38 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Optional
 from datetime import datetime
+from decimal import Decimal
+from app.utils.currency import CURRENCY_PATTERN, DEFAULT_CURRENCY, to_minor
 
 class TransactionBase(BaseModel):
     amount: float
     type: str
     description: str
+    currency: str = DEFAULT_CURRENCY
 
 class TransactionCreate(TransactionBase):
-    pass
+    # Parsed exactly and stored in minor units, so sums don't drift
+    amount: Decimal
+    currency: str = Field(DEFAULT_CURRENCY, pattern=CURRENCY_PATTERN)
+
+    @field_validator("currency", mode="before")
+    @classmethod
+    def _upper(cls, value):
+        return value.upper() if isinstance(value, str) else value
+
+    @model_validator(mode="after")
+    def _fits_currency(self):
+        to_minor(self.amount, self.currency)
+        return self
+
+    def column_values(self) -> dict:
+        """
+        The Transaction columns this request sets.
+        """
+        return {
+            "amount": float(self.amount), "amount_minor": to_minor(self.amount, self.currency),
+            "currency": self.currency, "type": self.type, "description": self.description,
+        }
 
 class TransactionResponse(TransactionBase):
     id: int
@@ -18,3 +42,35 @@ class TransactionResponse(TransactionBase):
 
     class Config:
         from_attributes = True
+
+class TransactionChanges(BaseModel):
+    version: int
+    changed: List[TransactionResponse]
+    deleted: List[int]
+
+class CategoryTotal(BaseModel):
+    category: str
+    total_income: float
+    total_expense: float
+    count: int
+
+class PeriodTotal(BaseModel):
+    period_start: str
+    total_income: float
+    total_expense: float
+    count: int
+
+class CurrencyTotal(BaseModel):
+    currency: str
+    total_income: float
+    total_expense: float
+    count: int
+
+class FinanceAnalytics(BaseModel):
+    period: str
+    currency: str
+    # False if some currencies had no exchange rate; their totals are in `unconverted`
+    converted: bool
+    unconverted: List[CurrencyTotal]
+    by_category: List[CategoryTotal]
+    by_period: List[PeriodTotal]
@@ -24,7 +24,9 @@ class UserCreate(UserBase):
 
 class UserResponse(UserBase):
     id: int
+    # Consecutive UTC days with a completed task, up to today or yesterday
     streak: int
+    longest_streak: int = 0
 
     class Config:
         from_attributes = True
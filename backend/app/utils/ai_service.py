@@ -1,96 +1,498 @@
+import asyncio
+import hashlib
+import importlib
 import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional, Tuple
 
-def analyze_task_priority(title: str, description: str = "") -> str:
-    text = (title + " " + (description or "")).lower()
-    
-    # Kengaytirilgan yuqori ustuvorlik kalit so'zlari
-    high_keywords = [
-        # English
-        "urgent", "asap", "deadline", "important", "fix", "critical", "today", "boss", "must", "emergency",
-        "immediate", "priority", "alert", "required", "mandatory", "essential", "vital", "crucial", "pressing",
-        # O'zbekcha
-        "shoshilinch", "muhim", "bugun", "shart", "tezda", "darhol", "muammo", "zudlik", "darrov", "asosiy",
-        "zarur", "majburiy", "kechiktirib", "dolzarb", "jiddiy", "tezkor"
-    ]
-    
-    # Kengaytirilgan past ustuvorlik kalit so'zlari
-    low_keywords = [
-        # English
-        "later", "maybe", "someday", "wishlist", "ignore", "low", "eventually", "optional", "whenever",
-        "backlog", "future", "minor", "trivial", "sometime",
-        # O'zbekcha
-        "keyinroq", "balki", "qachondir", "ixtiyoriy", "past", "vaqti kelganda", "xohishga ko'ra", "imkon bo'lganda",
-        "ahamiyatsiz", "ikkinchi darajali", "bo'sh vaqtda", "zararsiz"
-    ]
+from app.utils.cache import CacheBackend, TTLCache
+
+# Keyword tables live in a data file so they can grow without touching code
+KEYWORDS_PATH = os.getenv("AI_KEYWORDS_PATH", os.path.join(os.path.dirname(__file__), "ai_keywords.json"))
+
+# Endings accepted after a whole-word keyword: "fix" also matches "fixes"/"fixed"/"fixing"
+_INFLECTIONS = ("s", "es", "ed", "d", "ing", "ly")
+# Words, including inner apostrophes as in "ko'ra"
+_TOKEN = re.compile(r"\w+(?:'\w+)*")
+
+class KeywordMatcher:
+    """
+    Matches every keyword of a {label: [keywords]} table in one pass over the text.
+
+    The table is compiled once into hash lookups (every keyword plus its inflected
+    forms, and stems bucketed by prefix), and the text is tokenized once, so a call
+    costs O(len(text)) however many keywords there are. Matching is word-boundary
+    aware: "get" does not match "budget". A single-word keyword ending in "*" is a
+    stem and matches any word that starts with it.
+    """
+
+    def __init__(self, table: Dict[str, List[str]]):
+        self.labels = list(table)
+        self._labels_by_keyword: Dict[str, List[str]] = {}
+        words, stems = [], []
+        for label, keywords in table.items():
+            for keyword in keywords:
+                keyword = keyword.lower().strip()
+                is_stem = keyword.endswith("*")
+                keyword = " ".join(_TOKEN.findall(keyword))
+                (stems if is_stem else words).append(keyword)
+                self._labels_by_keyword.setdefault(keyword, []).append(label)
+
+        # form -> keyword; exact keywords win over another keyword's inflected form
+        self._forms: Dict[str, str] = {k: k for k in words}
+        for keyword in words:
+            for suffix in _INFLECTIONS:
+                self._forms.setdefault(keyword + suffix, keyword)
+        phrases = [k for k in words if " " in k]
+        self._phrase_heads = {k.split(" ", 1)[0] for k in phrases}
+        self._max_phrase = max((k.count(" ") + 1 for k in phrases), default=1)
+
+        self._stem_key = min((len(k) for k in stems), default=0)
+        self._stem_buckets: Dict[str, List[str]] = {}
+        for stem in sorted(stems, key=len, reverse=True):
+            self._stem_buckets.setdefault(stem[:self._stem_key], []).append(stem)
+
+    def _match_at(self, tokens: List[str], i: int) -> Tuple[Optional[str], int]:
+        word = tokens[i]
+        if word in self._phrase_heads:
+            # Longest phrase first, like a leftmost-longest regex match
+            for n in range(min(self._max_phrase, len(tokens) - i), 1, -1):
+                keyword = self._forms.get(" ".join(tokens[i:i + n]))
+                if keyword is not None:
+                    return keyword, n
+        keyword = self._forms.get(word)
+        if keyword is not None:
+            return keyword, 1
+        if self._stem_buckets:
+            for stem in self._stem_buckets.get(word[:self._stem_key], ()):
+                if word.startswith(stem):
+                    return stem, 1
+        return None, 1
+
+    def find_all(self, text: str) -> List[Tuple[str, str]]:
+        """
+        (label, keyword) for every keyword occurrence in `text`, in text order.
+        """
+        tokens = _TOKEN.findall(text.lower())
+        hits = []
+        i = 0
+        while i < len(tokens):
+            keyword, consumed = self._match_at(tokens, i)
+            if keyword is not None:
+                hits.extend((label, keyword) for label in self._labels_by_keyword[keyword])
+            i += consumed
+        return hits
+
+    def matched_labels(self, text: str) -> set:
+        return {label for label, _ in self.find_all(text)}
+
+    def first_label(self, text: str) -> Optional[str]:
+        """
+        The earliest label in table order that has at least one keyword in `text`.
+        """
+        found = self.matched_labels(text)
+        return next((label for label in self.labels if label in found), None)
+
+def load_keyword_tables(path: str = KEYWORDS_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+_tables = load_keyword_tables()
+_priority_matcher = KeywordMatcher(_tables["priority"])
+_strategy_matcher = KeywordMatcher({name: s["keywords"] for name, s in _tables["strategies"].items()})
+_strategy_steps = {name: s["steps"] for name, s in _tables["strategies"].items()}
+_category_matcher = KeywordMatcher(_tables["categories"])
+
+def _heuristic_priority(title: str, description: Optional[str] = "") -> str:
+    text = title + " " + (description or "")
+    found = _priority_matcher.matched_labels(text)
     
-    if any(word in text for word in high_keywords):
+    # Yuqori ustuvorlik past ustuvorlikdan ustun turadi
+    if "High" in found:
         return "High"
-    elif any(word in text for word in low_keywords):
+    elif "Low" in found:
         return "Low"
     else:
         return "Medium"
 
-def decompose_task(title: str) -> str:
+def _heuristic_steps(title: str) -> List[str]:
     """
     Super-charged AI Logic with deep context-awareness for Unicorn Task Manager.
+    Strategies are tried in data-file order; the first one whose keywords appear wins.
     """
-    title_low = title.lower()
-    
-    # Detailed strategy database
-    strategies = {
-        "eat": ["Choose a healthy meal option", "Step away from screens", "Eat mindfully and enjoy", "Hydrate with a glass of water"],
-        "food": ["Check the fridge", "Buy ingredients if needed", "Cook or order", "Enjoy your meal"],
-        "wake up": ["Set an alarm for early morning", "Place phone in another room", "Drink water immediately", "Do a quick stretch"],
-        "exercise": ["Get into workout gear", "Follow a 20-minute guide", "Keep track of heart rate", "Drink protein or water"],
-        "meeting": ["Prepare talking points", "Check internet/camera", "Send invite link", "Take follow-up notes"],
-        "study": ["Clear your desk", "Focus for 45 minutes", "Solve practice tasks", "Summarize core concepts"],
-        "website": ["Sitemap & User Flow", "UI Design in Figma", "Frontend Component coding", "API Integration"],
-        "read": ["Choose an interesting book", "Set a 15-page goal", "Note down new words", "Self-reflect on the plot"],
-        "email": ["Draft the subject line", "Keep text concise", "Proofread for errors", "Send and archive"],
-        "shopping": ["Create a grocery list", "Check budget limits", "Go to the store", "Organize items at home"],
-        "gym": ["Pack your gym bag", "Drive/Walk to the gym", "Complete your split", "Stretch & Shower"],
-        "rest": ["Turn off notifications", "Find a comfortable spot", "Close your eyes for 20m", "Wake up refreshed"],
-        "cleaning": ["Tidy up the room", "Wipe all surfaces", "Vacuum the floor", "Organize your desk"],
-        "code": ["Break logic into functions", "Write unit tests", "Implement the core feature", "Run lint and refactor"],
-    }
-    
-    # Keyword search for specific strategy
-    for key, steps in strategies.items():
-        if key in title_low:
-            return json.dumps(steps)
-            
-    # Contextual keywords for dynamic generation
-    if "buy" in title_low or "get" in title_low:
-        return json.dumps(["Research options", "Compare prices", "Go to the store/online", "Finalize purchase"])
-    if "learn" in title_low or "course" in title_low:
-        return json.dumps(["Watch video lessons", "Practice concepts", "Take a quiz", "Build a small project"])
+    strategy = _strategy_matcher.first_label(title)
+    if strategy is not None:
+        return _strategy_steps[strategy]
     
     # Smart default strategy
-    return json.dumps([
+    return [
         f"Define the immediate first step for '{title}'",
         "Eliminate distractions for 25 minutes",
         "Document progress made",
         "Verify results and plan next step"
-    ])
+    ]
 
-def categorize_transaction(description: str) -> str:
+def _heuristic_category(description: str) -> str:
     """
     Simulates AI categorization for financial transactions.
     """
-    desc = description.lower()
-    
-    mapping = {
-        "food": ["lunch", "dinner", "breakfast", "cafe", "restaurant", "burger", "coffee", "grocery", "market", "food"],
-        "transport": ["uber", "taxi", "bus", "train", "flight", "gas", "fuel", "parking"],
-        "salary": ["salary", "wage", "paycheck", "freelance", "upwork", "project"],
-        "shopping": ["clothes", "shoes", "amazon", "electronics", "gift", "buy"],
-        "utilities": ["rent", "bill", "electricity", "water", "internet", "phone"],
-        "entertainment": ["movie", "cinema", "game", "netflix", "spotify", "subscription"],
-        "health": ["doctor", "pharmacy", "medicine", "gym", "sport"],
-    }
-    
-    for category, keywords in mapping.items():
-        if any(keyword in desc for keyword in keywords):
-            return category.capitalize()
-            
-    return "General"
+    return _category_matcher.first_label(description) or "General"
+
+
+# --- Pluggable inference ------------------------------------------------------------
+# The functions the routers call go through a provider (the heuristics above by
+# default). A non-heuristic provider runs on a small worker pool behind a
+# content-hash LRU+TTL cache; concurrent identical inputs share one inference, and
+# a caller that waits longer than AI_TIMEOUT_SECONDS gets the heuristic answer
+# while the inference finishes in the background and fills the cache. Background
+# jobs, which nobody waits on, pass the longer AI_JOB_TIMEOUT_SECONDS instead.
+
+AI_PROVIDER = os.getenv("AI_PROVIDER", "heuristic")
+AI_PROVIDER_URL = os.getenv("AI_PROVIDER_URL", "http://127.0.0.1:8080/predict")
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", 2.0))
+AI_JOB_TIMEOUT_SECONDS = float(os.getenv("AI_JOB_TIMEOUT_SECONDS", 30.0))
+# A provider's own limit on one call (the HTTP provider's socket timeout). As long as
+# the longest wait by default: a caller that can't wait that long gives up on its own
+AI_PROVIDER_TIMEOUT_SECONDS = float(
+    os.getenv("AI_PROVIDER_TIMEOUT_SECONDS", max(AI_TIMEOUT_SECONDS, AI_JOB_TIMEOUT_SECONDS))
+)
+AI_PROVIDER_WORKERS = int(os.getenv("AI_PROVIDER_WORKERS", 4))
+# Distinct inferences queued or running at once; past this, callers get the heuristics
+AI_MAX_PENDING = int(os.getenv("AI_MAX_PENDING", 256))
+AI_CACHE_TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", 3600))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", 10000))
+
+PRIORITIES = ("High", "Medium", "Low")
+# The functions a provider implements; each gets its own metrics
+KINDS = ("priority", "decompose", "category")
+
+class AIProvider:
+    """
+    An inference backend. Subclasses override any of the three methods; the rest
+    keep the keyword heuristics. Methods run on worker threads and may block.
+    `name` labels the provider's metrics and cache entries.
+    """
+    name = "heuristic"
+
+    def priority(self, title: str, description: Optional[str]) -> str:
+        return _heuristic_priority(title, description)
+
+    def decompose(self, title: str) -> List[str]:
+        return _heuristic_steps(title)
+
+    def category(self, description: str) -> str:
+        return _heuristic_category(description)
+
+class HTTPProvider(AIProvider):
+    """
+    A local model server, e.g. an LLM behind a small shim. POSTs
+    {"task": "priority" | "decompose" | "category", "input": {...}} as JSON
+    and expects {"result": ...} back.
+    """
+    name = "http"
+
+    def __init__(self, url: str = AI_PROVIDER_URL, timeout: float = AI_PROVIDER_TIMEOUT_SECONDS):
+        self.url = url
+        self.timeout = timeout
+
+    def _predict(self, task: str, **inputs) -> Any:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"task": task, "input": inputs}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)["result"]
+
+    def priority(self, title: str, description: Optional[str]) -> str:
+        return self._predict("priority", title=title, description=description)
+
+    def decompose(self, title: str) -> List[str]:
+        return self._predict("decompose", title=title)
+
+    def category(self, description: str) -> str:
+        return self._predict("category", description=description)
+
+def load_provider(spec: str) -> AIProvider:
+    """
+    "heuristic", "http", or "package.module:attr" where attr is an AIProvider
+    subclass or factory, e.g. one wrapping an ONNX or scikit-learn text classifier.
+    """
+    if spec == "heuristic":
+        return AIProvider()
+    if spec == "http":
+        return HTTPProvider()
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"AI_PROVIDER must be heuristic, http or module:attr, got {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)()
+
+class ProviderStats:
+    """
+    Counters and a latency histogram for one (provider, function) pair.
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    EVENTS = ("hits", "misses", "coalesced", "timeouts", "errors", "shed")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = dict.fromkeys(self.EVENTS, 0)
+        self.buckets = [0] * len(self.BUCKETS)
+        self.latency_count = 0
+        self.latency_sum = 0.0
+
+    def count(self, event: str):
+        with self._lock:
+            self.counts[event] += 1
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.latency_count += 1
+            self.latency_sum += seconds
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    self.buckets[i] += 1
+                    break
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.counts["hits"] + self.counts["misses"] + self.counts["coalesced"]
+            return {
+                **self.counts,
+                "hit_rate": round(self.counts["hits"] / lookups, 4) if lookups else None,
+                "latency_count": self.latency_count,
+                "latency_sum": self.latency_sum,
+                # Non-cumulative counts per upper bound; slower calls are only in latency_count
+                "latency_buckets": dict(zip(self.BUCKETS, self.buckets)),
+            }
+
+_HEURISTICS = AIProvider()
+_provider: AIProvider = load_provider(AI_PROVIDER)
+_result_cache: CacheBackend = TTLCache(max_entries=AI_CACHE_MAX_ENTRIES, ttl=AI_CACHE_TTL_SECONDS)
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_stats: Dict[Tuple[str, str], ProviderStats] = {}
+
+def set_provider(provider: AIProvider, cache: Optional[CacheBackend] = None):
+    """
+    Switch the inference backend, and optionally the result cache (e.g. a shared
+    one so workers reuse each other's results). Cache keys include the provider
+    name, so results of the previous provider are never served.
+    """
+    global _provider, _result_cache
+    _provider = provider
+    if cache is not None:
+        _result_cache = cache
+    _register_stats(provider)
+
+def get_provider() -> AIProvider:
+    return _provider
+
+def ai_metrics() -> Dict[str, Dict[str, dict]]:
+    """
+    {provider name: {function: stats snapshot}} for every provider used so far.
+    """
+    metrics: Dict[str, Dict[str, dict]] = {}
+    for (name, kind), stats in list(_stats.items()):
+        metrics.setdefault(name, {})[kind] = stats.snapshot()
+    return metrics
+
+def _stats_for(name: str, kind: str) -> ProviderStats:
+    stats = _stats.get((name, kind))
+    if stats is None:
+        stats = _stats.setdefault((name, kind), ProviderStats())
+    return stats
+
+def _register_stats(provider: AIProvider):
+    # Zero-valued series from the start, so dashboards see the provider before its first call
+    for kind in KINDS:
+        _stats_for(provider.name, kind)
+
+_register_stats(_provider)
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=AI_PROVIDER_WORKERS, thread_name_prefix="ai-provider")
+    return _executor
+
+def shutdown_ai_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def _cache_key(name: str, kind: str, args: tuple) -> str:
+    payload = json.dumps([name, kind, args], ensure_ascii=False, separators=(",", ":"))
+    return "ai:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _validate(kind: str, result: Any) -> Any:
+    if kind == "priority" and result in PRIORITIES:
+        return result
+    if kind == "category" and isinstance(result, str) and result:
+        return result
+    if kind == "decompose" and isinstance(result, list) and result and all(isinstance(s, str) for s in result):
+        return result
+    raise ValueError(f"Provider returned an invalid {kind} result: {result!r}")
+
+def _infer(provider: AIProvider, kind: str, args: tuple, key: str, future: Future):
+    stats = _stats_for(provider.name, kind)
+    started = time.perf_counter()
+    try:
+        result = _validate(kind, getattr(provider, kind)(*args))
+    except Exception as e:
+        stats.count("errors")
+        future.set_exception(e)
+    else:
+        stats.observe(time.perf_counter() - started)
+        # Cache before leaving _inflight, so no caller can miss both
+        _result_cache.set(key, result)
+        future.set_result(result)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def _lookup(kind: str, args: tuple) -> Tuple[Any, Optional[Future], ProviderStats]:
+    """
+    (cached result, None) on a hit; otherwise (None, future) for the inference,
+    joining one already in flight for the same input. (None, None) when too many
+    inferences are pending.
+    """
+    provider = _provider
+    stats = _stats_for(provider.name, kind)
+    key = _cache_key(provider.name, kind, args)
+    cached = _result_cache.get(key)
+    if cached is not None:
+        stats.count("hits")
+        return cached, None, stats
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            stats.count("coalesced")
+            return None, future, stats
+        if len(_inflight) >= AI_MAX_PENDING:
+            stats.count("shed")
+            return None, None, stats
+        future = _inflight[key] = Future()
+    stats.count("misses")
+    _get_executor().submit(_infer, provider, kind, args, key, future)
+    return None, future, stats
+
+def _fallback(kind: str, args: tuple) -> Any:
+    return getattr(_HEURISTICS, kind)(*args)
+
+def _heuristic(kind: str, args: tuple) -> Any:
+    """
+    The heuristics as the configured provider: called inline (they are too
+    cheap for the cache and worker threads), but counted and timed like any
+    provider's inferences.
+    """
+    stats = _stats_for(_provider.name, kind)
+    started = time.perf_counter()
+    result = _fallback(kind, args)
+    stats.count("misses")
+    stats.observe(time.perf_counter() - started)
+    return result
+
+def _predict(kind: str, *args, timeout: Optional[float] = None) -> Any:
+    if type(_provider) is AIProvider:
+        return _heuristic(kind, args)
+    cached, future, stats = _lookup(kind, args)
+    if future is None:
+        return cached if cached is not None else _fallback(kind, args)
+    try:
+        return future.result(timeout=AI_TIMEOUT_SECONDS if timeout is None else timeout)
+    except FutureTimeout:
+        stats.count("timeouts")
+    except Exception:
+        pass
+    return _fallback(kind, args)
+
+async def _predict_async(kind: str, *args) -> Any:
+    if type(_provider) is AIProvider:
+        return _heuristic(kind, args)
+    cached, future, stats = _lookup(kind, args)
+    if future is None:
+        return cached if cached is not None else _fallback(kind, args)
+    waiter = asyncio.wrap_future(future)
+    try:
+        # shield: a timed-out caller must not cancel an inference others share
+        return await asyncio.wait_for(asyncio.shield(waiter), AI_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        stats.count("timeouts")
+        # Nobody awaits it any more; keep a late failure out of the asyncio error log
+        waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+    except Exception:
+        pass
+    return _fallback(kind, args)
+
+def analyze_task_priority(title: str, description: Optional[str] = "") -> str:
+    return _predict("priority", title, description or "")
+
+def decompose_task(title: str, timeout: Optional[float] = None) -> str:
+    """
+    The steps for a task, as a JSON list of strings. Falls back to the
+    heuristics after `timeout` seconds (default AI_TIMEOUT_SECONDS).
+    """
+    return json.dumps(_predict("decompose", title, timeout=timeout))
+
+def categorize_transaction(description: str) -> str:
+    return _predict("category", description)
+
+# Async variants for request handlers: they wait without blocking the event loop.
+# The sync ones are for threadpool code (bulk helpers, jobs, commands).
+
+async def analyze_task_priority_async(title: str, description: Optional[str] = "") -> str:
+    return await _predict_async("priority", title, description or "")
+
+async def decompose_task_async(title: str) -> str:
+    return json.dumps(await _predict_async("decompose", title))
+
+async def categorize_transaction_async(description: str) -> str:
+    return await _predict_async("category", description)
+
+# Batch entry points used by bulk imports and background jobs. Each item is looked
+# up and coalesced on its own; all of a batch's misses are inferred concurrently.
+
+def analyze_task_priorities(items: List[Tuple[str, Optional[str]]], timeout: Optional[float] = None) -> List[str]:
+    return _predict_many("priority", [(title, description or "") for title, description in items], timeout)
+
+def categorize_transactions(descriptions: List[str], timeout: Optional[float] = None) -> List[str]:
+    return _predict_many("category", [(description,) for description in descriptions], timeout)
+
+async def analyze_task_priorities_async(items: List[Tuple[str, Optional[str]]]) -> List[str]:
+    if type(_provider) is AIProvider:
+        return analyze_task_priorities(items)
+    return list(await asyncio.gather(*(_predict_async("priority", t, d or "") for t, d in items)))
+
+async def categorize_transactions_async(descriptions: List[str]) -> List[str]:
+    if type(_provider) is AIProvider:
+        return categorize_transactions(descriptions)
+    return list(await asyncio.gather(*(_predict_async("category", d) for d in descriptions)))
+
+def _predict_many(kind: str, args_list: List[tuple], timeout: Optional[float] = None) -> List[Any]:
+    if type(_provider) is AIProvider:
+        return [_heuristic(kind, args) for args in args_list]
+    lookups = [_lookup(kind, args) for args in args_list]
+    # One deadline for the whole batch, not one timeout per item
+    deadline = time.monotonic() + (AI_TIMEOUT_SECONDS if timeout is None else timeout)
+    results = []
+    for args, (cached, future, stats) in zip(args_list, lookups):
+        if future is None:
+            results.append(cached if cached is not None else _fallback(kind, args))
+            continue
+        try:
+            results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+        except FutureTimeout:
+            stats.count("timeouts")
+            results.append(_fallback(kind, args))
+        except Exception:
+            results.append(_fallback(kind, args))
+    return results
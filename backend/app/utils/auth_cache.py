@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+import os
+from typing import Optional
+from sqlalchemy import event, inspect
+from app.models.user import User
+from app.utils.cache import CacheBackend, TTLCache
+
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    The identity get_current_user hands to endpoints. A plain value object, so it
+    can be cached across requests without holding on to a DB session.
+    """
+    id: int
+    email: str
+    streak: int
+
+_user_cache: CacheBackend = TTLCache(max_entries=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL_SECONDS)
+
+def set_user_cache_backend(backend: CacheBackend):
+    """
+    Swap the in-process cache for a shared one, so invalidations made by one
+    worker are seen by all of them.
+    """
+    global _user_cache
+    _user_cache = backend
+
+def _key(email: str) -> str:
+    return f"auth:user:{email}"
+
+def get_cached_user(email: str) -> Optional[AuthenticatedUser]:
+    data = _user_cache.get(_key(email))
+    if data is None:
+        return None
+    return AuthenticatedUser(**data)
+
+def cache_user(user: User) -> AuthenticatedUser:
+    identity = AuthenticatedUser(id=user.id, email=user.email, streak=user.streak or 0)
+    _user_cache.set(_key(identity.email), {"id": identity.id, "email": identity.email, "streak": identity.streak}, AUTH_CACHE_TTL_SECONDS)
+    return identity
+
+def invalidate_user(email: str):
+    _user_cache.delete(_key(email))
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    # Drop both the current and, if it was just changed, the previous email.
+    # Bulk query.update()/delete() bypass ORM events and must call invalidate_user.
+    invalidate_user(target.email)
+    for old_email in inspect(target).attrs.email.history.deleted:
+        invalidate_user(old_email)
@@ -0,0 +1,231 @@
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple, Type
+
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 10000
+# The response lists at most this many row errors; `failed` always has the full count
+MAX_REPORTED_ERRORS = 1000
+
+JSON_TYPES = {"application/json"}
+NDJSON_TYPES = {"application/x-ndjson", "application/jsonl", "application/x-jsonlines"}
+CSV_TYPES = {"text/csv", "application/csv"}
+
+# Documents the accepted bodies, since bulk endpoints read the raw request stream
+OPENAPI_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+            "application/x-ndjson": {"schema": {"type": "string"}},
+            "text/csv": {"schema": {"type": "string"}},
+        },
+    }
+}
+
+
+class UnsupportedContentType(ValueError):
+    pass
+
+
+# (row number, parsed record or None, parse error or None)
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+class _LineFeed:
+    """
+    The line source of a csv.reader fed while the body streams in: holds the
+    lines of complete records until the reader takes them.
+    """
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+def _ends_in_quotes(line: str, in_quotes: bool) -> bool:
+    """
+    Whether a quoted field is still open at the end of `line`, given whether
+    one was open at its start. Follows csv.reader's rules: a quote opens a
+    quoted field only as the field's first character (elsewhere it is plain
+    text), and "" inside one is an escaped quote.
+    """
+    if not in_quotes and '"' not in line:
+        return False
+    field_start = not in_quotes
+    i, end = 0, len(line)
+    while i < end:
+        char = line[i]
+        if in_quotes:
+            if char == '"':
+                if line.startswith('"', i + 1):
+                    i += 2
+                    continue
+                in_quotes = False
+        elif char == '"' and field_start:
+            in_quotes = True
+        field_start = char == "," and not in_quotes
+        i += 1
+    return in_quotes
+
+
+async def _iter_csv(request: Request) -> AsyncIterator[Tuple[Optional[List[str]], Optional[str]]]:
+    """
+    (values, None) per CSV record, or (None, error), through one csv.reader.
+    A quoted field may span lines: lines go to the reader once they complete
+    a record, i.e. once no quoted field is left open.
+    """
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    in_quotes = False
+    async for line in _iter_lines(request):
+        if not feed.lines and not line.strip():
+            continue
+        feed.lines.append(line + "\n")
+        in_quotes = _ends_in_quotes(line, in_quotes)
+        if not in_quotes:
+            yield next(reader), None
+    if feed.lines:
+        feed.lines.clear()
+        yield None, "Unterminated quoted field at the end of the body"
+
+
+async def iter_records(request: Request) -> AsyncIterator[Record]:
+    """
+    Parse the request body as a JSON array, NDJSON or CSV (header row required),
+    depending on Content-Type. NDJSON and CSV are parsed as the body streams in:
+    one record per line, except that quoted CSV fields may contain line breaks.
+    Row numbers are 1-based and exclude the CSV header.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in JSON_TYPES:
+        try:
+            items = json.loads(await request.body())
+        except ValueError as e:
+            raise UnsupportedContentType(f"Body is not valid JSON: {e}")
+        if not isinstance(items, list):
+            raise UnsupportedContentType("JSON body must be an array of objects")
+        for row, item in enumerate(items, start=1):
+            if isinstance(item, dict):
+                yield row, item, None
+            else:
+                yield row, None, "Expected a JSON object"
+
+    elif content_type in NDJSON_TYPES:
+        row = 0
+        async for line in _iter_lines(request):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield row, None, f"Invalid JSON: {e}"
+                continue
+            if isinstance(item, dict):
+                yield row, item, None
+            else:
+                yield row, None, "Expected a JSON object"
+
+    elif content_type in CSV_TYPES:
+        header = None
+        row = 0
+        async for values, error in _iter_csv(request):
+            if error is not None:
+                if header is None:
+                    raise UnsupportedContentType(f"Invalid CSV header: {error}")
+                yield row + 1, None, error
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row += 1
+            if len(values) != len(header):
+                yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            # Empty cells mean "not given", so optional fields keep their defaults
+            yield row, {name: value for name, value in zip(header, values) if value != ""}, None
+
+    else:
+        raise UnsupportedContentType(
+            "Content-Type must be application/json, application/x-ndjson or text/csv"
+        )
+
+
+async def import_records(
+    request: Request,
+    schema: Type[BaseModel],
+    insert_chunk: Callable[[List[BaseModel]], Awaitable[None]],
+    db,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict:
+    """
+    Validate every record against `schema` and hand valid ones to `insert_chunk`
+    `chunk_size` at a time. `insert_chunk` inserts and commits one chunk; if it
+    fails, the chunk is rolled back and its rows are reported as failed.
+    Returns a BulkImportResult-shaped dict.
+    """
+    result = {"inserted": 0, "failed": 0, "errors": []}
+
+    def fail(row: int, error: str):
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+            result["errors"].append({"row": row, "error": error})
+
+    rows: List[int] = []
+    items: List[BaseModel] = []
+
+    async def flush():
+        if not items:
+            return
+        try:
+            await insert_chunk(items)
+            result["inserted"] += len(items)
+        except SQLAlchemyError as e:
+            await db.rollback()
+            for row in rows:
+                fail(row, f"Database error: {e.__class__.__name__}")
+        rows.clear()
+        items.clear()
+
+    async for row, record, error in iter_records(request):
+        if error is not None:
+            fail(row, error)
+            continue
+        try:
+            items.append(schema.model_validate(record))
+            rows.append(row)
+        except ValidationError as e:
+            fail(row, "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" if err["loc"] else err["msg"] for err in e.errors()
+            ))
+            continue
+        if len(items) >= chunk_size:
+            await flush()
+    await flush()
+
+    return result
@@ -0,0 +1,186 @@
+import csv
+import os
+from bisect import bisect_right
+from datetime import date
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.exchange_rate import ExchangeRate
+from app.utils.cache import TTLCache
+
+# Supported currencies and the decimal places of their minor unit (ISO 4217).
+# Amounts are stored as integers in minor units, so sums are exact.
+CURRENCIES = {
+    "UZS": 2, "USD": 2, "EUR": 2, "GBP": 2, "CHF": 2, "RUB": 2, "KZT": 2, "KGS": 2,
+    "TJS": 2, "TRY": 2, "AED": 2, "CNY": 2, "JPY": 0, "KRW": 0,
+}
+CURRENCY_PATTERN = "^(" + "|".join(sorted(CURRENCIES)) + ")$"
+# The currency of every transaction recorded before currencies were
+DEFAULT_CURRENCY = "UZS"
+# Exchange rates are the value of one unit of a currency in this one
+BASE_CURRENCY = "UZS"
+
+# Rates only change when files are loaded; other processes see a load within this many seconds
+EXCHANGE_RATE_CACHE_SECONDS = float(os.getenv("EXCHANGE_RATE_CACHE_SECONDS", 300))
+
+# "rates:<currency>" -> that currency's (days, rates), oldest first; "version" -> rates_version()
+_cache = TTLCache(max_entries=len(CURRENCIES) + 1, ttl=EXCHANGE_RATE_CACHE_SECONDS)
+
+
+class MissingRate(ValueError):
+    pass
+
+
+def to_minor(amount: Decimal, currency: str) -> int:
+    """
+    Exact amount to integer minor units. Raises ValueError if it has more
+    decimal places than the currency.
+    """
+    scaled = Decimal(amount).scaleb(CURRENCIES[currency])
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"{currency} amounts have at most {CURRENCIES[currency]} decimal places")
+    return int(scaled)
+
+
+def from_minor(minor: int, currency: str) -> Decimal:
+    return Decimal(minor).scaleb(-CURRENCIES[currency])
+
+
+def _history(db: Session, currency: str) -> Tuple[List[date], List[Decimal]]:
+    key = f"rates:{currency}"
+    history = _cache.get(key)
+    if history is None:
+        rows = db.execute(
+            select(ExchangeRate.day, ExchangeRate.rate)
+            .where(ExchangeRate.currency == currency)
+            .order_by(ExchangeRate.day)
+        ).all()
+        history = ([day for day, _ in rows], [Decimal(rate) for _, rate in rows])
+        _cache.set(key, history)
+    return history
+
+
+def rate_on(db: Session, currency: str, day: date) -> Decimal:
+    """
+    The value of one unit of `currency` in BASE_CURRENCY on `day`: its latest
+    rate dated `day` or earlier. Raises MissingRate if there is none.
+    """
+    if currency == BASE_CURRENCY:
+        return Decimal(1)
+    days, rates = _history(db, currency)
+    i = bisect_right(days, day)
+    if i == 0:
+        raise MissingRate(f"No {currency} exchange rate on or before {day.isoformat()}")
+    return rates[i - 1]
+
+
+def missing_rates(db: Session, currencies: Iterable[str], target: str, day: date) -> List[str]:
+    """
+    Those of `currencies` that convert() can't convert to `target` on `day`:
+    the ones with no rate yet, or all but `target` when it has none itself.
+    """
+    missing = set()
+    for currency in set(currencies) - {target}:
+        for needed in (currency, target):
+            try:
+                rate_on(db, needed, day)
+            except MissingRate:
+                missing.add(currency)
+    return sorted(missing)
+
+
+def convert(db: Session, totals: Dict[str, Sequence[int]], target: str, day: date) -> List[Decimal]:
+    """
+    Convert per-currency totals in minor units, e.g. {"UZS": (income, expense),
+    "USD": (income, expense)}, to `target` at the rates of `day`. Costs one
+    cached rate lookup per currency however many rows the totals came from;
+    each result is summed exactly and rounded to the target's minor unit once.
+    """
+    width = len(next(iter(totals.values()), ()))
+    converted = [Decimal(0)] * width
+    target_rate = None
+    for currency, values in totals.items():
+        if currency == target:
+            factor = Decimal(1)
+        else:
+            if target_rate is None:
+                target_rate = rate_on(db, target, day)
+            factor = rate_on(db, currency, day) / target_rate
+        for i, minor in enumerate(values):
+            converted[i] += from_minor(minor, currency) * factor
+    quantum = Decimal(1).scaleb(-CURRENCIES[target])
+    return [value.quantize(quantum, rounding=ROUND_HALF_EVEN) for value in converted]
+
+
+def rates_version(db: Session) -> str:
+    """
+    Changes whenever rates are loaded (seen within the cache TTL). Part of the
+    ETag of responses converted between currencies.
+    """
+    version = _cache.get("version")
+    if version is None:
+        loaded_at = db.scalar(select(func.max(ExchangeRate.loaded_at)))
+        version = loaded_at.isoformat() if loaded_at else ""
+        _cache.set("version", version)
+    return version
+
+
+def read_rates_file(path: str) -> List[dict]:
+    """
+    Parse a CSV rates file with the header `date,currency,rate`, one row per
+    currency and day; `rate` is the value of one unit in BASE_CURRENCY. Raises
+    ValueError naming the file and line of the first bad row.
+    """
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = {"date", "currency", "rate"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(sorted(missing))}")
+        for line, record in enumerate(reader, start=2):
+            try:
+                currency = (record["currency"] or "").strip().upper()
+                if currency not in CURRENCIES:
+                    raise ValueError(f"unsupported currency {currency!r}")
+                try:
+                    rate = Decimal((record["rate"] or "").strip())
+                except InvalidOperation:
+                    raise ValueError(f"invalid rate {record['rate']!r}")
+                if not rate.is_finite() or rate <= 0:
+                    raise ValueError("rate must be a positive number")
+                day = date.fromisoformat((record["date"] or "").strip())
+            except ValueError as e:
+                raise ValueError(f"{path}:{line}: {e}")
+            if currency != BASE_CURRENCY:  # always 1
+                rows.append({"currency": currency, "day": day, "rate": str(rate)})
+    return rows
+
+
+def load_rates(db: Session, rows: List[dict]) -> int:
+    """
+    Insert or replace rates (dicts of currency, day and rate). Does not commit.
+    Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(ExchangeRate)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["currency", "day"], set_={"rate": stmt.excluded.rate, "loaded_at": func.now()}
+            ),
+            rows,
+        )
+    else:
+        for row in rows:
+            db.merge(ExchangeRate(**row, loaded_at=func.now()))
+    _cache.clear()
+    return len(rows)
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Protocol, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Undelivered events kept per open stream before it is told to resync
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 256))
+# Idle streams get a heartbeat this often, which also detects dead connections
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+# Events touching more rows than this carry no ids; clients sync through /changes
+EVENTS_MAX_IDS = int(os.getenv("EVENTS_MAX_IDS", 100))
+
+RESYNC = json.dumps({"type": "resync"})
+PING = json.dumps({"type": "ping"})
+
+_PENDING = "pending_events"
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    One open stream's inbox, bound to the event loop that created it.
+
+    Backpressure: a client that stops reading lets at most `max_queued` events
+    pile up. Past that the backlog is replaced by a single resync message,
+    telling the client to catch up through /changes, and further events are
+    dropped until it has read it. A slow client costs bounded memory and never
+    holds up publishers or other subscribers.
+    """
+
+    def __init__(self, owner_id: int, max_queued: int = EVENTS_QUEUE_SIZE):
+        self.owner_id = owner_id
+        self.max_queued = max_queued
+        self.loop = asyncio.get_running_loop()
+        self.dropped = 0
+        self._queue: Deque[str] = deque()
+        self._ready = asyncio.Event()
+        self._resync_pending = False
+
+    def push(self, payload: str):
+        """
+        Queue a payload. Must run on the subscription's loop; see deliver().
+        """
+        if self._resync_pending:
+            self.dropped += 1
+            return
+        if len(self._queue) >= self.max_queued:
+            self.dropped += len(self._queue) + 1
+            self._queue.clear()
+            payload = RESYNC
+        if payload is RESYNC:
+            self._resync_pending = True
+        self._queue.append(payload)
+        self._ready.set()
+
+    def resync(self):
+        self.push(RESYNC)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def deliver(self, payload: str):
+        """
+        push() from any thread.
+        """
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self.push(payload)
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.push, payload)
+        except RuntimeError:
+            pass  # loop closed: the stream is gone
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        The next payload, or None when nothing arrived within `timeout` seconds.
+        """
+        if not self._queue:
+            self._ready.clear()
+            # A timer rather than wait_for(), which on Python < 3.12 can swallow
+            # the cancellation that ends the stream when a disconnect races an event
+            timer = self.loop.call_later(timeout, self._ready.set) if timeout is not None else None
+            try:
+                await self._ready.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+            if not self._queue:
+                return None
+        payload = self._queue.popleft()
+        if payload is RESYNC:
+            self._resync_pending = False
+        return payload
+
+
+class EventBroker(Protocol):
+    """
+    Minimal interface a shared broker (Redis pub/sub, Postgres LISTEN/NOTIFY,
+    ...) must provide to be plugged in place of the InMemoryBroker: publish()
+    from any thread or process, delivery to this process's subscriptions.
+    """
+
+    def publish(self, owner_id: int, payload: str) -> None: ...
+
+    def subscribe(self, subscription: Subscription) -> None: ...
+
+    def unsubscribe(self, subscription: Subscription) -> None: ...
+
+
+class InMemoryBroker:
+    """
+    Thread-safe fan-out within one process. Enough for a single API process;
+    with several workers, or jobs run by `python -m app.commands.jobs work`,
+    plug in a shared broker so every process sees every change.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self._dropped_closed = 0
+
+    def publish(self, owner_id: int, payload: str) -> None:
+        with self._lock:
+            self.published += 1
+            subscriptions = list(self._subscriptions.get(owner_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(payload)
+
+    def subscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.setdefault(subscription.owner_id, set()).add(subscription)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.owner_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.owner_id]
+            self._dropped_closed += subscription.dropped
+
+    def stats(self) -> dict:
+        with self._lock:
+            open_subscriptions = [s for subscriptions in self._subscriptions.values() for s in subscriptions]
+            return {
+                "subscriptions": len(open_subscriptions),
+                "published": self.published,
+                "dropped": self._dropped_closed + sum(s.dropped for s in open_subscriptions),
+            }
+
+
+_broker: EventBroker = InMemoryBroker()
+
+
+def set_event_broker(broker: EventBroker):
+    """
+    Swap the in-process broker for a shared one.
+    """
+    global _broker
+    _broker = broker
+
+
+def get_event_broker() -> EventBroker:
+    return _broker
+
+
+def publish(owner_id: int, event: dict):
+    # Encoded once here, not once per subscriber
+    _broker.publish(owner_id, json.dumps(event, separators=(",", ":")))
+
+
+def queue_event(db, owner_id: int, collection: str, action: str, version: int, row_ids: Optional[Iterable[int]] = None):
+    """
+    Publish a change event for the owner's streams once `db` commits; a
+    rollback discards it. `db` is a Session, AsyncSession or ThreadedSession.
+
+    Events name the collection version and, for up to EVENTS_MAX_IDS rows,
+    the ids; they never carry row data, which clients read back through the
+    list, detail or /changes endpoints with their usual access checks.
+    """
+    row_ids = None if row_ids is None else list(row_ids)
+    if row_ids is not None and len(row_ids) > EVENTS_MAX_IDS:
+        row_ids = None
+    db.info.setdefault(_PENDING, []).append((owner_id, {
+        "type": "change", "collection": collection, "action": action, "version": version, "ids": row_ids,
+    }))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for owner_id, pending in session.info.pop(_PENDING, ()):
+        try:
+            publish(owner_id, pending)
+        except Exception:
+            # The write is committed regardless; clients catch up through /changes
+            logger.exception("Could not publish a change event")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,261 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import BigInteger, case, cast, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.finance_rollup import UserCategoryRollup, UserFinanceRollup
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.utils.currency import DEFAULT_CURRENCY
+
+# (total_income, total_expense, transaction_count), amounts in minor units
+Totals = Tuple[int, int, int]
+
+
+def month_key(created_at: datetime) -> str:
+    return created_at.strftime("%Y-%m")
+
+
+def _month_key_sql(db: Session):
+    if db.bind.dialect.name == "postgresql":
+        return func.to_char(Transaction.created_at, "YYYY-MM")
+    return func.strftime("%Y-%m", Transaction.created_at)
+
+
+def _upsert(db: Session, model, keys: dict, deltas: dict):
+    """
+    Atomically add `deltas` to the row identified by `keys`, creating it if needed.
+    """
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(model).values(**keys, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: getattr(model, name) + stmt.excluded[name] for name in deltas},
+        )
+        db.execute(stmt)
+        return
+
+    row = db.get(model, tuple(keys.values()) if len(keys) > 1 else next(iter(keys.values())))
+    if row is None:
+        db.add(model(**keys, **deltas))
+    else:
+        for name, value in deltas.items():
+            setattr(row, name, getattr(row, name) + value)
+
+
+def _insert_new(db: Session, model):
+    """
+    INSERT that skips rows whose key already exists, where the dialect supports it:
+    a concurrent request may have built the same rollups and committed first.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+def apply_rows(db: Session, owner_id: int, rows: Iterable[tuple], sign: int = 1):
+    """
+    Fold many transactions of one owner into the rollups with one upsert per
+    touched currency and (category, month, currency) key. `rows` are
+    (category, created_at, type, currency, amount_minor).
+    """
+    user_deltas: Dict[str, dict] = {}
+    category_deltas: Dict[Tuple[str, str, str], dict] = {}
+    for category, created_at, type_, currency, amount in rows:
+        income = amount if type_ == "income" else 0
+        expense = 0 if type_ == "income" else amount
+        key = (category, month_key(created_at), currency)
+        for target in (
+            user_deltas.setdefault(currency, {"total_income": 0, "total_expense": 0, "transaction_count": 0}),
+            category_deltas.setdefault(key, {"total_income": 0, "total_expense": 0, "transaction_count": 0}),
+        ):
+            target["total_income"] += sign * income
+            target["total_expense"] += sign * expense
+            target["transaction_count"] += sign
+
+    for currency, deltas in user_deltas.items():
+        _upsert(db, UserFinanceRollup, {"owner_id": owner_id, "currency": currency}, deltas)
+    for (category, month, currency), deltas in category_deltas.items():
+        _upsert(db, UserCategoryRollup, {"owner_id": owner_id, "category": category, "month": month, "currency": currency}, deltas)
+
+
+def apply_transaction(db: Session, trans: Transaction, sign: int = 1):
+    """
+    Fold one transaction into the owner's rollups inside the caller's DB transaction.
+
+    Call ensure_rollup() before the write, then this with sign=1 for an insert or
+    sign=-1 for a delete; an update is a -1 of the old values followed by a +1 of
+    the new ones. `trans.created_at` must be loaded (flush + refresh after insert).
+    """
+    apply_rows(db, trans.owner_id, [
+        (trans.category, trans.created_at, trans.type, trans.currency, trans.amount_minor)
+    ], sign)
+
+
+def amount_minor_sql():
+    """
+    Transaction.amount_minor as an SQL expression that is never NULL: rows an
+    older release wrote after the r0002 backfill have only the float amount,
+    which was always UZS (two decimal places).
+    """
+    return func.coalesce(Transaction.amount_minor, cast(func.round(Transaction.amount * 100), BigInteger))
+
+
+def income_expense_sums():
+    """
+    SUM() expressions of the income and expense amounts, in minor units.
+    """
+    amount = amount_minor_sql()
+    income = func.sum(case((Transaction.type == "income", amount), else_=0))
+    expense = func.sum(case((Transaction.type == "income", 0), else_=amount))
+    return income, expense
+
+
+def _aggregate(
+    db: Session, owner_ids: List[int],
+) -> Tuple[Dict[Tuple[int, str], Totals], Dict[Tuple[int, str, str, str], Totals]]:
+    """
+    Recompute the expected rollups for `owner_ids` straight from the transactions table,
+    keyed by (owner, currency) and (owner, category, month, currency). Every owner gets
+    a user-level entry in the default currency, even with no transactions.
+    """
+    income, expense = income_expense_sums()
+    count = func.count(Transaction.id)
+    month = _month_key_sql(db)
+
+    user_totals: Dict[Tuple[int, str], Totals] = {(owner_id, DEFAULT_CURRENCY): (0, 0, 0) for owner_id in owner_ids}
+    category_totals: Dict[Tuple[int, str, str, str], Totals] = {}
+
+    rows = db.execute(
+        select(Transaction.owner_id, Transaction.category, month, Transaction.currency, income, expense, count)
+        .where(Transaction.owner_id.in_(owner_ids))
+        .group_by(Transaction.owner_id, Transaction.category, month, Transaction.currency)
+    )
+    for owner_id, category, month_value, currency, inc, exp, cnt in rows:
+        category_totals[(owner_id, category, month_value, currency)] = (inc or 0, exp or 0, cnt)
+        u_inc, u_exp, u_cnt = user_totals.get((owner_id, currency), (0, 0, 0))
+        user_totals[(owner_id, currency)] = (u_inc + (inc or 0), u_exp + (exp or 0), u_cnt + cnt)
+
+    return user_totals, category_totals
+
+
+def _owner_batches(db: Session, batch_size: int) -> Iterable[List[int]]:
+    last_id = 0
+    while True:
+        ids = db.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def rebuild_owners(db: Session, owner_ids: List[int]):
+    """
+    Replace the rollups of `owner_ids` with values recomputed from raw transactions.
+    Does not commit. Rows another transaction inserted concurrently (two first
+    writes building the same owner's rollups) are kept rather than failing.
+    """
+    user_totals, category_totals = _aggregate(db, owner_ids)
+
+    db.execute(delete(UserCategoryRollup).where(UserCategoryRollup.owner_id.in_(owner_ids)))
+    db.execute(delete(UserFinanceRollup).where(UserFinanceRollup.owner_id.in_(owner_ids)))
+
+    db.execute(_insert_new(db, UserFinanceRollup), [
+        {"owner_id": owner_id, "currency": currency, "total_income": inc, "total_expense": exp, "transaction_count": cnt}
+        for (owner_id, currency), (inc, exp, cnt) in user_totals.items()
+    ])
+    if category_totals:
+        db.execute(_insert_new(db, UserCategoryRollup), [
+            {"owner_id": owner_id, "category": category, "month": month, "currency": currency,
+             "total_income": inc, "total_expense": exp, "transaction_count": cnt}
+            for (owner_id, category, month, currency), (inc, exp, cnt) in category_totals.items()
+        ])
+
+
+def _user_rollups(db: Session, owner_id: int) -> List[UserFinanceRollup]:
+    return db.execute(select(UserFinanceRollup).where(UserFinanceRollup.owner_id == owner_id)).scalars().all()
+
+
+def ensure_rollup(db: Session, owner_id: int) -> List[UserFinanceRollup]:
+    """
+    Return the owner's user-level rollups, one per currency, building them from
+    raw transactions first if the owner predates rollups. Must run before the
+    caller's pending transaction write is flushed, otherwise that write would
+    be counted twice.
+    """
+    rollups = _user_rollups(db, owner_id)
+    if not rollups:
+        rebuild_owners(db, [owner_id])
+        rollups = _user_rollups(db, owner_id)
+    return rollups
+
+
+def rebuild_rollups(db: Session, batch_size: int = 500) -> int:
+    """
+    Recompute every user's rollups, committing once per batch of users.
+    Returns the number of users processed.
+    """
+    processed = 0
+    for owner_ids in _owner_batches(db, batch_size):
+        rebuild_owners(db, owner_ids)
+        db.commit()
+        processed += len(owner_ids)
+    return processed
+
+
+def check_rollups(db: Session, batch_size: int = 500) -> List[dict]:
+    """
+    Compare stored rollups against the raw transactions table.
+    Returns one entry per mismatching (owner, category, month, currency) key; empty means
+    consistent. Category "*" marks the user-level rollups. Owners with no user-level
+    rollup yet are skipped: the summary endpoint builds theirs on first read.
+    """
+    mismatches = []
+    for owner_ids in _owner_batches(db, batch_size):
+        expected_users, expected_categories = _aggregate(db, owner_ids)
+
+        actual_users = {
+            (row.owner_id, row.currency): (row.total_income, row.total_expense, row.transaction_count)
+            for row in db.execute(select(UserFinanceRollup).where(UserFinanceRollup.owner_id.in_(owner_ids))).scalars()
+        }
+        # Rows whose totals went back to zero after a delete are as good as absent
+        actual_categories = {
+            (row.owner_id, row.category, row.month, row.currency): (row.total_income, row.total_expense, row.transaction_count)
+            for row in db.execute(select(UserCategoryRollup).where(UserCategoryRollup.owner_id.in_(owner_ids))).scalars()
+            if row.transaction_count != 0
+        }
+        built = {owner_id for owner_id, _ in actual_users}
+
+        for key in sorted(set(expected_users) | set(actual_users)):
+            if key[0] not in built:
+                continue
+            expected = expected_users.get(key, (0, 0, 0))
+            actual = actual_users.get(key, (0, 0, 0))
+            if expected != actual:
+                owner_id, currency = key
+                mismatches.append({"owner_id": owner_id, "category": "*", "month": "*", "currency": currency,
+                                   "expected": expected, "actual": actual})
+
+        for key in sorted(set(expected_categories) | set(actual_categories)):
+            if key[0] not in built:
+                continue
+            expected = expected_categories.get(key, (0, 0, 0))
+            actual = actual_categories.get(key, (0, 0, 0))
+            if expected != actual:
+                owner_id, category, month, currency = key
+                mismatches.append({"owner_id": owner_id, "category": category, "month": month, "currency": currency,
+                                   "expected": expected, "actual": actual})
+    return mismatches
@@ -0,0 +1,128 @@
+import json
+from collections import defaultdict
+from typing import Dict, List
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.job import Job
+from app.models.task import Task
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.utils.ai_service import (
+    AI_JOB_TIMEOUT_SECONDS, AI_TIMEOUT_SECONDS, analyze_task_priorities, categorize_transactions, decompose_task,
+)
+from app.utils.finance_rollup import amount_minor_sql, apply_rows, ensure_rollup
+from app.utils.jobs import JOB_CHUNK_SIZE, JOB_WORKERS, RUN_JOBS_INLINE, PermanentJobError, checkpoint, job_handler
+from app.utils.streaks import rebuild_owners
+from app.utils.subtasks import parse_steps, replace_subtasks
+from app.utils.sync import TASKS, TRANSACTIONS, stamp_rows
+
+
+@job_handler("decompose_task", concurrency=max(JOB_WORKERS, 1))
+def decompose(db: Session, job: Job) -> dict:
+    task_id = json.loads(job.payload)["task_id"]
+    task = db.scalar(select(Task).where(Task.id == task_id, Task.owner_id == job.owner_id))
+    if task is None:
+        raise PermanentJobError(f"Task {task_id} no longer exists")
+    # Run inline, the job holds up the request; otherwise nobody waits on it
+    timeout = AI_TIMEOUT_SECONDS if RUN_JOBS_INLINE else AI_JOB_TIMEOUT_SECONDS
+    steps = parse_steps(decompose_task(task.title, timeout=timeout))
+    replace_subtasks(db, task.id, steps)
+    stamp_rows(db, Task, job.owner_id, TASKS, [task.id], action="decomposed")
+    return {"task_id": task.id, "subtasks_total": len(steps)}
+
+
+@job_handler("recategorize_transactions")
+def recategorize_transactions(db: Session, job: Job) -> dict:
+    """
+    Re-run categorization over the owner's transactions (everyone's when the job
+    has no owner) in id order, JOB_CHUNK_SIZE rows per commit. Changed rows are
+    moved between category rollups in the same commit.
+    """
+    changed = 0
+    while True:
+        stmt = select(
+            Transaction.id, Transaction.owner_id, Transaction.description, Transaction.category,
+            Transaction.created_at, Transaction.type, Transaction.currency, amount_minor_sql().label("amount_minor"),
+        ).where(Transaction.id > job.cursor)
+        if job.owner_id is not None:
+            stmt = stmt.where(Transaction.owner_id == job.owner_id)
+        rows = db.execute(stmt.order_by(Transaction.id).limit(JOB_CHUNK_SIZE)).all()
+        if not rows:
+            return {"processed": job.processed, "changed": changed}
+
+        categories = categorize_transactions([row.description for row in rows], timeout=AI_JOB_TIMEOUT_SECONDS)
+        by_owner: Dict[int, List[tuple]] = defaultdict(list)
+        for row, category in zip(rows, categories):
+            if category != row.category:
+                by_owner[row.owner_id].append((row, category))
+
+        if by_owner:
+            # Rollups must exist (built from the old categories) before the rows change
+            for owner_id in by_owner:
+                ensure_rollup(db, owner_id)
+            db.execute(update(Transaction), [
+                {"id": row.id, "category": category} for items in by_owner.values() for row, category in items
+            ])
+            for owner_id, items in by_owner.items():
+                apply_rows(db, owner_id, [
+                    (row.category, row.created_at, row.type, row.currency, row.amount_minor) for row, _ in items
+                ], -1)
+                apply_rows(db, owner_id, [
+                    (category, row.created_at, row.type, row.currency, row.amount_minor) for row, category in items
+                ])
+                stamp_rows(db, Transaction, owner_id, TRANSACTIONS, [row.id for row, _ in items])
+            changed += sum(len(items) for items in by_owner.values())
+
+        checkpoint(db, job, rows[-1].id, len(rows))
+
+
+@job_handler("reprioritize_tasks")
+def reprioritize_tasks(db: Session, job: Job) -> dict:
+    """
+    Re-run priority prediction over the owner's tasks (everyone's when the job
+    has no owner) in id order, JOB_CHUNK_SIZE rows per commit.
+    """
+    changed = 0
+    while True:
+        stmt = select(Task.id, Task.owner_id, Task.title, Task.description, Task.priority).where(Task.id > job.cursor)
+        if job.owner_id is not None:
+            stmt = stmt.where(Task.owner_id == job.owner_id)
+        rows = db.execute(stmt.order_by(Task.id).limit(JOB_CHUNK_SIZE)).all()
+        if not rows:
+            return {"processed": job.processed, "changed": changed}
+
+        priorities = analyze_task_priorities(
+            [(row.title, row.description) for row in rows], timeout=AI_JOB_TIMEOUT_SECONDS
+        )
+        by_owner: Dict[int, List[dict]] = defaultdict(list)
+        for row, priority in zip(rows, priorities):
+            if priority != row.priority:
+                by_owner[row.owner_id].append({"id": row.id, "priority": priority})
+
+        if by_owner:
+            db.execute(update(Task), [item for items in by_owner.values() for item in items])
+            for owner_id, items in by_owner.items():
+                stamp_rows(db, Task, owner_id, TASKS, [item["id"] for item in items])
+            changed += sum(len(items) for items in by_owner.values())
+
+        checkpoint(db, job, rows[-1].id, len(rows))
+
+
+@job_handler("backfill_streaks")
+def backfill_streaks(db: Session, job: Job) -> dict:
+    """
+    Rebuild daily activity and streaks from the tasks table for the owner
+    (every user when the job has no owner), in user id order, JOB_CHUNK_SIZE
+    users per aggregate query and commit.
+    """
+    while True:
+        stmt = select(User.id).where(User.id > job.cursor)
+        if job.owner_id is not None:
+            stmt = stmt.where(User.id == job.owner_id)
+        owner_ids = db.scalars(stmt.order_by(User.id).limit(JOB_CHUNK_SIZE)).all()
+        if not owner_ids:
+            return {"processed": job.processed}
+        rebuild_owners(db, owner_ids)
+        checkpoint(db, job, owner_ids[-1], len(owner_ids))
@@ -0,0 +1,325 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db import database
+from app.models.job import Job
+
+# Worker coroutines per process; 0 leaves jobs to `python -m app.commands.jobs work`
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# Short jobs a user waits on (decompose) run in their request when no worker of this
+# process would pick them up soon: with no workers, or on serverless platforms, which
+# freeze the process between requests
+RUN_JOBS_INLINE = database.SERVERLESS or JOB_WORKERS <= 0
+# Idle workers look for due jobs (retries, other processes' jobs) this often
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1.0))
+# A running job not checkpointed for this long is presumed dead and re-claimed
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 300))
+# Retry n waits JOB_RETRY_DELAY_SECONDS * 2**(n-1)
+JOB_RETRY_DELAY_SECONDS = float(os.getenv("JOB_RETRY_DELAY_SECONDS", 5))
+# Rows per chunk (and per commit) for table-walking jobs
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", 500))
+
+ACTIVE_STATUSES = ("queued", "running")
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """
+    Raised by a handler when retrying cannot help (e.g. the task was deleted).
+    """
+
+
+@dataclass
+class JobHandler:
+    fn: Callable[[Session, Job], Optional[dict]]
+    # Jobs of this kind running at once in one process
+    concurrency: int
+    max_attempts: int
+
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str, concurrency: int = 1, max_attempts: int = 3):
+    """
+    Register `fn(db, job) -> result dict or None` for jobs of `kind`.
+
+    The handler's writes are committed together with the job's success. A
+    handler that walks a table commits along the way through checkpoint(), and
+    on a retry continues from `job.cursor`.
+    """
+    def register(fn):
+        _handlers[kind] = JobHandler(fn=fn, concurrency=concurrency, max_attempts=max_attempts)
+        return fn
+    return register
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    owner_id: Optional[int] = None,
+    payload: Optional[dict] = None,
+    dedupe_key: Optional[str] = None,
+) -> Job:
+    """
+    Add a job, or return the queued/running job with the same `dedupe_key`.
+    Does not commit; call job_queue.notify() after committing.
+    """
+    handler = _handlers.get(kind)
+    if handler is None:
+        raise ValueError(f"Unknown job kind: {kind}")
+    if dedupe_key is not None:
+        existing = db.scalar(
+            select(Job)
+            .where(Job.dedupe_key == dedupe_key, Job.status.in_(ACTIVE_STATUSES))
+            .order_by(Job.id.desc())
+            .limit(1)
+        )
+        if existing is not None:
+            return existing
+
+    job = Job(
+        kind=kind,
+        status="queued",
+        owner_id=owner_id,
+        dedupe_key=dedupe_key,
+        payload=json.dumps(payload) if payload is not None else None,
+        attempts=0,
+        max_attempts=handler.max_attempts,
+        cursor=0,
+        processed=0,
+        run_after=_now(),
+    )
+    db.add(job)
+    db.flush()
+    db.refresh(job)  # server-side created_at, so callers can serialize it right away
+    return job
+
+
+def checkpoint(db: Session, job: Job, cursor: int, processed: int):
+    """
+    Record progress of a table-walking job and commit it together with the
+    chunk's writes, renewing the job's lease.
+    """
+    job.cursor = cursor
+    job.processed = (job.processed or 0) + processed
+    job.lease_expires_at = _now() + timedelta(seconds=JOB_LEASE_SECONDS)
+    db.commit()
+
+
+def _due(now: datetime):
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(Job.status == "running", Job.lease_expires_at < now),
+    )
+
+
+def claim_next(db: Session, busy_kinds: List[str]) -> Optional[Tuple[int, str]]:
+    """
+    Atomically mark the oldest due job as running and return (id, kind).
+    The conditional UPDATE makes this safe with several processes polling.
+    """
+    kinds = [kind for kind in _handlers if kind not in busy_kinds]
+    if not kinds:
+        return None
+    now = _now()
+    candidates = db.execute(
+        select(Job.id, Job.kind)
+        .where(_due(now), Job.kind.in_(kinds))
+        .order_by(Job.run_after, Job.id)
+        .limit(8)
+    ).all()
+    for job_id, kind in candidates:
+        if _claim(db, job_id, _due(now), now):
+            return job_id, kind
+    return None
+
+
+def _claim(db: Session, job_id: int, condition, now: datetime) -> bool:
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id == job_id, condition)
+        .values(
+            status="running",
+            attempts=Job.attempts + 1,
+            lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS),
+            started_at=func.coalesce(Job.started_at, now),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return claimed.rowcount == 1
+
+
+def _finish(job: Job, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+    job.status = status
+    job.result = json.dumps(result) if result is not None else None
+    job.error = error
+    job.lease_expires_at = None
+    job.finished_at = _now()
+
+
+def run_job(job_id: int):
+    """
+    Run one claimed job to success, a scheduled retry or failure. Blocking;
+    workers call it on the threadpool.
+    """
+    db = database.SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        handler = _handlers.get(job.kind)
+        if handler is None:
+            _finish(job, "failed", error=f"Unknown job kind: {job.kind}")
+            db.commit()
+            return
+        if job.attempts > job.max_attempts:
+            # Re-claimed after its worker died on the last attempt
+            _finish(job, "failed", error=job.error or "Worker stopped while running the job")
+            db.commit()
+            return
+
+        try:
+            result = handler.fn(db, job)
+        except Exception as e:
+            db.rollback()
+            job = db.get(Job, job_id)
+            error = f"{e.__class__.__name__}: {e}"
+            if isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts:
+                logger.exception("Job %s (%s) failed", job_id, job.kind)
+                _finish(job, "failed", error=error)
+            else:
+                logger.warning("Job %s (%s) attempt %s failed, retrying: %s", job_id, job.kind, job.attempts, error)
+                job.status = "queued"
+                job.error = error
+                job.lease_expires_at = None
+                job.run_after = _now() + timedelta(seconds=JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1))
+            db.commit()
+            return
+
+        _finish(job, "succeeded", result=result)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_now(job_id: int):
+    """
+    Run a queued job in the calling thread instead of waiting for a worker
+    (see RUN_JOBS_INLINE), retrying right away rather than after a delay, to
+    success or failure. Blocking. Does nothing if the job is already running.
+    """
+    while True:
+        db = database.SessionLocal()
+        try:
+            claimed = _claim(db, job_id, Job.status == "queued", _now())
+        finally:
+            db.close()
+        if not claimed:
+            return
+        run_job(job_id)
+
+
+class JobQueue:
+    """
+    In-process workers for the jobs table, standing in for an external broker.
+    Jobs are rows, so they survive restarts and any number of processes (API
+    workers, or `python -m app.commands.jobs work`) can share them. Workers run
+    handlers on the threadpool, never on the request path.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_SECONDS):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._running: Dict[str, int] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._claim_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+    async def start(self):
+        if self.workers <= 0 or self._tasks:
+            return
+        self._stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._claim_lock = asyncio.Lock()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # Checked by the workers too: on Python < 3.12 wait_for() can swallow a
+        # cancellation that arrives just as the wakeup fires
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def notify(self):
+        """
+        Wake idle workers now instead of at their next poll. Safe from any thread.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _busy_kinds(self) -> List[str]:
+        return [kind for kind, count in self._running.items() if count >= _handlers[kind].concurrency]
+
+    async def _claim(self) -> Optional[Tuple[int, str]]:
+        # One claim at a time per process, so per-kind limits hold
+        async with self._claim_lock:
+            def claim():
+                db = database.SessionLocal()
+                try:
+                    return claim_next(db, self._busy_kinds())
+                finally:
+                    db.close()
+
+            claimed = await run_in_threadpool(claim)
+            if claimed is not None:
+                self._running[claimed[1]] = self._running.get(claimed[1], 0) + 1
+            return claimed
+
+    async def _work(self):
+        while not self._stopping:
+            try:
+                claimed = await self._claim()
+            except Exception:
+                logger.exception("Could not claim a job")
+                claimed = None
+
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            job_id, kind = claimed
+            try:
+                await run_in_threadpool(run_job, job_id)
+            except Exception:
+                logger.exception("Job %s crashed its worker", job_id)
+            finally:
+                self._running[kind] -= 1
+                # A slot for this kind is free again
+                self._wakeup.set()
+
+
+job_queue = JobQueue()
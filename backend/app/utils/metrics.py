@@ -0,0 +1,324 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Requests slower than this, or running at least this many queries, are logged with their SQL
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", 50))
+# Statements kept per request for that log; the counters always see every query
+MAX_LOGGED_STATEMENTS = int(os.getenv("MAX_LOGGED_STATEMENTS", 50))
+
+# Long-lived event streams: open for minutes by design, so their duration is not
+# latency; they keep their SQL counters but stay out of the latency histogram and slow log
+UNTIMED_ROUTES = frozenset({"/events/stream"})
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+logger = logging.getLogger("app.performance")
+
+
+class Histogram:
+    """
+    A labelled Prometheus histogram, kept in process. Thread-safe.
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts..., count], sum
+        self._series: Dict[tuple, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-1] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(k, list(counts), total[0]) for k, (counts, total) in self._series.items()]
+        for label_values, counts, total in sorted(series):
+            pairs = list(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(pairs, le=_number(bound))} {cumulative}")
+            lines.append(f'{self.name}_bucket{_labels(pairs, le="+Inf")} {counts[-1]}')
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {counts[-1]}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs, **extra) -> str:
+    items = list(pairs) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+def _number(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request.",
+    ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Latency of individual SQL statements, in and out of requests.",
+    (), LATENCY_BUCKETS,
+)
+
+
+class RequestStats:
+    """
+    Per-request SQL counters. Created by the middleware and shared by reference
+    with the threadpool / greenlet contexts the request's queries run in.
+    """
+    __slots__ = ("queries", "query_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements: List[Tuple[float, str]] = []
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+# Kept on the statement's execution context, so a failed statement leaves nothing behind
+_STARTED = "_metrics_query_started"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    setattr(context, _STARTED, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, _STARTED, None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    QUERY_LATENCY.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += elapsed
+        if len(stats.statements) < MAX_LOGGED_STATEMENTS:
+            stats.statements.append((elapsed, statement))
+
+
+_engines: List[Engine] = []
+
+
+def instrument_engine(engine: Engine):
+    """
+    Time every statement on `engine` (for an AsyncEngine pass its .sync_engine)
+    and report its pool on /metrics.
+    """
+    if engine in _engines:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _engines.append(engine)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    # Unmatched paths share one label so scanners can't blow up cardinality
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (streaming responses are timed to their last chunk):
+    records latency per route template and SQL counts/time per request, and logs
+    requests over SLOW_REQUEST_MS or SLOW_REQUEST_QUERIES together with their SQL.
+    Event streams (UNTIMED_ROUTES, and WebSockets, which aren't HTTP requests)
+    are not timed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            method, route = scope["method"], _route_label(scope)
+            timed = route not in UNTIMED_ROUTES
+            if timed:
+                REQUEST_LATENCY.observe(elapsed, method, route, str(status[0]))
+            REQUEST_QUERIES.observe(stats.queries, method, route)
+            REQUEST_QUERY_TIME.observe(stats.query_time, method, route)
+            if (timed and elapsed * 1000 >= SLOW_REQUEST_MS) or stats.queries >= SLOW_REQUEST_QUERIES:
+                _log_slow(method, scope.get("path", ""), route, status[0], elapsed, stats)
+
+
+def _log_slow(method: str, path: str, route: str, status: int, elapsed: float, stats: RequestStats):
+    statements = "\n".join(f"  [{seconds * 1000:.1f} ms] {' '.join(sql.split())}" for seconds, sql in stats.statements)
+    if stats.queries > len(stats.statements):
+        statements += f"\n  ... {stats.queries - len(stats.statements)} more"
+    logger.warning(
+        "Slow request %s %s (route %s) -> %s: %.1f ms, %d queries, %.1f ms in SQL\n%s",
+        method, path, route, status, elapsed * 1000, stats.queries, stats.query_time * 1000, statements,
+    )
+
+
+def _pool_lines() -> List[str]:
+    gauges = {
+        "db_pool_size": "Configured pool size.",
+        "db_pool_checked_out": "Connections currently in use.",
+        "db_pool_checked_in": "Idle connections in the pool.",
+        "db_pool_overflow": "Connections opened beyond pool_size.",
+    }
+    values: Dict[str, List[Tuple[str, int]]] = {name: [] for name in gauges}
+    for engine in _engines:
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        label = "async" if engine.dialect.is_async else "sync"
+        values["db_pool_size"].append((label, pool.size()))
+        values["db_pool_checked_out"].append((label, pool.checkedout()))
+        values["db_pool_checked_in"].append((label, pool.checkedin()))
+        values["db_pool_overflow"].append((label, max(pool.overflow(), 0)))
+
+    lines = []
+    for name, help in gauges.items():
+        if not values[name]:
+            continue
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{_labels([("engine", label)])} {value}' for label, value in values[name]]
+    return lines
+
+
+def _ai_lines() -> List[str]:
+    from app.utils.ai_service import ProviderStats, ai_metrics
+
+    metrics = ai_metrics()
+    if not metrics:
+        return []
+    lines = ["# HELP ai_requests_total AI function lookups by outcome.", "# TYPE ai_requests_total counter"]
+    for provider, kinds in sorted(metrics.items()):
+        for kind, snapshot in sorted(kinds.items()):
+            for outcome in ProviderStats.EVENTS:
+                lines.append(f'ai_requests_total{_labels([("provider", provider), ("function", kind), ("outcome", outcome)])} {snapshot[outcome]}')
+
+    lines += ["# HELP ai_inference_duration_seconds AI provider inference latency.",
+              "# TYPE ai_inference_duration_seconds histogram"]
+    for provider, kinds in sorted(metrics.items()):
+        for kind, snapshot in sorted(kinds.items()):
+            pairs = [("provider", provider), ("function", kind)]
+            cumulative = 0
+            for bound, count in snapshot["latency_buckets"].items():
+                cumulative += count
+                lines.append(f"ai_inference_duration_seconds_bucket{_labels(pairs, le=_number(bound))} {cumulative}")
+            lines.append(f'ai_inference_duration_seconds_bucket{_labels(pairs, le="+Inf")} {snapshot["latency_count"]}')
+            lines.append(f"ai_inference_duration_seconds_sum{_labels(pairs)} {_number(snapshot['latency_sum'])}")
+            lines.append(f"ai_inference_duration_seconds_count{_labels(pairs)} {snapshot['latency_count']}")
+    return lines
+
+
+def _event_lines() -> List[str]:
+    from app.utils.events import get_event_broker
+
+    stats = getattr(get_event_broker(), "stats", None)
+    if stats is None:
+        return []
+    stats = stats()
+    return [
+        "# HELP events_subscriptions Open event streams (SSE and WebSocket).",
+        "# TYPE events_subscriptions gauge",
+        f"events_subscriptions {stats['subscriptions']}",
+        "# HELP events_published_total Change events published.",
+        "# TYPE events_published_total counter",
+        f"events_published_total {stats['published']}",
+        "# HELP events_dropped_total Events dropped for streams that fell behind (sent a resync instead).",
+        "# TYPE events_dropped_total counter",
+        f"events_dropped_total {stats['dropped']}",
+    ]
+
+
+def _rate_limit_lines() -> List[str]:
+    from app.utils.rate_limit import rate_limit_stats
+
+    stats = rate_limit_stats()
+    lines = [
+        "# HELP http_requests_in_flight Requests in flight, as seen by load shedding.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {stats['in_flight']}",
+        "# HELP http_request_p95_seconds Rolling p95 time to first byte, as seen by load shedding.",
+        "# TYPE http_request_p95_seconds gauge",
+        f"http_request_p95_seconds {_number(stats['p95_seconds'])}",
+        "# HELP http_requests_rate_limited_total Requests refused with 429 by route class and bucket.",
+        "# TYPE http_requests_rate_limited_total counter",
+    ]
+    for (route_class, scope), count in sorted(stats["rate_limited"].items()):
+        lines.append(f'http_requests_rate_limited_total{_labels([("class", route_class), ("scope", scope)])} {count}')
+    lines += ["# HELP http_requests_shed_total Requests refused with 503 by load shedding.",
+              "# TYPE http_requests_shed_total counter"]
+    for reason, count in sorted(stats["shed"].items()):
+        lines.append(f'http_requests_shed_total{_labels([("reason", reason)])} {count}')
+    return lines
+
+
+def render_metrics() -> str:
+    """
+    Everything above in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    for histogram in (REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_QUERY_TIME, QUERY_LATENCY):
+        lines += histogram.render()
+    lines += _pool_lines()
+    lines += _ai_lines()
+    lines += _event_lines()
+    lines += _rate_limit_lines()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,88 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Select, and_, literal, or_, select
+from sqlalchemy.orm import Session
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Pack the (created_at, id) position of a row into an opaque URL-safe token.
+    """
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Reverse of encode_cursor. Raises ValueError on anything malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _as_stored(db: Session, value: datetime):
+    # SQLite compares timestamps as text, and CURRENT_TIMESTAMP stores whole
+    # seconds with no fraction, which a bound datetime (always ".%f") never equals
+    if db.bind.dialect.name == "sqlite" and value.microsecond == 0 and value.tzinfo is None:
+        return literal(value.strftime("%Y-%m-%d %H:%M:%S"))
+    return value
+
+
+def _selects_entity(stmt: Select) -> bool:
+    descriptions = stmt.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+
+
+def keyset_page(
+    db: Session, stmt: Select, model, owner_id: int, limit: int, after: Optional[str] = None,
+) -> Tuple[List, Optional[str]]:
+    """
+    Return one page of `stmt` ordered newest first, plus the cursor of the next page.
+    Takes a sync Session so handlers can call it through `await db.run_sync(...)`.
+
+    Rows are ordered by (created_at, id) descending so the page is a single range
+    scan over the (owner_id, created_at, id) index. `stmt` selects either the
+    model (rows are instances) or columns including created_at and id (rows
+    are Row tuples) of `owner_id`'s rows.
+
+    Raises ValueError for a malformed cursor. A cursor whose row isn't one of
+    the owner's (e.g. deleted since the last page) continues from the position
+    it encodes; only the owner's rows are ever looked up, so a cursor naming
+    another user's row can't reveal that the row exists or when it was created.
+    """
+    if after:
+        created_at, row_id = decode_cursor(after)
+        anchor_row = select(model.created_at).where(model.id == row_id, model.owner_id == owner_id)
+        if db.scalar(select(anchor_row.exists())) is True:
+            # Compare against the stored anchor value rather than the decoded datetime:
+            # SQLite keeps CURRENT_TIMESTAMP without microseconds, so a bound datetime
+            # would never be equal to it and rows sharing a second would be skipped.
+            anchor = anchor_row.scalar_subquery()
+        else:
+            anchor = _as_stored(db, created_at)
+        stmt = stmt.where(
+            or_(
+                model.created_at < anchor,
+                and_(model.created_at == anchor, model.id < row_id),
+            )
+        )
+
+    result = db.execute(stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1))
+    rows = (result.scalars() if _selects_entity(stmt) else result).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
@@ -0,0 +1,329 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Pattern, Protocol, Tuple
+
+from jose import JWTError
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+# Buckets kept by the in-memory store; past this, idle ones are dropped
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+# Requests in flight in this process before everything but exempt routes gets a 503 (0 disables)
+LOAD_SHED_MAX_IN_FLIGHT = int(os.getenv("LOAD_SHED_MAX_IN_FLIGHT", 512))
+# p95 time to first byte over the window above which sheddable route classes get a 503 (0 disables)
+LOAD_SHED_P95_MS = float(os.getenv("LOAD_SHED_P95_MS", 2000))
+LOAD_SHED_WINDOW_SECONDS = float(os.getenv("LOAD_SHED_WINDOW_SECONDS", 10))
+# Fewer samples than this in the window say nothing about latency
+LOAD_SHED_MIN_SAMPLES = int(os.getenv("LOAD_SHED_MIN_SAMPLES", 50))
+LOAD_SHED_RETRY_AFTER = int(os.getenv("LOAD_SHED_RETRY_AFTER", 1))
+
+
+@dataclass(frozen=True)
+class Limit:
+    """
+    A token bucket: up to `burst` requests at once, refilled at `rate` per second.
+    """
+    rate: float
+    burst: float
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    name: str
+    per_user: Optional[Limit]
+    per_ip: Optional[Limit]
+    # Shed while p95 latency is over LOAD_SHED_P95_MS, so cheap requests keep working
+    sheddable: bool = False
+
+
+def _limit(name: str, default: Optional[Limit]) -> Optional[Limit]:
+    """
+    `default`, unless RATE_LIMIT_<NAME> is set to "rate/burst" (requests per second) or "off".
+    """
+    value = os.getenv(f"RATE_LIMIT_{name}")
+    if value is None:
+        return default
+    if value.strip().lower() == "off":
+        return None
+    rate, _, burst = value.partition("/")
+    return Limit(float(rate), float(burst or rate))
+
+
+def _route_class(name: str, per_user: Optional[Limit], per_ip: Optional[Limit], sheddable: bool = False) -> RouteClass:
+    return RouteClass(name, _limit(f"{name.upper()}_USER", per_user), _limit(f"{name.upper()}_IP", per_ip), sheddable)
+
+
+# Overridable per class and scope, e.g. RATE_LIMIT_AI_USER=0.1/5 or RATE_LIMIT_DEFAULT_IP=off
+ROUTE_CLASSES: Dict[str, RouteClass] = {
+    # Each attempt costs a bcrypt hash; there is no user yet, so only the IP counts
+    "auth": _route_class("auth", None, Limit(0.5, 20)),
+    # AI calls and the jobs that make them
+    "ai": _route_class("ai", Limit(0.2, 10), Limit(1, 30), sheddable=True),
+    # Imports, batch mutations and exports: many rows per request
+    "bulk": _route_class("bulk", Limit(1, 10), Limit(2, 20), sheddable=True),
+    "default": _route_class("default", Limit(20, 100), Limit(50, 200)),
+    # Health checks, metrics scrapes and long-lived event streams
+    "exempt": RouteClass("exempt", None, None),
+}
+
+# (methods, path pattern, class name), first match wins; anything else is "default"
+ROUTES: List[Tuple[frozenset, Pattern, str]] = [
+    (frozenset({"POST"}), re.compile(r"/auth/(login|signup)/?"), "auth"),
+    (frozenset({"POST"}), re.compile(r"/tasks/\d+/decompose|/(tasks/reprioritize|transactions/recategorize)/?"), "ai"),
+    (frozenset({"POST"}), re.compile(r"/(tasks|transactions)/bulk/?"), "bulk"),
+    (frozenset({"PATCH", "DELETE"}), re.compile(r"/tasks/batch/?"), "bulk"),
+    (frozenset({"GET"}), re.compile(r"/(tasks|transactions)/export/?"), "bulk"),
+    (frozenset({"GET", "HEAD"}), re.compile(r"/(health|metrics)(/.*)?|/events/.*"), "exempt"),
+]
+
+
+def classify(method: str, path: str) -> RouteClass:
+    for methods, pattern, name in ROUTES:
+        if method in methods and pattern.fullmatch(path):
+            return ROUTE_CLASSES[name]
+    return ROUTE_CLASSES["default"]
+
+
+class RateLimitStore(Protocol):
+    """
+    Minimal interface a shared store (e.g. Redis running the refill as a Lua
+    script) must provide to be plugged in place of the InMemoryStore, so
+    every worker draws from the same buckets.
+    """
+
+    async def take(self, key: str, limit: Limit) -> float:
+        """
+        Take a token from the bucket at `key`: 0 if granted, otherwise the
+        seconds until one will be available.
+        """
+        ...
+
+
+class InMemoryStore:
+    """
+    Thread-safe buckets for one process. With several workers each enforces
+    the limits on its own, so a client gets up to workers x the configured rate.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill, when the bucket will be full again]
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, limit: Limit) -> float:
+        return self.take_at(key, limit, time.monotonic())
+
+    def take_at(self, key: str, limit: Limit, now: float) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                tokens = limit.burst
+                bucket = self._buckets[key] = [tokens, now, now]
+            else:
+                tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+            granted = tokens >= 1
+            if granted:
+                tokens -= 1
+            bucket[0], bucket[1], bucket[2] = tokens, now, now + (limit.burst - tokens) / limit.rate
+            return 0.0 if granted else (1 - tokens) / limit.rate
+
+    def _evict(self, now: float):
+        # A full bucket is the same as none; if a flood of keys left none full, drop the oldest tenth
+        full = [key for key, bucket in self._buckets.items() if bucket[2] <= now]
+        for key in full or list(self._buckets)[:max(self.max_keys // 10, 1)]:
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+_store: RateLimitStore = InMemoryStore()
+
+
+def set_rate_limit_store(store: RateLimitStore):
+    """
+    Swap the in-process buckets for a shared store.
+    """
+    global _store
+    _store = store
+
+
+class LoadMonitor:
+    """
+    In-flight requests and a rolling p95 of time to first byte for this
+    process. The p95 is recomputed at most every `refresh` seconds, so the
+    per-request cost is a counter update and a deque append.
+    """
+
+    def __init__(self, window: float = LOAD_SHED_WINDOW_SECONDS, refresh: float = 0.5, max_samples: int = 4096):
+        self.window = window
+        self.refresh = refresh
+        self.in_flight = 0
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=max_samples)  # (finished at, seconds)
+        self._p95 = 0.0
+        self._next_refresh = 0.0
+
+    def observe(self, seconds: float, now: float):
+        self._samples.append((now, seconds))
+
+    def p95(self, now: float) -> float:
+        if now >= self._next_refresh:
+            self._next_refresh = now + self.refresh
+            while self._samples and self._samples[0][0] < now - self.window:
+                self._samples.popleft()
+            # Shed requests add no samples, so an idle window falls back to 0 and lets traffic in again
+            if len(self._samples) < LOAD_SHED_MIN_SAMPLES:
+                self._p95 = 0.0
+            else:
+                latencies = sorted(seconds for _, seconds in self._samples)
+                self._p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        return self._p95
+
+    def shed_reason(self, route_class: RouteClass, now: float) -> Optional[str]:
+        if LOAD_SHED_MAX_IN_FLIGHT and self.in_flight >= LOAD_SHED_MAX_IN_FLIGHT:
+            return "in_flight"
+        if route_class.sheddable and LOAD_SHED_P95_MS and self.p95(now) * 1000 > LOAD_SHED_P95_MS:
+            return "latency"
+        return None
+
+
+load_monitor = LoadMonitor()
+# (class, "user" or "ip") -> requests refused with 429; reason -> requests shed with 503
+rate_limited: Counter = Counter()
+shed: Counter = Counter()
+
+
+def _bearer(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" and token else None
+    return None
+
+
+_decode_access_token = None
+
+
+def _client_ip(scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "-"
+
+
+def _user_key(scope) -> str:
+    """
+    Who the per-user bucket belongs to: the verified subject of the bearer
+    token, so a re-login or refreshed token keeps drawing from the same
+    bucket, or the client IP when there is no valid token.
+    """
+    global _decode_access_token
+    token = _bearer(scope)
+    if token is not None:
+        if _decode_access_token is None:
+            # Imported on first use: security pulls in the password hashing stack, which fast startup defers
+            from app.utils.security import decode_access_token as _decode_access_token
+        try:
+            subject = _decode_access_token(token).get("sub")
+        except JWTError:
+            subject = None
+        if subject:
+            return f"sub:{subject}"
+    return f"ip:{_client_ip(scope)}"
+
+
+async def _reject(send, status: int, retry_after: float, detail: str):
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(max(math.ceil(retry_after), 1)).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware, in front of routing so refused requests cost no
+    router, dependency or DB work:
+
+    - load shedding: 503 for every non-exempt request while
+      LOAD_SHED_MAX_IN_FLIGHT requests are in flight, and for sheddable
+      route classes while p95 latency is over LOAD_SHED_P95_MS;
+    - rate limiting: 429 once the client's per-IP or per-user bucket for the
+      route class is empty.
+
+    Both answer with Retry-After. The user is the verified `sub` of the
+    bearer token (decoding is cached per token), so new tokens don't bring
+    fresh buckets; requests without a valid token use a per-user bucket
+    keyed on their IP instead. The IP is the ASGI client address; behind a
+    proxy run uvicorn with --proxy-headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        path, root_path = scope["path"], scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        route_class = classify(scope["method"], path)
+        if route_class.name == "exempt":
+            await self.app(scope, receive, send)
+            return
+
+        monitor = load_monitor
+        reason = monitor.shed_reason(route_class, time.monotonic())
+        if reason is not None:
+            shed[reason] += 1
+            await _reject(send, 503, LOAD_SHED_RETRY_AFTER, "Server is busy, please retry shortly")
+            return
+
+        if route_class.per_ip is not None:
+            wait = await _store.take(f"ip:{route_class.name}:{_client_ip(scope)}", route_class.per_ip)
+            if wait:
+                rate_limited[(route_class.name, "ip")] += 1
+                await _reject(send, 429, wait, "Too many requests")
+                return
+        if route_class.per_user is not None:
+            wait = await _store.take(f"user:{route_class.name}:{_user_key(scope)}", route_class.per_user)
+            if wait:
+                rate_limited[(route_class.name, "user")] += 1
+                await _reject(send, 429, wait, "Too many requests")
+                return
+
+        started = time.perf_counter()
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                monitor.observe(time.perf_counter() - started, time.monotonic())
+            await send(message)
+
+        monitor.in_flight += 1
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            monitor.in_flight -= 1
+
+
+def rate_limit_stats() -> dict:
+    return {
+        "in_flight": load_monitor.in_flight,
+        "p95_seconds": load_monitor.p95(time.monotonic()),
+        "rate_limited": dict(rate_limited),
+        "shed": dict(shed),
+    }
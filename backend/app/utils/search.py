@@ -0,0 +1,199 @@
+import re
+from typing import List
+
+from sqlalchemy import DDL, column, event, func, literal_column, or_, select, table, text
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+from app.models.transaction import Transaction
+
+# Search terms are reduced to word tokens, so user input can never inject
+# FTS5 / tsquery operators
+_TERM = re.compile(r"\w+")
+MAX_TERMS = 16
+
+# --- SQLite: contentless FTS5 tables kept in sync by triggers ---------------------
+# The owner is stored as an indexed token ("o42") so that a query intersects the
+# user's postings inside the index instead of filtering every match afterwards.
+
+_SQLITE_DDL = {
+    "tasks": [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            owner, title, description, content='', tokenize='unicode61 remove_diacritics 2')""",
+        """CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts(rowid, owner, title, description)
+            VALUES (new.id, 'o' || new.owner_id, new.title, new.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, owner, title, description)
+            VALUES ('delete', old.id, 'o' || old.owner_id, old.title, old.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description, owner_id ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, owner, title, description)
+            VALUES ('delete', old.id, 'o' || old.owner_id, old.title, old.description);
+            INSERT INTO tasks_fts(rowid, owner, title, description)
+            VALUES (new.id, 'o' || new.owner_id, new.title, new.description);
+        END""",
+    ],
+    "transactions": [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+            owner, description, content='', tokenize='unicode61 remove_diacritics 2')""",
+        """CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts(rowid, owner, description)
+            VALUES (new.id, 'o' || new.owner_id, new.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts(transactions_fts, rowid, owner, description)
+            VALUES ('delete', old.id, 'o' || old.owner_id, old.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description, owner_id ON transactions BEGIN
+            INSERT INTO transactions_fts(transactions_fts, rowid, owner, description)
+            VALUES ('delete', old.id, 'o' || old.owner_id, old.description);
+            INSERT INTO transactions_fts(rowid, owner, description)
+            VALUES (new.id, 'o' || new.owner_id, new.description);
+        END""",
+    ],
+}
+
+_tasks_fts = table("tasks_fts", column("rowid"))
+_transactions_fts = table("transactions_fts", column("rowid"))
+
+_SQLITE_REFILL = {
+    "tasks": "INSERT INTO tasks_fts(rowid, owner, title, description) "
+             "SELECT id, 'o' || owner_id, title, description FROM tasks WHERE id > :low AND id <= :high",
+    "transactions": "INSERT INTO transactions_fts(rowid, owner, description) "
+                    "SELECT id, 'o' || owner_id, description FROM transactions WHERE id > :low AND id <= :high",
+}
+
+# --- Postgres: GIN expression indexes over to_tsvector -----------------------------
+# 'simple' config: titles mix English and Uzbek, so no language-specific stemming.
+
+def _task_vector():
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(Task.title, "") + " " + func.coalesce(Task.description, ""),
+    )
+
+def _transaction_vector():
+    return func.to_tsvector(literal_column("'simple'"), func.coalesce(Transaction.description, ""))
+
+# (index, table, indexed expression); the queries below must use the same expressions
+POSTGRES_SEARCH_INDEXES = [
+    ("ix_tasks_search", "tasks", "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))"),
+    ("ix_transactions_search", "transactions", "to_tsvector('simple', coalesce(description, ''))"),
+]
+
+_POSTGRES_DDL = {
+    table: [f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN ({expression})"]
+    for name, table, expression in POSTGRES_SEARCH_INDEXES
+}
+
+for _table in (Task.__table__, Transaction.__table__):
+    for _statement in _SQLITE_DDL[_table.name]:
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    for _statement in _POSTGRES_DDL[_table.name]:
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+
+def search_terms(q: str) -> List[str]:
+    return _TERM.findall(q.lower())[:MAX_TERMS]
+
+
+def install_search_index(db: Session, batch_size: int = 50000):
+    """
+    Create the search structures on an existing database and (re)index every row.
+    New databases get them from create_all; this is for tables that predate them.
+    Commits once per batch.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        for statements in _POSTGRES_DDL.values():
+            for statement in statements:
+                db.execute(text(statement))
+        db.commit()
+        return
+    if dialect != "sqlite":
+        return
+
+    for table, statements in _SQLITE_DDL.items():
+        for statement in statements:
+            db.execute(text(statement))
+        db.execute(text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('delete-all')"))
+        db.commit()
+        max_id = db.execute(text(f"SELECT coalesce(max(id), 0) FROM {table}")).scalar()
+        for low in range(0, max_id, batch_size):
+            db.execute(text(_SQLITE_REFILL[table]), {"low": low, "high": low + batch_size})
+            db.commit()
+
+
+def _fts5_query(terms: List[str], columns: str, owner_id: int) -> str:
+    # Every term is a quoted prefix query, ANDed together and with the owner token
+    matches = " AND ".join(f'"{term}"*' for term in terms)
+    return f'owner : "o{owner_id}" AND {{{columns}}} : ({matches})'
+
+
+def _tsquery(terms: List[str]) -> str:
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def search_tasks(db: Session, owner_id: int, terms: List[str], limit: int) -> List[Task]:
+    """
+    The owner's tasks matching every term (as a prefix), best match first.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        fts = literal_column("tasks_fts")
+        stmt = (
+            select(Task)
+            .join(_tasks_fts, _tasks_fts.c.rowid == Task.id)
+            .where(fts.op("MATCH")(_fts5_query(terms, "title description", owner_id)))
+            # bm25 is lower-is-better; title hits weigh more than description hits
+            .order_by(func.bm25(fts, 0.0, 4.0, 1.0), Task.id.desc())
+        )
+    elif dialect == "postgresql":
+        vector = _task_vector()
+        query = func.to_tsquery(literal_column("'simple'"), _tsquery(terms))
+        stmt = (
+            select(Task)
+            .where(Task.owner_id == owner_id, vector.op("@@")(query))
+            .order_by(func.ts_rank(vector, query).desc(), Task.id.desc())
+        )
+    else:
+        stmt = (
+            select(Task)
+            .where(Task.owner_id == owner_id)
+            .where(*[or_(Task.title.ilike(f"%{t}%"), Task.description.ilike(f"%{t}%")) for t in terms])
+            .order_by(Task.created_at.desc(), Task.id.desc())
+        )
+    return db.execute(stmt.limit(limit)).scalars().all()
+
+
+def search_transactions(db: Session, owner_id: int, terms: List[str], limit: int) -> List[Transaction]:
+    """
+    The owner's transactions whose description matches every term, best match first.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        fts = literal_column("transactions_fts")
+        stmt = (
+            select(Transaction)
+            .join(_transactions_fts, _transactions_fts.c.rowid == Transaction.id)
+            .where(fts.op("MATCH")(_fts5_query(terms, "description", owner_id)))
+            .order_by(func.bm25(fts), Transaction.id.desc())
+        )
+    elif dialect == "postgresql":
+        vector = _transaction_vector()
+        query = func.to_tsquery(literal_column("'simple'"), _tsquery(terms))
+        stmt = (
+            select(Transaction)
+            .where(Transaction.owner_id == owner_id, vector.op("@@")(query))
+            .order_by(func.ts_rank(vector, query).desc(), Transaction.id.desc())
+        )
+    else:
+        stmt = (
+            select(Transaction)
+            .where(Transaction.owner_id == owner_id)
+            .where(*[Transaction.description.ilike(f"%{t}%") for t in terms])
+            .order_by(Transaction.created_at.desc(), Transaction.id.desc())
+        )
+    return db.execute(stmt.limit(limit)).scalars().all()
@@ -1,24 +1,89 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from jose import JWTError, jwt
+import asyncio
 import bcrypt
+import hashlib
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import time
+from app.utils.cache import TTLCache
 
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback_secret_key_for_demo_only_12345")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+# Verified JWT payloads keyed by token hash, so repeat requests skip the HMAC check.
+# Entries never outlive the token's own `exp`.
+_token_cache = TTLCache(
+    max_entries=int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000)),
+    ttl=float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60)),
+)
+
+# bcrypt cost factor; each +1 doubles the work per hash. Existing hashes keep
+# verifying at whatever cost they were created with.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# "process" spreads bcrypt across cores; "thread" is for platforms that can't run
+# worker processes (Vercel/Lambda has no /dev/shm for multiprocessing locks)
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread" if os.getenv("VERCEL") == "1" else "process")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+# Hash/verify calls allowed to be running or queued before new ones fail fast
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 4))
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the bcrypt queue is full; callers should answer 503.
+    """
+    retry_after = 1
+
+_executor: Optional[Executor] = None
+_pending = 0
+
 def hash_password(password: str):
     # Direct bcrypt usage instead of passlib to avoid compatibility issues with Python 3.14
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str):
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if PASSWORD_HASH_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+        else:
+            _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    return _executor
+
+def shutdown_password_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _run_bcrypt(func, *args):
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    """
+    hash_password on the bcrypt worker pool. Raises PasswordHasherBusy when saturated.
+    """
+    return await _run_bcrypt(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    verify_password on the bcrypt worker pool. Raises PasswordHasherBusy when saturated.
+    """
+    return await _run_bcrypt(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -29,3 +94,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify and decode a JWT. Raises JWTError if it is invalid or expired.
+    """
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    exp = payload.get("exp")
+    if exp is not None:
+        _token_cache.set(key, payload, ttl=exp - time.time())
+    return payload
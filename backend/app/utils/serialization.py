@@ -0,0 +1,95 @@
+import json
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Sequence
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder below produces the same JSON, only slower
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        # Pydantic's format: isoformat(), with UTC spelled "Z"
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson when it is installed. Takes plain dicts
+    and lists with datetimes in them, e.g. from RowSerializer, and renders
+    them byte-for-byte the way FastAPI's response_model path would.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Wrap already-serialized content. Returning a Response skips FastAPI's
+    response_model handling (the route keeps it for the OpenAPI schema), and
+    with it the merging of headers set on the injected `response`, so those
+    are copied here.
+    """
+    rendered = FastJSONResponse(content)
+    if response is not None:
+        rendered.raw_headers.extend(response.headers.raw)
+        if response.status_code:
+            rendered.status_code = response.status_code
+    return rendered
+
+
+class RowSerializer:
+    """
+    Builds a response schema's payload straight from selected column rows,
+    without constructing and validating a model per row. Rows are trusted to
+    hold what the schema declares, so only the coercions Pydantic would make
+    to DB values are applied (int -> float).
+
+    Every schema field must be selected, or named in `computed` and filled in
+    by the caller afterwards (starting from the field's default); this is
+    checked up front, so a field added to the schema fails at import instead
+    of silently missing from responses. Extra columns (e.g. for cursors) are
+    ignored.
+    """
+
+    def __init__(self, schema: type[BaseModel], columns: Sequence, computed: Iterable[str] = ()):
+        self.schema = schema
+        self.columns = list(columns)
+        keys = [column.key for column in self.columns]
+        computed = set(computed)
+        missing = [name for name in schema.model_fields if name not in keys and name not in computed]
+        if missing:
+            raise TypeError(f"{schema.__name__} fields neither selected nor computed: {', '.join(missing)}")
+        self._fields = [
+            (name, keys.index(name), field.annotation in (float, Optional[float]))
+            for name, field in schema.model_fields.items() if name not in computed
+        ]
+        # Keys in schema order, as Pydantic emits them; computed fields start at their defaults
+        self._template = {
+            name: field.get_default(call_default_factory=True) if name in computed else None
+            for name, field in schema.model_fields.items()
+        }
+
+    def dump(self, row) -> dict:
+        payload = self._template.copy()
+        for name, index, is_float in self._fields:
+            value = row[index]
+            payload[name] = float(value) if is_float and value is not None else value
+        return payload
+
+    def dump_all(self, rows: Iterable) -> List[dict]:
+        return [self.dump(row) for row in rows]
@@ -0,0 +1,49 @@
+import importlib
+import os
+from typing import Dict, Set
+
+from fastapi import FastAPI
+
+# Fast-startup mode (default on Vercel, where every cold start pays for it):
+# routers are imported by the first request under their prefix instead of at
+# import time, and the schema is left to `python -m app.commands.migrate`.
+FAST_STARTUP = os.getenv("FAST_STARTUP", "1" if os.getenv("VERCEL") == "1" else "0") == "1"
+
+
+def include_router_module(app: FastAPI, module: str):
+    app.include_router(importlib.import_module(module).router)
+
+
+class LazyRouters:
+    """
+    Pure ASGI middleware that includes a router module the first time a request
+    under its prefix arrives. Unmatched paths import nothing; /docs and
+    /openapi.json load every router, since the schema covers them all.
+    """
+
+    def __init__(self, app, fastapi_app: FastAPI, routers: Dict[str, str]):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self.pending = dict(routers)
+        self.schema_paths: Set[str] = {
+            path for path in (fastapi_app.openapi_url, fastapi_app.docs_url, fastapi_app.redoc_url) if path
+        }
+
+    def _load(self, prefix: str):
+        module = self.pending.pop(prefix, None)
+        if module is not None:
+            include_router_module(self.fastapi_app, module)
+
+    async def __call__(self, scope, receive, send):
+        if self.pending and scope["type"] in ("http", "websocket"):
+            path, root_path = scope["path"], scope.get("root_path", "")
+            if root_path and path.startswith(root_path):
+                path = path[len(root_path):]
+            if path in self.schema_paths:
+                for prefix in list(self.pending):
+                    self._load(prefix)
+            else:
+                for prefix in list(self.pending):
+                    if path == prefix or path.startswith(prefix + "/"):
+                        self._load(prefix)
+        await self.app(scope, receive, send)
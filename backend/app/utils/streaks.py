@@ -0,0 +1,211 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.streak import DailyActivity, UserStreak
+from app.models.task import Task
+
+ONE_DAY = timedelta(days=1)
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def utc_day(value: datetime) -> date:
+    # SQLite hands back naive datetimes, already in UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def completion_day(task) -> date:
+    """
+    The day a completed task counts for. Tasks completed before completed_at
+    was tracked count for their last change, as in the backfill.
+    """
+    return utc_day(task.completed_at or task.updated_at or task.created_at)
+
+
+def current_streak(state: Optional[UserStreak], today: Optional[date] = None) -> int:
+    """
+    The streak as of `today`: the run ending at the last active day, unless
+    a whole day has passed since without a completion.
+    """
+    if state is None or state.last_day is None:
+        return 0
+    today = today or utc_now().date()
+    return state.current if state.last_day >= today - ONE_DAY else 0
+
+
+def _as_date(value) -> date:
+    # func.date() comes back as text on SQLite
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _runs(days: Iterable[date]) -> Tuple[int, int, Optional[date]]:
+    """
+    (run ending at the last day, longest run, last day) over sorted active days.
+    """
+    current = longest = 0
+    last_day = None
+    for day in days:
+        current = current + 1 if last_day is not None and day == last_day + ONE_DAY else 1
+        longest = max(longest, current)
+        last_day = day
+    return current, longest, last_day
+
+
+def _insert_new(db: Session, model):
+    """
+    INSERT that skips rows whose key already exists, where the dialect supports it:
+    a concurrent request may have built the same owner's streak and committed first.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+def _add_completed(db: Session, owner_id: int, day: date, delta: int) -> int:
+    """
+    Atomically add `delta` to the owner's count for `day`; returns the new count.
+    """
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(DailyActivity).values(owner_id=owner_id, day=day, completed=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["owner_id", "day"],
+            set_={"completed": DailyActivity.completed + delta},
+        )
+        return db.scalar(stmt.returning(DailyActivity.completed))
+
+    changed = db.execute(
+        update(DailyActivity)
+        .where(DailyActivity.owner_id == owner_id, DailyActivity.day == day)
+        .values(completed=DailyActivity.completed + delta)
+    )
+    if changed.rowcount == 0:
+        db.add(DailyActivity(owner_id=owner_id, day=day, completed=delta))
+        db.flush()
+    return db.scalar(
+        select(DailyActivity.completed).where(DailyActivity.owner_id == owner_id, DailyActivity.day == day)
+    )
+
+
+def _rescan(db: Session, state: UserStreak):
+    state.current, state.longest, state.last_day = _runs(db.scalars(
+        select(DailyActivity.day)
+        .where(DailyActivity.owner_id == state.owner_id, DailyActivity.completed > 0)
+        .order_by(DailyActivity.day)
+    ))
+
+
+def record_completions(db: Session, owner_id: int, days: Iterable[date], sign: int = 1):
+    """
+    Count tasks completed (sign=1) or reopened (sign=-1), one day per task,
+    into the owner's daily activity and streak inside the caller's DB
+    transaction. Call ensure_streak() before the task write.
+
+    A completion on the last active day or after it, which is every live
+    completion, updates the streak in O(1), as does reopening the last
+    active day of a run that is not the longest. Changes that can split or
+    shorten a run in the past re-derive it from the owner's active days.
+    """
+    per_day = Counter(days)
+    if not per_day:
+        return
+    state = db.get(UserStreak, owner_id, with_for_update=True)
+    rescan = False
+    for day, tasks in sorted(per_day.items()):
+        count = _add_completed(db, owner_id, day, sign * tasks)
+        if sign > 0 and count == tasks:
+            # The day just became active
+            if state.last_day is None or day > state.last_day:
+                state.current = state.current + 1 if state.last_day == day - ONE_DAY else 1
+                state.longest = max(state.longest, state.current)
+                state.last_day = day
+            else:
+                rescan = True
+        elif sign < 0 and count <= 0:
+            # The day is no longer active
+            if day == state.last_day and state.current < state.longest:
+                # Still "the run ending at last_day": with current at 0 that day is inactive too
+                state.current -= 1
+                state.last_day = day - ONE_DAY
+            else:
+                rescan = True
+    if rescan:
+        _rescan(db, state)
+
+
+def rebuild_owners(db: Session, owner_ids: List[int]):
+    """
+    Replace the daily activity and streaks of `owner_ids` with values
+    recomputed from their completed tasks. Does not commit.
+
+    Deleting a task does not take back its completion, so a rebuild only
+    recovers days whose completed tasks still exist. Rows another transaction
+    inserted concurrently (two first writes building the same owner's
+    streak) are kept rather than failing.
+    """
+    day = func.date(func.coalesce(Task.completed_at, Task.updated_at, Task.created_at))
+    rows = db.execute(
+        select(Task.owner_id, day, func.count(Task.id))
+        .where(Task.owner_id.in_(owner_ids), Task.is_completed.is_(True))
+        .group_by(Task.owner_id, day)
+    ).all()
+    activity = sorted((owner_id, _as_date(value), count) for owner_id, value, count in rows)
+
+    db.execute(delete(DailyActivity).where(DailyActivity.owner_id.in_(owner_ids)))
+    db.execute(delete(UserStreak).where(UserStreak.owner_id.in_(owner_ids)))
+
+    if activity:
+        db.execute(_insert_new(db, DailyActivity), [
+            {"owner_id": owner_id, "day": day, "completed": count} for owner_id, day, count in activity
+        ])
+    days = defaultdict(list)
+    for owner_id, day, _ in activity:
+        days[owner_id].append(day)
+    streaks = []
+    for owner_id in owner_ids:
+        current, longest, last_day = _runs(days[owner_id])
+        streaks.append({"owner_id": owner_id, "current": current, "longest": longest, "last_day": last_day})
+    db.execute(_insert_new(db, UserStreak), streaks)
+
+
+def ensure_streak(db: Session, owner_id: int) -> UserStreak:
+    """
+    Return the owner's streak, building it and the daily activity from their
+    tasks first if the owner predates streaks. Must run before the caller's
+    pending task write is flushed, otherwise that write would be counted twice.
+    """
+    state = db.get(UserStreak, owner_id)
+    if state is None:
+        rebuild_owners(db, [owner_id])
+        state = db.get(UserStreak, owner_id)
+    return state
+
+
+def activity_days(db: Session, owner_id: int, start: date) -> List[Tuple[date, int]]:
+    """
+    (day, tasks completed) for the owner's active days from `start` on, oldest first.
+    """
+    return [
+        (day, completed) for day, completed in db.execute(
+            select(DailyActivity.day, DailyActivity.completed)
+            .where(DailyActivity.owner_id == owner_id, DailyActivity.day >= start, DailyActivity.completed > 0)
+            .order_by(DailyActivity.day)
+        )
+    ]
@@ -0,0 +1,230 @@
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.subtask import Subtask
+from app.models.task import Task
+
+# Gap between neighbouring positions. A step can be inserted or moved between two
+# others this many times (halving the gap) before the task has to be renumbered.
+POSITION_GAP = 1024
+
+
+def parse_steps(raw: Optional[str]) -> List[str]:
+    """
+    Step titles from the legacy JSON string format (a JSON list of strings).
+    Raises ValueError if `raw` is not in that format.
+    """
+    if raw is None or raw == "":
+        return []
+    steps = json.loads(raw)
+    if not isinstance(steps, list) or not all(isinstance(step, str) for step in steps):
+        raise ValueError("subtasks must be a JSON list of strings")
+    return steps
+
+
+def step_rows(task_id: int, steps: List[str]) -> List[dict]:
+    return [
+        {"task_id": task_id, "position": POSITION_GAP * (i + 1), "title": step, "is_done": False}
+        for i, step in enumerate(steps)
+    ]
+
+
+def replace_subtasks(db: Session, task_id: int, steps: List[str]):
+    """
+    Replace all of a task's steps (AI decomposition, or a whole-list PATCH from
+    older clients). Does not commit.
+    """
+    db.execute(delete(Subtask).where(Subtask.task_id == task_id))
+    if steps:
+        db.execute(insert(Subtask), step_rows(task_id, steps))
+    db.execute(
+        update(Task)
+        .where(Task.id == task_id, Task.legacy_subtasks.isnot(None))
+        .values(legacy_subtasks=None)
+    )
+
+
+def ensure_normalized(db: Session, task: Task):
+    """
+    Move a task's legacy JSON steps into the subtasks table if the batch
+    migration has not reached it yet, so step ids exist before any per-step
+    write. Unparseable legacy values are left alone. Does not commit.
+    """
+    if task.legacy_subtasks is None:
+        return
+    try:
+        steps = parse_steps(task.legacy_subtasks)
+    except ValueError:
+        return
+    has_rows = db.scalar(select(Subtask.id).where(Subtask.task_id == task.id).limit(1))
+    if has_rows is None:
+        db.execute(insert(Subtask), step_rows(task.id, steps))
+    task.legacy_subtasks = None
+
+
+def subtask_progress(db: Session, task_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+    """
+    (done, total) per task, from one GROUP BY over the subtasks index.
+    Tasks without steps are absent.
+    """
+    if not task_ids:
+        return {}
+    rows = db.execute(
+        select(
+            Subtask.task_id,
+            func.coalesce(func.sum(case((Subtask.is_done, 1), else_=0)), 0),
+            func.count(),
+        )
+        .where(Subtask.task_id.in_(task_ids))
+        .group_by(Subtask.task_id)
+    ).all()
+    return {task_id: (done, total) for task_id, done, total in rows}
+
+
+def subtask_views(db: Session, tasks: Iterable[Tuple[int, Optional[str]]]) -> Dict[int, Tuple[str, int, int]]:
+    """
+    The read-only `subtasks` (JSON list of step titles, as before
+    normalization), `subtasks_done` and `subtasks_total` of tasks given as
+    (id, legacy_subtasks), with one progress aggregate and one ordered title
+    scan for the whole batch. Tasks without steps are left out.
+    """
+    tasks = list(tasks)
+    progress = subtask_progress(db, [task_id for task_id, _ in tasks])
+    titles: Dict[int, List[str]] = {}
+    if progress:
+        rows = db.execute(
+            select(Subtask.task_id, Subtask.title)
+            .where(Subtask.task_id.in_(list(progress)))
+            .order_by(Subtask.task_id, Subtask.position)
+        ).all()
+        for task_id, title in rows:
+            titles.setdefault(task_id, []).append(title)
+
+    views = {}
+    for task_id, legacy_subtasks in tasks:
+        if task_id in progress:
+            done, total = progress[task_id]
+            views[task_id] = (json.dumps(titles[task_id]), done, total)
+        elif legacy_subtasks is not None:
+            # Not migrated yet: serve the stored JSON as-is
+            try:
+                total = len(parse_steps(legacy_subtasks))
+            except ValueError:
+                total = 0
+            views[task_id] = (legacy_subtasks, 0, total)
+    return views
+
+
+def attach_subtasks(db: Session, tasks: Iterable[Task]) -> List[Task]:
+    """
+    Fill in `subtasks`, `subtasks_done` and `subtasks_total` of each task; see subtask_views.
+    """
+    tasks = list(tasks)
+    views = subtask_views(db, [(task.id, task.legacy_subtasks) for task in tasks])
+    for task in tasks:
+        if task.id in views:
+            task.subtasks, task.subtasks_done, task.subtasks_total = views[task.id]
+    return tasks
+
+
+def _renumber(db: Session, task_id: int):
+    ids = db.scalars(
+        select(Subtask.id).where(Subtask.task_id == task_id).order_by(Subtask.position, Subtask.id)
+    ).all()
+    db.execute(update(Subtask), [
+        {"id": subtask_id, "position": POSITION_GAP * (i + 1)} for i, subtask_id in enumerate(ids)
+    ])
+
+
+def _position_at(db: Session, task_id: int, index: Optional[int], moving_id: Optional[int]) -> Optional[int]:
+    stmt = select(Subtask.position).where(Subtask.task_id == task_id)
+    if moving_id is not None:
+        stmt = stmt.where(Subtask.id != moving_id)
+
+    if index is None:
+        last = db.scalar(stmt.order_by(Subtask.position.desc()).limit(1))
+        return (last or 0) + POSITION_GAP
+
+    ordered = stmt.order_by(Subtask.position)
+    if index == 0:
+        before, after = None, db.scalar(ordered.limit(1))
+    else:
+        neighbours = db.scalars(ordered.offset(index - 1).limit(2)).all()
+        if not neighbours:
+            # Past the end: append
+            return _position_at(db, task_id, None, moving_id)
+        before, after = neighbours[0], (neighbours[1] if len(neighbours) > 1 else None)
+
+    if before is None:
+        return (after if after is not None else POSITION_GAP) - POSITION_GAP
+    if after is None:
+        return before + POSITION_GAP
+    if after - before > 1:
+        return (before + after) // 2
+    return None
+
+
+def slot_position(db: Session, task_id: int, index: Optional[int], moving_id: Optional[int] = None) -> int:
+    """
+    Position for a step placed at `index` (0-based) among the task's other
+    steps, or at the end when `index` is None. Normally no other row changes;
+    only when two neighbours have run out of room is the task renumbered.
+    """
+    position = _position_at(db, task_id, index, moving_id)
+    if position is None:
+        _renumber(db, task_id)
+        position = _position_at(db, task_id, index, moving_id)
+    return position
+
+
+def migrate_legacy_subtasks(db: Session, batch_size: int = 500) -> Tuple[int, int]:
+    """
+    Move every task's legacy JSON steps into the subtasks table, walking tasks
+    by id and committing once per batch, so it can run against a live database
+    and be resumed. Returns (migrated, skipped); skipped tasks hold values that
+    are not a JSON list of strings and keep being served as they are.
+    """
+    migrated = skipped = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Task.id, Task.legacy_subtasks)
+            .where(Task.id > last_id, Task.legacy_subtasks.isnot(None))
+            .order_by(Task.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return migrated, skipped
+        last_id = rows[-1][0]
+
+        # Tasks already written through the new endpoints keep their rows
+        normalized = set(db.scalars(
+            select(Subtask.task_id).where(Subtask.task_id.in_([task_id for task_id, _ in rows])).distinct()
+        ))
+        new_rows: List[dict] = []
+        cleared: List[int] = []
+        for task_id, raw in rows:
+            try:
+                steps = parse_steps(raw)
+            except ValueError:
+                skipped += 1
+                continue
+            if task_id not in normalized:
+                new_rows.extend(step_rows(task_id, steps))
+            cleared.append(task_id)
+
+        if new_rows:
+            db.execute(insert(Subtask), new_rows)
+        if cleared:
+            db.execute(
+                update(Task)
+                .where(Task.id.in_(cleared))
+                # Keep updated_at: the task itself did not change
+                .values(legacy_subtasks=None, updated_at=Task.updated_at),
+                execution_options={"synchronize_session": False},
+            )
+        db.commit()
+        migrated += len(cleared)
@@ -0,0 +1,212 @@
+import base64
+import hashlib
+import json
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.sync import CollectionVersion, Tombstone
+from app.utils.events import queue_event
+
+TASKS = "tasks"
+TRANSACTIONS = "transactions"
+
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 5000
+
+
+def current_version(db: Session, owner_id: int, collection: str) -> int:
+    """
+    The last committed version of the owner's collection; 0 before the first write.
+    """
+    version = db.scalar(
+        select(CollectionVersion.version)
+        .where(CollectionVersion.owner_id == owner_id, CollectionVersion.collection == collection)
+    )
+    return version or 0
+
+
+def bump_version(db: Session, owner_id: int, collection: str) -> int:
+    """
+    Increment the collection's version and return the new value; stamp it on
+    the rows this write changes. Does not commit.
+
+    The increment locks the version row until the caller commits, so writes to
+    one collection get versions in commit order and a client that has synced up
+    to version N has seen every change numbered N or lower.
+    """
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(CollectionVersion).values(owner_id=owner_id, collection=collection, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["owner_id", "collection"],
+            set_={"version": CollectionVersion.version + 1},
+        )
+        return db.scalar(stmt.returning(CollectionVersion.version))
+
+    bumped = db.execute(
+        update(CollectionVersion)
+        .where(CollectionVersion.owner_id == owner_id, CollectionVersion.collection == collection)
+        .values(version=CollectionVersion.version + 1)
+    )
+    if bumped.rowcount == 0:
+        db.add(CollectionVersion(owner_id=owner_id, collection=collection, version=1))
+        db.flush()
+    return current_version(db, owner_id, collection)
+
+
+def stamp_rows(
+    db: Session, model, owner_id: int, collection: str, row_ids: Iterable[int], action: str = "updated",
+) -> int:
+    """
+    Bump the collection and stamp the new version on rows already written in
+    this transaction (e.g. by a bulk UPDATE), and queue an `action` event for
+    them. Returns the version. Does not commit.
+    """
+    version = bump_version(db, owner_id, collection)
+    row_ids = list(row_ids)
+    queue_event(db, owner_id, collection, action, version, row_ids)
+    if row_ids:
+        db.execute(
+            update(model)
+            .where(model.id.in_(row_ids), model.owner_id == owner_id)
+            .values(row_version=version)
+            .execution_options(synchronize_session=False)
+        )
+    return version
+
+
+def record_deletes(db: Session, owner_id: int, collection: str, row_ids: Iterable[int], version: int):
+    """
+    Leave a tombstone per deleted row for incremental sync and queue a
+    "deleted" event. Does not commit.
+    """
+    row_ids = list(row_ids)
+    if not row_ids:
+        return
+    queue_event(db, owner_id, collection, "deleted", version, row_ids)
+    # One executemany rather than an ORM flush with RETURNING per tombstone
+    db.execute(insert(Tombstone), [
+        {"owner_id": owner_id, "collection": collection, "row_id": row_id, "version": version}
+        for row_id in row_ids
+    ])
+
+
+def collection_etag(request: Request, owner_id: int, collection: str, version: int, variant: str = "") -> str:
+    """
+    Strong ETag for one representation: the owner's collection version plus
+    the query string, since filters and pages are different representations,
+    plus `variant` for any other input the body depends on.
+    """
+    representation = f"{request.query_params}|{variant}" if variant else str(request.query_params)
+    query = hashlib.sha256(representation.encode("utf-8")).hexdigest()[:12]
+    return f'"{collection}.{owner_id}.{version}.{query}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    A 304 response if the request's If-None-Match already names `etag`, else None.
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    # If-None-Match uses weak comparison, so a W/ prefix added by a proxy still matches
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
+
+
+def cache_headers(etag: str) -> dict:
+    # Per-user data: shared caches must not keep it, browsers must revalidate every time
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+async def conditional(
+    request: Request, response: Response, db, owner_id: int, collection: str, variant: str = "",
+) -> Optional[Response]:
+    """
+    Look up the collection version (one primary-key read) before anything else
+    in a GET handler. Returns a 304 to send as-is when the client is current;
+    otherwise sets the ETag on `response` and returns None. `variant` goes
+    into the ETag as well (see collection_etag).
+
+    The version is read before the rows, so a write landing in between can only
+    make the body newer than its ETag, and the next poll fetches it again.
+    """
+    version = await db.run_sync(current_version, owner_id, collection)
+    etag = collection_etag(request, owner_id, collection, version, variant)
+    cached = not_modified(request, etag)
+    if cached is None:
+        response.headers.update(cache_headers(etag))
+    return cached
+
+
+def encode_position(since: int, row_version: int, row_id: int) -> str:
+    raw = json.dumps([since, row_version, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_position(cursor: str) -> Tuple[int, int, int]:
+    """
+    Reverse of encode_position. Raises ValueError on anything malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        since, row_version, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return int(since), int(row_version), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def changes(
+    db: Session, model, owner_id: int, collection: str, since: int, limit: int, after: Optional[str] = None,
+    columns: Optional[list] = None,
+) -> Tuple[int, list, List[int], Optional[str]]:
+    """
+    One page of the rows of `model` changed after version `since`, in
+    (row_version, id) order. Returns (version, rows, deleted ids, next cursor).
+    Rows are instances, or Row tuples of `columns` (which must include
+    row_version and id) when given.
+
+    Deleted ids come with the last page (next cursor None), whose `version` is
+    the one to pass as `since` next time. since=0 is a full sync and includes
+    rows that predate versioning.
+    """
+    if after:
+        since, last_version, last_id = decode_position(after)
+    version = current_version(db, owner_id, collection)
+
+    # Rows that predate versioning (NULL) only show up in a full sync, as version 0
+    row_version = model.row_version if since > 0 else func.coalesce(model.row_version, 0)
+    stmt = select(*columns) if columns else select(model)
+    stmt = stmt.where(model.owner_id == owner_id)
+    if since > 0:
+        stmt = stmt.where(model.row_version > since)
+    if after:
+        stmt = stmt.where(or_(row_version > last_version, and_(row_version == last_version, model.id > last_id)))
+    result = db.execute(stmt.order_by(row_version, model.id).limit(limit + 1))
+    rows = (result if columns else result.scalars()).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return version, rows, [], encode_position(since, last.row_version or 0, last.id)
+
+    deleted = db.scalars(
+        select(Tombstone.row_id)
+        .where(
+            Tombstone.owner_id == owner_id,
+            Tombstone.collection == collection,
+            Tombstone.version > since,
+            Tombstone.version <= version,
+        )
+        .order_by(Tombstone.version, Tombstone.id)
+    ).all()
+    return version, rows, list(deleted), None
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark: compiled KeywordMatcher vs. the old per-keyword substring scans.
+
+    cd backend
+    python -m benchmarks.ai_keywords --iterations 20000 --synthetic-keywords 5000
+
+Reports microseconds per call for each ai_service function, how often the old
+and new versions agree on the sample corpus, and how both approaches scale when
+a table grows to thousands of keywords. Prints JSON.
+"""
+import argparse
+import json
+import random
+import string
+import timeit
+
+from app.utils import ai_service
+from benchmarks import legacy_ai_service
+
+TASK_TITLES = [
+    "Fix the login bug before the deadline",
+    "Maybe read a book someday",
+    "Prepare the quarterly budget review",
+    "Go to the gym after work",
+    "Write unit tests for the new code",
+    "Bugun hisobotni topshirish shart",
+    "Plan the team meeting agenda for next week",
+    "Call mom",
+    "Learn Rust with an online course",
+    "Buy groceries for the weekend",
+]
+
+DESCRIPTIONS = [
+    "Lunch with the team at the cafe",
+    "Uber to the airport",
+    "Monthly salary",
+    "Netflix subscription",
+    "Electricity bill",
+    "Birthday gift from amazon",
+    "Pharmacy - cold medicine",
+    "Budget planning workshop fee",
+    "Transfer to savings",
+    "Parking downtown",
+]
+
+
+def per_call_us(fn, args_list, iterations):
+    calls = [(fn, args) for args in args_list]
+
+    def run():
+        for f, args in calls:
+            f(*args)
+
+    rounds = max(1, iterations // len(calls))
+    return round(timeit.timeit(run, number=rounds) / (rounds * len(calls)) * 1e6, 3)
+
+
+def synthetic_scaling(keyword_count, iterations):
+    rng = random.Random(42)
+    keywords = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(keyword_count)]
+    matcher = ai_service.KeywordMatcher({"label": keywords})
+    text = "finish the quarterly report and send it to the whole team before friday".lower()
+
+    def legacy():
+        return any(k in text for k in keywords)
+
+    def compiled():
+        return bool(matcher.matched_labels(text))
+
+    number = max(1, iterations // 10)
+    return {
+        "keywords": keyword_count,
+        "legacy_us": round(timeit.timeit(legacy, number=number) / number * 1e6, 3),
+        "compiled_us": round(timeit.timeit(compiled, number=number) / number * 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--synthetic-keywords", type=int, default=5000)
+    args = parser.parse_args()
+
+    cases = {
+        "analyze_task_priority": [(t, "") for t in TASK_TITLES],
+        "decompose_task": [(t,) for t in TASK_TITLES],
+        "categorize_transaction": [(d,) for d in DESCRIPTIONS],
+    }
+
+    results = {}
+    for name, args_list in cases.items():
+        legacy_fn = getattr(legacy_ai_service, name)
+        new_fn = getattr(ai_service, name)
+        agree = sum(legacy_fn(*a) == new_fn(*a) for a in args_list)
+        results[name] = {
+            "legacy_us": per_call_us(legacy_fn, args_list, args.iterations),
+            "compiled_us": per_call_us(new_fn, args_list, args.iterations),
+            "agreement": f"{agree}/{len(args_list)}",
+        }
+
+    results["scaling"] = synthetic_scaling(args.synthetic_keywords, args.iterations)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
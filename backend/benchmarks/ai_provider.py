@@ -0,0 +1,95 @@
+"""
+Benchmark the inference layer in front of a slow AI provider: cache hits,
+coalescing of identical concurrent requests, and the timeout fallback.
+
+    cd backend
+    python -m benchmarks.ai_provider --latency 0.05 --concurrency 200 --distinct 20
+
+A stand-in provider sleeps `--latency` seconds per inference, like a local model
+would. Prints JSON: latency percentiles per phase, how many inferences actually
+ran, and the provider metrics from ai_service.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+from app.utils import ai_service
+from app.utils.cache import TTLCache
+from benchmarks.common import ms, percentile
+
+
+class SlowProvider(ai_service.AIProvider):
+    name = "bench-slow"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def priority(self, title, description):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return "High"
+
+
+async def phase(titles) -> dict:
+    async def one(title):
+        started = time.perf_counter()
+        result = await ai_service.analyze_task_priority_async(title, "")
+        return time.perf_counter() - started, result
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(one(t) for t in titles))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, _ in outcomes]
+    return {
+        "requests": len(titles),
+        "wall_ms": ms(elapsed),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "fallback_answers": sum(1 for _, result in outcomes if result != "High"),
+    }
+
+
+async def run(args) -> dict:
+    provider = SlowProvider(args.latency)
+    ai_service.set_provider(provider, cache=TTLCache(max_entries=10000, ttl=3600))
+    titles = [f"Task number {i % args.distinct}" for i in range(args.concurrency)]
+    results = {}
+
+    # Cold: every distinct title is inferred once, duplicates wait on that inference
+    results["cold_coalesced"] = await phase(titles)
+    results["cold_coalesced"]["inferences"] = provider.calls
+
+    # Warm: all served from the cache
+    before = provider.calls
+    results["warm_cached"] = await phase(titles)
+    results["warm_cached"]["inferences"] = provider.calls - before
+
+    # Timeout: provider slower than the budget, so callers get the heuristics
+    provider.latency = ai_service.AI_TIMEOUT_SECONDS * 2
+    results["timeout_fallback"] = await phase([f"Slow task {i}" for i in range(min(args.concurrency, ai_service.AI_PROVIDER_WORKERS))])
+
+    results["metrics"] = ai_service.ai_metrics()
+    ai_service.shutdown_ai_executor()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per simulated inference")
+    parser.add_argument("--concurrency", type=int, default=200, help="Concurrent requests per phase")
+    parser.add_argument("--distinct", type=int, default=20, help="Distinct inputs among the requests")
+    parser.add_argument("--timeout", type=float, default=0.5, help="AI_TIMEOUT_SECONDS for the run")
+    args = parser.parse_args()
+
+    ai_service.AI_TIMEOUT_SECONDS = args.timeout
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
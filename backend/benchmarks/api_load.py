@@ -0,0 +1,251 @@
+"""
+End-to-end API load test: seeded data, fixed-duration scenarios, JSON results.
+
+Drives the app in-process over ASGI and/or through a real uvicorn server:
+
+    cd backend
+    python -m benchmarks.api_load --transports asgi,uvicorn --users 20 --concurrency 32 --duration 10
+    python -m benchmarks.api_load --scenarios list_tasks,summary --database-url postgresql://...
+    DB_ASYNC=1 python -m benchmarks.api_load --output before.json
+
+Scenarios (each runs --duration seconds with --concurrency workers, users
+picked at random per request):
+  signup_login  sign a new user up, then log in (bcrypt-bound)
+  list_tasks    GET /tasks/?limit=50
+  create_task   POST /tasks/
+  summary       GET /transactions/summary
+  decompose     POST /tasks/{id}/decompose, then poll the job until it finishes;
+                latency is end to end, accept_* fields cover the 202 alone
+
+Prints (and with --output writes) one JSON document. Requires httpx, plus
+uvicorn for the uvicorn transport.
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.common import ms, percentile, use_database
+
+SCENARIOS = ["signup_login", "list_tasks", "create_task", "summary", "decompose"]
+
+
+def _summarize(latencies, statuses, elapsed, extra=None) -> dict:
+    result = {
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "status_counts": dict(statuses),
+    }
+    result.update(extra or {})
+    return result
+
+
+class Scenario:
+    def __init__(self, client, tokens, task_ids, rng):
+        self.client = client
+        self.tokens = tokens
+        self.task_ids = task_ids
+        self.rng = rng
+        self.signups = itertools.count()
+        self.accept_latencies = []
+
+    def _headers(self):
+        index = self.rng.randrange(len(self.tokens))
+        return index, {"Authorization": f"Bearer {self.tokens[index]}"}
+
+    async def signup_login(self) -> int:
+        email = f"load{os.getpid()}-{next(self.signups)}-{time.time_ns()}@example.com"
+        response = await self.client.post("/auth/signup", json={"email": email, "password": "load-password"})
+        if response.status_code != 200:
+            return response.status_code
+        response = await self.client.post("/auth/login", data={"username": email, "password": "load-password"})
+        return response.status_code
+
+    async def list_tasks(self) -> int:
+        _, headers = self._headers()
+        return (await self.client.get("/tasks/?limit=50", headers=headers)).status_code
+
+    async def create_task(self) -> int:
+        _, headers = self._headers()
+        response = await self.client.post("/tasks/", json={"title": "Prepare the quarterly budget review"}, headers=headers)
+        return response.status_code
+
+    async def summary(self) -> int:
+        _, headers = self._headers()
+        return (await self.client.get("/transactions/summary", headers=headers)).status_code
+
+    async def decompose(self) -> int:
+        index, headers = self._headers()
+        task_id = self.rng.choice(self.task_ids[index])
+        started = time.perf_counter()
+        response = await self.client.post(f"/tasks/{task_id}/decompose", headers=headers)
+        self.accept_latencies.append(time.perf_counter() - started)
+        if response.status_code != 202:
+            return response.status_code
+        job = response.json()
+        while job["status"] in ("queued", "running"):
+            await asyncio.sleep(0.01)
+            job = (await self.client.get(f"/jobs/{job['id']}", headers=headers)).json()
+        return 200 if job["status"] == "succeeded" else 500
+
+
+async def run_scenarios(client, tokens, task_ids, args) -> dict:
+    results = {}
+    for name in args.scenarios:
+        scenario = Scenario(client, tokens, task_ids, random.Random(args.seed))
+        action = getattr(scenario, name)
+        latencies, statuses = [], Counter()
+        concurrency = min(args.concurrency, args.login_concurrency) if name == "signup_login" else args.concurrency
+        stop_at = time.perf_counter() + args.duration
+
+        async def worker():
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                try:
+                    status = await action()
+                except Exception as e:
+                    status = e.__class__.__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+        extra = {"concurrency": concurrency}
+        if scenario.accept_latencies:
+            extra["accept_p50_ms"] = ms(percentile(scenario.accept_latencies, 50))
+            extra["accept_p99_ms"] = ms(percentile(scenario.accept_latencies, 99))
+        results[name] = _summarize(latencies, statuses, elapsed, extra)
+    return results
+
+
+def prepare(args):
+    """
+    Seed the database and mint a token per benchmark user. Returns (tokens, task ids per user).
+    """
+    from sqlalchemy import select
+
+    from app.db.database import SessionLocal
+    from app.models.task import Task
+    from app.models.user import User
+    from app.utils.security import create_access_token
+    from benchmarks.seed import seed
+
+    emails = seed(args.users, args.tasks_per_user, args.transactions_per_user, args.seed)
+    db = SessionLocal()
+    try:
+        users = db.execute(select(User.id, User.email).where(User.email.in_(emails)).order_by(User.id)).all()
+        task_ids = []
+        for user_id, _ in users:
+            ids = db.scalars(select(Task.id).where(Task.owner_id == user_id).limit(50)).all()
+            task_ids.append(ids or [0])
+    finally:
+        db.close()
+    tokens = [create_access_token(data={"sub": email}) for _, email in users]
+    return tokens, task_ids
+
+
+async def run_asgi(args, tokens, task_ids) -> dict:
+    import httpx
+    from app.main import app
+
+    # httpx's ASGI transport doesn't send lifespan events; run them so job workers start
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            return await run_scenarios(client, tokens, task_ids, args)
+
+
+def _free_port() -> int:
+    with contextlib.closing(socket.socket()) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_uvicorn(args, tokens, task_ids) -> dict:
+    import httpx
+
+    port = _free_port()
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(args.uvicorn_workers), "--log-level", "warning"]
+    server = subprocess.Popen(command, env=dict(os.environ))
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+            for _ in range(300):
+                try:
+                    if (await client.get("/health/")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start")
+            return await run_scenarios(client, tokens, task_ids, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transports", default="asgi", help="Comma-separated: asgi, uvicorn")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks-per-user", type=int, default=200)
+    parser.add_argument("--transactions-per-user", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent request loops per scenario")
+    parser.add_argument("--login-concurrency", type=int, default=8, help="Cap for signup_login, which is bcrypt-bound")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--uvicorn-workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and request mix")
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file, never the .env database")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+    args.scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    url = use_database(args.database_url)
+    tokens, task_ids = prepare(args)
+
+    from app.db.database import DB_ASYNC
+
+    result = {
+        "config": {
+            "database": url.split("://", 1)[0],
+            "db_async": DB_ASYNC,
+            "users": args.users,
+            "tasks_per_user": args.tasks_per_user,
+            "transactions_per_user": args.transactions_per_user,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "python": sys.version.split()[0],
+        },
+    }
+    for transport in args.transports.split(","):
+        runner = {"asgi": run_asgi, "uvicorn": run_uvicorn}[transport]
+        result[transport] = asyncio.run(runner(args, tokens, task_ids))
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
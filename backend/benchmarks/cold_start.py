@@ -0,0 +1,122 @@
+"""
+Cold-start budget: time from importing the serverless entry point (api/index.py)
+to the first complete response, in fresh interpreters.
+
+    cd backend
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --modes fast --path /health/ --budget-ms 1200
+
+Each run is a new process, like a cold serverless instance. Modes:
+  fast   FAST_STARTUP=1, routers imported by the first request that needs them
+  eager  FAST_STARTUP=0, every router imported up front
+
+The budget: with FAST_STARTUP=1 the median import-to-first-response time for
+GET /health/ must stay under COLD_START_BUDGET_MS (1500 ms, measured on a
+single-vCPU instance like Vercel's smallest). The exit status is 1 when a fast-mode
+path goes over it, so CI can track regressions. `/tasks/` is answered without a
+token (401), which still loads the tasks router, auth and the models.
+
+The schema is created once beforehand, as a deploy would with app.commands.migrate.
+Prints one JSON document.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import use_database
+
+COLD_START_BUDGET_MS = 1500
+INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "api", "index.py")
+
+
+async def first_response(app, path: str) -> int:
+    """
+    One GET through the bare ASGI interface, so no client library is imported on the clock.
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def worker(path: str) -> dict:
+    import runpy
+
+    started = time.perf_counter()
+    app = runpy.run_path(INDEX_PATH)["app"]
+    imported = time.perf_counter()
+    status = asyncio.run(first_response(app, path))
+    responded = time.perf_counter()
+    return {
+        "import_ms": round((imported - started) * 1000, 1),
+        "first_response_ms": round((responded - imported) * 1000, 1),
+        "total_ms": round((responded - started) * 1000, 1),
+        "status": status,
+        "modules": len(sys.modules),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", default="fast,eager", help="Comma-separated: fast, eager")
+    parser.add_argument("--path", action="append", help="Path to request first (repeatable; default /health/ and /tasks/)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per mode and path")
+    parser.add_argument("--budget-ms", type=float, default=COLD_START_BUDGET_MS)
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker)))
+        return
+
+    url = use_database(args.database_url)
+    subprocess.run([sys.executable, "-m", "app.commands.migrate"], check=True, capture_output=True)
+
+    results, over_budget = {}, []
+    for mode in args.modes.split(","):
+        env = dict(os.environ, FAST_STARTUP="1" if mode == "fast" else "0", DATABASE_URL=url)
+        results[mode] = {}
+        for path in args.path or ["/health/", "/tasks/"]:
+            runs = []
+            for _ in range(args.runs):
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.cold_start", "--worker", path],
+                    env=env, check=True, capture_output=True, text=True,
+                ).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            summary = {
+                key: {"median": statistics.median(run[key] for run in runs), "max": max(run[key] for run in runs)}
+                for key in ("import_ms", "first_response_ms", "total_ms")
+            }
+            summary["status"] = runs[-1]["status"]
+            summary["modules"] = runs[-1]["modules"]
+            results[mode][path] = summary
+            if mode == "fast" and summary["total_ms"]["median"] > args.budget_ms:
+                over_budget.append(path)
+
+    print(json.dumps({"budget_ms": args.budget_ms, "over_budget": over_budget, "results": results}, indent=2))
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
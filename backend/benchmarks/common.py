@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def use_database(url=None) -> str:
+    """
+    Point the app at `url`, or at a throwaway SQLite file. Must run before
+    anything under `app` is imported; never falls back to the .env database.
+    Also turns rate limiting off unless RATE_LIMIT_ENABLED is set.
+    """
+    url = url or f"sqlite:///{tempfile.mkdtemp(prefix='bench_')}/bench.db"
+    os.environ["DATABASE_URL"] = url
+    # Load generators are one client on one IP: measure the app, not the limiter
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+    return url
@@ -0,0 +1,119 @@
+"""
+Compare request concurrency in sync (threadpool) and async (DB_ASYNC=1) DB modes.
+
+Each mode runs in its own subprocess, because the mode is fixed at import time:
+
+    cd backend
+    python -m benchmarks.db_modes --concurrency 200 --duration 10 --tasks 2000
+    python -m benchmarks.db_modes --modes async --database-url postgresql://...
+
+Prints one JSON document with throughput and latency per mode. Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.common import ms, percentile, use_database
+
+ENDPOINTS = ["/tasks/?limit=20", "/tasks/{task_id}", "/transactions/summary"]
+
+
+def seed(task_count: int) -> tuple:
+    from app.db.database import Base, SessionLocal, engine
+    from app.models.task import Task
+    from app.models.user import User
+    from app.utils.security import create_access_token
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        # Reuse the seed from an earlier mode when pointed at a persistent database
+        user = db.query(User).filter(User.email == "bench@example.com").first()
+        if user is None:
+            user = User(email="bench@example.com", hashed_password="not-used")
+            db.add(user)
+            db.commit()
+            db.add_all([Task(title=f"Benchmark task {i}", owner_id=user.id) for i in range(task_count)])
+            db.commit()
+        task_id = db.query(Task.id).filter(Task.owner_id == user.id).first()[0]
+        return create_access_token(data={"sub": user.email}), task_id
+    finally:
+        db.close()
+
+
+async def drive(args) -> dict:
+    import httpx
+    from app.db.database import DB_ASYNC
+    from app.main import app
+
+    token, task_id = seed(args.tasks)
+    headers = {"Authorization": f"Bearer {token}"}
+    paths = [endpoint.format(task_id=task_id) for endpoint in ENDPOINTS]
+    latencies = []
+    statuses = Counter()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        stop_at = time.perf_counter() + args.duration
+
+        async def worker(offset: int):
+            i = offset
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                response = await client.get(paths[i % len(paths)], headers=headers)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+                i += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(n) for n in range(args.concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return {
+        "mode": "async" if DB_ASYNC else "sync",
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 2),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "status_counts": dict(statuses),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", default="sync,async", help="Comma-separated: sync, async")
+    parser.add_argument("--concurrency", type=int, default=200, help="Concurrent in-flight requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--tasks", type=int, default=2000, help="Tasks seeded for the benchmark user")
+    parser.add_argument("--database-url", help="Defaults to a fresh throwaway SQLite file per mode")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        use_database(args.database_url)
+        print(json.dumps(asyncio.run(drive(args))))
+        return
+
+    results = []
+    for mode in args.modes.split(","):
+        env = dict(os.environ, DB_ASYNC="1" if mode == "async" else "0")
+        command = [sys.executable, "-m", "benchmarks.db_modes", "--worker",
+                   "--concurrency", str(args.concurrency), "--duration", str(args.duration),
+                   "--tasks", str(args.tasks)]
+        if args.database_url:
+            command += ["--database-url", args.database_url]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
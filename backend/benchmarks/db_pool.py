@@ -0,0 +1,145 @@
+"""
+Connection-acquire latency and query throughput per pooling configuration.
+
+Each configuration runs in its own subprocess, because settings are read at import:
+
+    cd backend
+    python -m benchmarks.db_pool --threads 16 --duration 5
+    python -m benchmarks.db_pool --database-url postgresql://... --modes queue,ping-always,null
+
+Modes:
+  queue            DB_POOL=queue, ping only connections idle > DB_PING_IDLE_SECONDS
+  ping-always      DB_POOL=queue with a ping on every checkout (the old pool_pre_ping)
+  null             DB_POOL=null, a new connection per checkout (what PgBouncer fronts)
+  sqlite-defaults  queue, but SQLite's stock pragmas: rollback journal,
+                   synchronous=FULL, 2 MB cache, no mmap
+
+Per mode: acquire latency for sequential checkouts, then --threads threads
+running a read (indexed lookup) and a write (insert + commit) workload for
+--duration seconds each. Prints one JSON document.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.common import ms, percentile, use_database
+
+MODES = {
+    "queue": {},
+    "ping-always": {"DB_PING_IDLE_SECONDS": "0"},
+    "null": {"DB_POOL": "null"},
+    "sqlite-defaults": {"SQLITE_WAL": "0", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_CACHE_SIZE_KB": "2000", "SQLITE_MMAP_SIZE_MB": "0"},
+}
+
+
+def _latencies(values) -> dict:
+    return {"p50_ms": ms(percentile(values, 50)), "p95_ms": ms(percentile(values, 95)), "p99_ms": ms(percentile(values, 99))}
+
+
+def _drive(engine, threads: int, duration: float, op) -> dict:
+    acquire, done, errors = [], [0], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def loop(n):
+        local_acquire, local_done, local_errors = [], 0, 0
+        i = 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    local_acquire.append(time.perf_counter() - started)
+                    op(conn, n, i)
+                local_done += 1
+            except Exception:
+                local_errors += 1
+            i += 1
+        with lock:
+            acquire.extend(local_acquire)
+            done[0] += local_done
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=loop, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return {"ops_per_sec": round(done[0] / elapsed, 1), "errors": errors[0], "acquire": _latencies(acquire)}
+
+
+def worker(args) -> dict:
+    from sqlalchemy import text
+
+    from app.db import database
+
+    engine = database.get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS bench_pool"))
+        conn.execute(text("CREATE TABLE bench_pool (id INTEGER PRIMARY KEY, thread INTEGER, n INTEGER, payload VARCHAR(100))"))
+        conn.execute(text("INSERT INTO bench_pool (id, thread, n, payload) VALUES (:id, -1, :id, 'seed')"),
+                     [{"id": i} for i in range(1, 1001)])
+
+    sequential = []
+    for _ in range(args.acquires):
+        started = time.perf_counter()
+        conn = engine.connect()
+        conn.exec_driver_sql("SELECT 1")
+        sequential.append(time.perf_counter() - started)
+        conn.close()
+
+    def read(conn, n, i):
+        conn.execute(text("SELECT payload FROM bench_pool WHERE id = :id"), {"id": (n * 7919 + i) % 1000 + 1}).all()
+
+    def write(conn, n, i):
+        conn.execute(text("INSERT INTO bench_pool (id, thread, n, payload) VALUES (:id, :thread, :n, 'x')"),
+                     {"id": 1_000_000 + n * 10_000_000 + i, "thread": n, "n": i})
+        conn.commit()
+
+    result = {
+        "pool": type(engine.pool).__name__,
+        "acquire_sequential": _latencies(sequential),
+        "read": _drive(engine, args.threads, args.duration, read),
+        "write": _drive(engine, args.threads, args.duration, write),
+    }
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE bench_pool"))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated: " + ", ".join(MODES))
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per workload")
+    parser.add_argument("--acquires", type=int, default=500, help="Sequential checkouts timed per mode")
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file per mode")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args)))
+        return
+
+    results = {}
+    for mode in args.modes.split(","):
+        # A fresh SQLite file per mode: WAL, once set, sticks to the file
+        url = use_database(args.database_url)
+        if mode == "sqlite-defaults" and not url.startswith("sqlite"):
+            continue
+        env = dict(os.environ, DATABASE_URL=url, **MODES[mode])
+        command = [sys.executable, "-m", "benchmarks.db_pool", "--worker", "--threads", str(args.threads),
+                   "--duration", str(args.duration), "--acquires", str(args.acquires)]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(json.dumps({"database": url.split("://", 1)[0], "threads": args.threads, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
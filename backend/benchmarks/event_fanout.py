@@ -0,0 +1,216 @@
+"""
+Change-event fan-out to many concurrent stream subscribers.
+
+    cd backend
+    python -m benchmarks.event_fanout --modes broker --connections 5000 --users 100
+    python -m benchmarks.event_fanout --modes sse --connections 1000 --users 50 --writes 200
+
+Modes:
+  broker  in-process: --connections Subscriptions over --users owners, events
+          published from a thread (as sync-mode commits do) at --rate per
+          second; --slow-fraction of the subscribers never read, to show
+          that they cost bounded memory (--queue-size events, then one
+          resync) and do not hold up the rest
+  sse     end to end: a uvicorn server, --connections SSE streams opened with
+          httpx, and --writes task creations spread over the users; each
+          write waits until all of its owner's streams saw the event
+
+Reports publish cost, delivery latency (commit or POST to arrival) and
+deliveries per second. Prints one JSON document. The sse mode requires httpx
+and uvicorn.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from argparse import Namespace
+
+from benchmarks.common import ms, percentile, use_database
+
+MODES = ["broker", "sse"]
+
+
+def _latencies(values) -> dict:
+    return {"p50_ms": ms(percentile(values, 50)), "p95_ms": ms(percentile(values, 95)), "p99_ms": ms(percentile(values, 99))}
+
+
+async def run_broker(args) -> dict:
+    from app.utils.events import EVENTS_QUEUE_SIZE, RESYNC, InMemoryBroker, Subscription, publish, set_event_broker
+
+    broker = InMemoryBroker()
+    set_event_broker(broker)
+    rng = random.Random(args.seed)
+    subscriptions = [Subscription(n % args.users, args.queue_size or EVENTS_QUEUE_SIZE) for n in range(args.connections)]
+    slow = set(rng.sample(range(args.connections), int(args.connections * args.slow_fraction)))
+    for subscription in subscriptions:
+        broker.subscribe(subscription)
+
+    delivery, resyncs = [], [0]
+
+    async def consume(subscription):
+        while True:
+            payload = await subscription.get()
+            if payload is RESYNC:
+                resyncs[0] += 1
+                continue
+            delivery.append(time.perf_counter() - json.loads(payload)["sent"])
+
+    consumers = [asyncio.create_task(consume(s)) for n, s in enumerate(subscriptions) if n not in slow]
+    publish_cost = []
+
+    def publisher():
+        interval = 1 / args.rate
+        next_at = time.perf_counter()
+        for n in range(args.events):
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            started = time.perf_counter()
+            publish(n % args.users, {"type": "change", "collection": "tasks", "action": "updated",
+                                     "version": n, "ids": [n], "sent": started})
+            publish_cost.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    thread = threading.Thread(target=publisher)
+    thread.start()
+    await asyncio.to_thread(thread.join)
+    # Let the fast consumers drain what is still queued
+    for _ in range(200):
+        if all(not s.queued for n, s in enumerate(subscriptions) if n not in slow):
+            break
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+
+    stats = broker.stats()
+    return {
+        "events": args.events,
+        "deliveries": len(delivery),
+        "deliveries_per_sec": round(len(delivery) / elapsed, 1),
+        "publish": _latencies(publish_cost),
+        "delivery": _latencies(delivery),
+        "slow_subscribers": len(slow),
+        "max_queued_per_subscriber": max((s.queued for s in subscriptions), default=0),
+        "resyncs_read": resyncs[0],
+        "dropped": stats["dropped"],
+    }
+
+
+async def run_sse(args) -> dict:
+    import httpx
+
+    from benchmarks.api_load import _free_port, prepare
+
+    tokens, _ = prepare(Namespace(users=args.users, tasks_per_user=1, transactions_per_user=0, seed=args.seed))
+    port = _free_port()
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning"]
+    server = subprocess.Popen(command, env=dict(os.environ, JOB_WORKERS="0"))
+
+    per_user = [[] for _ in tokens]  # owner index -> its stream indexes
+    pending = {}  # owner index -> (POST start, streams still waiting, event set when none are)
+    delivery = []
+    connected = [0]
+    all_connected = asyncio.Event()
+
+    async def stream(client, n):
+        owner = n % len(tokens)
+        per_user[owner].append(n)
+        headers = {"Authorization": f"Bearer {tokens[owner]}"}
+        async with client.stream("GET", "/events/stream", headers=headers) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[6:])
+                if event["type"] == "resync":
+                    connected[0] += 1
+                    if connected[0] == args.connections:
+                        all_connected.set()
+                elif owner in pending and n in pending[owner][1]:
+                    sent, waiting, done = pending[owner]
+                    delivery.append(time.perf_counter() - sent)
+                    waiting.discard(n)
+                    if not waiting:
+                        done.set()
+
+    try:
+        limits = httpx.Limits(max_connections=args.connections + 16, max_keepalive_connections=16)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+            for _ in range(300):
+                try:
+                    if (await client.get("/health/")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start")
+
+            connect_started = time.perf_counter()
+            streams = [asyncio.create_task(stream(client, n)) for n in range(args.connections)]
+            await asyncio.wait_for(all_connected.wait(), 120)
+            connect_elapsed = time.perf_counter() - connect_started
+
+            async def write(n):
+                owner = n % len(tokens)
+                done = asyncio.Event()
+                pending[owner] = (time.perf_counter(), set(per_user[owner]), done)
+                await client.post("/tasks/", json={"title": f"fanout {n}"},
+                                  headers={"Authorization": f"Bearer {tokens[owner]}"})
+                await asyncio.wait_for(done.wait(), 60)
+                del pending[owner]
+
+            started = time.perf_counter()
+            # One outstanding write per owner, so each event is matched to its POST
+            for batch in range(0, args.writes, len(tokens)):
+                await asyncio.gather(*(write(n) for n in range(batch, min(batch + len(tokens), args.writes))))
+            elapsed = time.perf_counter() - started
+
+            for task in streams:
+                task.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "writes": args.writes,
+        "connect_all_s": round(connect_elapsed, 2),
+        "deliveries": len(delivery),
+        "deliveries_per_sec": round(len(delivery) / elapsed, 1),
+        "delivery": _latencies(delivery),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", default="broker", help="Comma-separated: " + ", ".join(MODES))
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100, help="Owners the connections are spread over")
+    parser.add_argument("--events", type=int, default=2000, help="broker: events published")
+    parser.add_argument("--rate", type=float, default=1000, help="broker: events per second")
+    parser.add_argument("--slow-fraction", type=float, default=0.1, help="broker: share of subscribers that never read")
+    parser.add_argument("--queue-size", type=int, help="broker: per-subscriber queue, default EVENTS_QUEUE_SIZE")
+    parser.add_argument("--writes", type=int, default=200, help="sse: tasks created")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="sse: defaults to a throwaway SQLite file, never the .env database")
+    args = parser.parse_args()
+
+    use_database(args.database_url)
+    result = {"config": {"connections": args.connections, "users": args.users, "python": sys.version.split()[0]}}
+    for mode in args.modes.split(","):
+        runner = {"broker": run_broker, "sse": run_sse}[mode]
+        result[mode] = asyncio.run(runner(args))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
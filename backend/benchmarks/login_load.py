@@ -0,0 +1,93 @@
+"""
+Login throughput and non-auth endpoint latency under a concurrent login burst.
+
+Runs the app in-process over ASGI against a throwaway SQLite database:
+
+    cd backend
+    python -m benchmarks.login_load --logins 32 --duration 10
+    PASSWORD_HASH_EXECUTOR=thread python -m benchmarks.login_load
+    BCRYPT_ROUNDS=10 PASSWORD_HASH_MAX_PENDING=8 python -m benchmarks.login_load
+
+Prints one JSON document so runs can be diffed. Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+from benchmarks.common import ms, percentile, use_database
+
+
+async def run(args):
+    import httpx
+    from app.db.database import Base, engine
+    from app.main import app
+    from app.utils import security
+
+    Base.metadata.create_all(bind=engine)
+
+    email, password = "bench@example.com", "bench-password"
+    login_latencies, probe_latencies = [], []
+    statuses = Counter()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        await client.post("/auth/signup", json={"email": email, "password": password})
+        stop_at = time.perf_counter() + args.duration
+
+        async def login_worker():
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                response = await client.post("/auth/login", data={"username": email, "password": password})
+                statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    login_latencies.append(time.perf_counter() - started)
+                elif response.status_code == 503:
+                    await asyncio.sleep(float(response.headers.get("Retry-After", 1)) / 10)
+
+        async def probe_worker():
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                await client.get("/health/")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(args.probe_interval)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[login_worker() for _ in range(args.logins)], probe_worker())
+        elapsed = time.perf_counter() - started
+
+    security.shutdown_password_executor()
+
+    return {
+        "executor": security.PASSWORD_HASH_EXECUTOR,
+        "workers": security.PASSWORD_HASH_WORKERS,
+        "max_pending": security.PASSWORD_HASH_MAX_PENDING,
+        "bcrypt_rounds": security.BCRYPT_ROUNDS,
+        "concurrent_logins": args.logins,
+        "duration_s": round(elapsed, 2),
+        "logins_per_sec": round(len(login_latencies) / elapsed, 2),
+        "login_p50_ms": ms(percentile(login_latencies, 50)),
+        "login_p99_ms": ms(percentile(login_latencies, 99)),
+        "status_counts": dict(statuses),
+        "probe_requests": len(probe_latencies),
+        "probe_p50_ms": ms(percentile(probe_latencies, 50)),
+        "probe_p99_ms": ms(percentile(probe_latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32, help="Concurrent login loops")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Pause between /health probes")
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file, never the .env database")
+    args = parser.parse_args()
+
+    use_database(args.database_url)
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
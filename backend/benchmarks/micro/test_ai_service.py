@@ -0,0 +1,50 @@
+"""
+pytest-benchmark micro-benchmarks for ai_service.
+
+    cd backend
+    pip install -r benchmarks/requirements.txt
+    python -m pytest benchmarks/micro --benchmark-json micro.json
+
+Skipped when pytest-benchmark isn't installed.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.utils import ai_service  # noqa: E402
+
+TITLE = "Prepare the quarterly budget review before the deadline"
+DESCRIPTION = "Lunch with the team at the cafe"
+TITLES = [(f"{TITLE} #{i}", None) for i in range(200)]
+DESCRIPTIONS = [f"{DESCRIPTION} #{i}" for i in range(200)]
+
+
+def test_heuristic_priority(benchmark):
+    benchmark(ai_service._heuristic_priority, TITLE, None)
+
+
+def test_heuristic_steps(benchmark):
+    benchmark(ai_service._heuristic_steps, TITLE)
+
+
+def test_heuristic_category(benchmark):
+    benchmark(ai_service._heuristic_category, DESCRIPTION)
+
+
+def test_priority_cached(benchmark):
+    # Through the provider path: after the first call every lookup is a cache hit
+    ai_service.analyze_task_priority(TITLE)
+    benchmark(ai_service.analyze_task_priority, TITLE)
+
+
+def test_category_cached(benchmark):
+    ai_service.categorize_transaction(DESCRIPTION)
+    benchmark(ai_service.categorize_transaction, DESCRIPTION)
+
+
+def test_priorities_batch(benchmark):
+    benchmark(ai_service.analyze_task_priorities, TITLES)
+
+
+def test_categories_batch(benchmark):
+    benchmark(ai_service.categorize_transactions, DESCRIPTIONS)
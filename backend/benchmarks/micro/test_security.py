@@ -0,0 +1,29 @@
+"""
+pytest-benchmark micro-benchmarks for JWT creation and verification.
+
+Skipped when pytest-benchmark isn't installed.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.utils import security  # noqa: E402
+
+TOKEN = security.create_access_token(data={"sub": "bench0@example.com"})
+
+
+def test_create_access_token(benchmark):
+    benchmark(security.create_access_token, {"sub": "bench0@example.com"})
+
+
+def test_decode_access_token_cold(benchmark):
+    # Full HMAC verification: empty the verified-token cache before every call
+    benchmark.pedantic(
+        security.decode_access_token, args=(TOKEN,),
+        setup=security._token_cache.clear, rounds=2000,
+    )
+
+
+def test_decode_access_token_cached(benchmark):
+    security.decode_access_token(TOKEN)
+    benchmark(security.decode_access_token, TOKEN)
@@ -0,0 +1,206 @@
+"""
+Check that every query the routers run is served by an index.
+
+    cd backend
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --database-url postgresql://.../scratch
+
+Seeds --users users (tasks and transactions each) into a throwaway SQLite
+file or the given scratch database, drives the API in-process through one
+request per route and filter combination, captures the SELECT, UPDATE and
+DELETE statements they execute, and EXPLAINs each with its parameters:
+
+  sqlite    EXPLAIN QUERY PLAN; a SCAN of a per-user table (rather than a
+            SEARCH through an index) is a failure
+  postgres  EXPLAIN (FORMAT JSON) with enable_seqscan off, so the planner
+            picks a usable index even on a small table; a Seq Scan on a
+            per-user table is a failure
+
+Prints one JSON document with every statement's plan and the failures, and
+exits 1 if there are any. The postgres mode requires psycopg2.
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import date
+from typing import List, Optional
+
+from benchmarks.common import use_database
+
+# Tables that grow with users' data; a full scan of any of them is a failure
+PER_USER_TABLES = {
+    "users", "tasks", "subtasks", "transactions", "tombstones", "collection_versions", "jobs",
+    "user_currency_rollups", "user_category_currency_rollups", "daily_activity", "user_streaks",
+}
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+def _requests(task_id: int, subtask_id: int) -> List[tuple]:
+    """
+    (label, method, path, json body) for every route and filter combination.
+    """
+    return [
+        ("me", "GET", "/auth/me", None),
+        ("tasks list", "GET", "/tasks/?limit=20", None),
+        ("tasks list open", "GET", "/tasks/?limit=20&is_completed=false", None),
+        ("tasks list priority", "GET", "/tasks/?limit=20&priority=High", None),
+        ("tasks list range", "GET", "/tasks/?limit=20&created_from=2020-01-01T00:00:00", None),
+        ("tasks next page", "GET", "/tasks/?limit=20&after={cursor}", None),
+        ("tasks changes", "GET", "/tasks/changes?since=0&limit=50", None),
+        ("tasks activity", "GET", "/tasks/activity", None),
+        ("tasks export", "GET", "/tasks/export?format=ndjson", None),
+        ("task get", "GET", f"/tasks/{task_id}", None),
+        ("task update", "PATCH", f"/tasks/{task_id}", {"is_completed": True}),
+        ("task subtasks", "GET", f"/tasks/{task_id}/subtasks", None),
+        ("subtask toggle", "POST", f"/tasks/{task_id}/subtasks/{subtask_id}/toggle", None),
+        ("tasks batch", "PATCH", "/tasks/batch", {"filter": {"is_completed": False}, "set": {"priority": "Low"}}),
+        ("task create", "POST", "/tasks/", {"title": "Plan the review", "subtasks": "[\"a\", \"b\"]"}),
+        ("task decompose", "POST", f"/tasks/{task_id}/decompose", None),
+        ("task delete", "DELETE", f"/tasks/{task_id}", None),
+        ("transactions list", "GET", "/transactions/?limit=20", None),
+        ("transactions list type", "GET", "/transactions/?limit=20&type=expense", None),
+        ("transactions list category", "GET", "/transactions/?limit=20&type=expense&category=Food", None),
+        ("transactions changes", "GET", "/transactions/changes?since=0&limit=50", None),
+        ("transactions summary", "GET", "/transactions/summary", None),
+        ("transactions analytics", "GET", "/transactions/analytics?period=week", None),
+        ("transactions summary usd", "GET", "/transactions/summary?currency=USD", None),
+        ("transactions analytics usd", "GET", "/transactions/analytics?period=month&currency=USD", None),
+        ("transactions export", "GET", "/transactions/export?format=csv", None),
+        ("transaction create", "POST", "/transactions/", {"amount": "12.50", "type": "expense", "description": "Taxi"}),
+        ("transaction create usd", "POST", "/transactions/", {
+            "amount": "4.20", "currency": "USD", "type": "expense", "description": "Coffee",
+        }),
+        ("search", "GET", "/search/?q=budget", None),
+    ]
+
+
+def _sqlite_failures(raw, statement: str, parameters) -> tuple:
+    cursor = raw.cursor()
+    rows = cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ()).fetchall()
+    plan = [row[3] for row in rows]
+    failures = []
+    for detail in plan:
+        match = _SQLITE_SCAN.match(detail)
+        if match and match.group(1) in PER_USER_TABLES:
+            failures.append(detail)
+    return plan, failures
+
+
+def _postgres_failures(raw, statement: str, parameters) -> tuple:
+    cursor = raw.cursor()
+    cursor.execute("SET enable_seqscan = off")
+    cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+    plan = cursor.fetchone()[0][0]["Plan"]
+    failures = []
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in PER_USER_TABLES:
+            failures.append(f"Seq Scan on {node['Relation Name']}")
+        for child in node.get("Plans", ()):
+            walk(child)
+
+    walk(plan)
+    return plan, failures
+
+
+def run(args) -> dict:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, insert, select
+
+    from app.db.database import SessionLocal, engine
+    from app.main import app
+    from app.models.subtask import Subtask
+    from app.models.task import Task
+    from app.models.user import User
+    from app.utils.currency import load_rates
+    from app.utils.security import create_access_token
+    from benchmarks.seed import seed
+
+    emails = seed(args.users, args.rows, args.rows, args.seed)
+    db = SessionLocal()
+    try:
+        user_id = db.scalar(select(User.id).where(User.email == emails[0]))
+        task_ids = db.scalars(select(Task.id).where(Task.owner_id == user_id).order_by(Task.id)).all()
+        # The seed has no subtasks; a few steps per task keep the planner off an "empty table" plan
+        db.execute(insert(Subtask), [
+            {"task_id": tid, "position": 1024 * (n + 1), "title": f"Step {n + 1}", "is_done": n == 0}
+            for tid in task_ids for n in range(3)
+        ])
+        db.commit()
+        load_rates(db, [{"currency": "USD", "day": date(2020, 1, 1), "rate": "12650"}])
+        db.commit()
+        task_id = task_ids[0]
+        subtask_id = db.scalar(select(Subtask.id).where(Subtask.task_id == task_id).order_by(Subtask.id).limit(1))
+    finally:
+        db.close()
+    # Give the planners row counts to work with
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    captured = {}  # statement -> (first request label, parameters)
+    label: List[Optional[str]] = [None]
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if label[0] is not None and not executemany and statement.lstrip().split(None, 1)[0].upper() in (
+            "SELECT", "UPDATE", "DELETE", "WITH",
+        ):
+            captured.setdefault(statement, (label[0], parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': emails[0]})}"}
+    statuses = {}
+    cursor = ""
+    try:
+        for name, method, path, body in _requests(task_id, subtask_id):
+            label[0] = name
+            response = client.request(method, path.format(cursor=cursor), json=body, headers=headers)
+            statuses[name] = response.status_code
+            if name == "tasks list":
+                cursor = response.headers.get("X-Next-Cursor", "")
+    finally:
+        label[0] = None
+        event.remove(engine, "before_cursor_execute", capture)
+
+    explain = _postgres_failures if engine.dialect.name == "postgresql" else _sqlite_failures
+    statements, failures = [], []
+    raw = engine.raw_connection()
+    try:
+        for statement, (name, parameters) in captured.items():
+            plan, problems = explain(raw, statement, parameters)
+            entry = {"request": name, "sql": " ".join(statement.split()), "plan": plan}
+            statements.append(entry)
+            if problems:
+                failures.append({**entry, "problems": problems})
+    finally:
+        raw.rollback()
+        raw.close()
+
+    return {
+        "database": engine.dialect.name,
+        "requests": statuses,
+        "statements": len(statements),
+        "failures": failures,
+        "plans": statements if args.verbose else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=500, help="Tasks and transactions per user")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="Include every statement's plan, not only failures")
+    parser.add_argument("--database-url", help="A scratch database; defaults to a throwaway SQLite file, never the .env database")
+    args = parser.parse_args()
+
+    use_database(args.database_url)
+    result = run(args)
+    print(json.dumps(result, indent=2, default=str))
+    return 1 if result["failures"] or any(status >= 500 for status in result["requests"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Per-request cost of RateLimitMiddleware in front of an app that does nothing.
+
+    cd backend
+    python -m benchmarks.rate_limit --requests 200000 --clients 1000
+
+Drives the middleware directly over ASGI (no server, no routing) with
+--clients distinct IPs and (valid) bearer tokens round-robin, limits high enough that
+nothing is refused, and reports the median microseconds per request over
+--repeat runs: bare app, default route class, and an ai-class path that
+also checks the per-user bucket. Prints one JSON document.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _send(message):
+    pass
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+def _scopes(args, method: str, path: str):
+    from app.utils.security import create_access_token
+
+    return [
+        {
+            "type": "http", "method": method, "path": path, "root_path": "",
+            "client": (f"10.0.{n // 256 % 256}.{n % 256}", 50000),
+            "headers": [
+                (b"host", b"bench"),
+                (b"authorization", f"Bearer {create_access_token(data={'sub': f'user{n}@bench'})}".encode()),
+            ],
+        }
+        for n in range(args.clients)
+    ]
+
+
+async def _us_per_request(app, scopes, requests: int, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for n in range(requests):
+            await app(scopes[n % len(scopes)], _receive, _send)
+        samples.append((time.perf_counter() - started) / requests)
+    return round(statistics.median(samples) * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200000, help="Requests per timed run")
+    parser.add_argument("--clients", type=int, default=1000, help="Distinct IPs and tokens")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs; the median is reported")
+    args = parser.parse_args()
+
+    from app.utils import rate_limit
+    from app.utils.rate_limit import Limit, RateLimitMiddleware, RouteClass
+
+    rate_limit.RATE_LIMIT_ENABLED = True
+    unlimited = Limit(1e9, 1e9)
+    for name in ("default", "ai"):
+        rate_limit.ROUTE_CLASSES[name] = RouteClass(name, unlimited, unlimited)
+    middleware = RateLimitMiddleware(_app)
+
+    async def run() -> dict:
+        bare = await _us_per_request(_app, _scopes(args, "GET", "/tasks/"), args.requests, args.repeat)
+        default = await _us_per_request(middleware, _scopes(args, "GET", "/tasks/"), args.requests, args.repeat)
+        ai = await _us_per_request(middleware, _scopes(args, "POST", "/tasks/17/decompose"), args.requests, args.repeat)
+        return {
+            "bare_us": bare,
+            "default_class_us": default,
+            "ai_class_us": ai,
+            "overhead_default_us": round(default - bare, 3),
+            "overhead_ai_us": round(ai - bare, 3),
+        }
+
+    result = {"config": {"requests": args.requests, "clients": args.clients}}
+    result.update(asyncio.run(run()))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Seed a database with benchmark users, tasks and transactions.
+
+    cd backend
+    python -m benchmarks.seed --users 100 --tasks-per-user 200 --transactions-per-user 500 \
+        --database-url postgresql://...
+
+Every user is bench{n}@example.com with password SEED_PASSWORD. Rows are spread
+over the last 90 days and inserted with multi-row INSERTs. Re-running against
+the same database adds only the users that are missing.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from benchmarks.common import use_database
+
+SEED_PASSWORD = "bench-password"
+BATCH_SIZE = 5000
+
+TASK_TITLES = [
+    "Fix the login bug before the deadline", "Maybe read a book someday",
+    "Prepare the quarterly budget review", "Go to the gym after work",
+    "Write unit tests for the new code", "Bugun hisobotni topshirish shart",
+    "Plan the team meeting agenda", "Call mom", "Learn Rust with an online course",
+    "Buy groceries for the weekend", "Refactor the payment module", "Clean the garage",
+]
+DESCRIPTIONS = [
+    "Lunch with the team at the cafe", "Uber to the airport", "Monthly salary",
+    "Netflix subscription", "Electricity bill", "Birthday gift from amazon",
+    "Pharmacy - cold medicine", "Transfer to savings", "Parking downtown", "Freelance invoice",
+]
+
+
+def user_email(n: int) -> str:
+    return f"bench{n}@example.com"
+
+
+def _spread(rng: random.Random, now: datetime) -> datetime:
+    return now - timedelta(seconds=rng.randint(0, 90 * 24 * 3600))
+
+
+def seed(users: int, tasks_per_user: int, transactions_per_user: int, seed_value: int = 42) -> List[str]:
+    """
+    Create the schema if needed and seed it; returns the benchmark users' emails.
+    """
+    from sqlalchemy import insert, select
+
+    from app.db.database import Base, SessionLocal, engine
+    import app.main  # noqa: F401  (registers every table and the search index DDL)
+    from app.models.task import Task
+    from app.models.transaction import Transaction
+    from app.models.user import User
+    from app.utils.ai_service import analyze_task_priorities, categorize_transactions
+    from app.utils.finance_rollup import rebuild_rollups
+    from app.utils.security import hash_password
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    emails = [user_email(n) for n in range(users)]
+
+    db = SessionLocal()
+    try:
+        existing = set(db.scalars(select(User.email).where(User.email.in_(emails))))
+        missing = [email for email in emails if email not in existing]
+        if missing:
+            # One bcrypt hash shared by every user keeps seeding fast
+            hashed = hash_password(SEED_PASSWORD)
+            user_ids = db.scalars(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [{"email": email, "hashed_password": hashed, "streak": 0} for email in missing],
+            ).all()
+
+            task_rows, transaction_rows = [], []
+
+            def flush(force: bool = False):
+                if task_rows and (force or len(task_rows) >= BATCH_SIZE):
+                    db.execute(insert(Task), task_rows)
+                    task_rows.clear()
+                if transaction_rows and (force or len(transaction_rows) >= BATCH_SIZE):
+                    db.execute(insert(Transaction), transaction_rows)
+                    transaction_rows.clear()
+
+            for owner_id in user_ids:
+                titles = [rng.choice(TASK_TITLES) for _ in range(tasks_per_user)]
+                for title, priority in zip(titles, analyze_task_priorities([(t, None) for t in titles])):
+                    task_rows.append({
+                        "title": title, "description": None, "is_completed": rng.random() < 0.3,
+                        "priority": priority, "owner_id": owner_id, "created_at": _spread(rng, now),
+                    })
+                descriptions = [rng.choice(DESCRIPTIONS) for _ in range(transactions_per_user)]
+                for description, category in zip(descriptions, categorize_transactions(descriptions)):
+                    amount_minor = rng.randint(100, 50000)
+                    transaction_rows.append({
+                        "amount": amount_minor / 100, "amount_minor": amount_minor, "currency": "UZS",
+                        "type": "income" if category == "Salary" or "invoice" in description else "expense",
+                        "description": description, "category": category,
+                        "owner_id": owner_id, "created_at": _spread(rng, now),
+                    })
+                flush()
+            flush(force=True)
+            db.commit()
+            rebuild_rollups(db)
+    finally:
+        db.close()
+    return emails
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks-per-user", type=int, default=200)
+    parser.add_argument("--transactions-per-user", type=int, default=500)
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file, never the .env database")
+    args = parser.parse_args()
+
+    url = use_database(args.database_url)
+    started = time.perf_counter()
+    emails = seed(args.users, args.tasks_per_user, args.transactions_per_user)
+    print(json.dumps({"database_url": url, "users": len(emails), "seconds": round(time.perf_counter() - started, 2)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+CPU per list response: ORM rows through response_model vs column rows through RowSerializer.
+
+    cd backend
+    python -m benchmarks.serialization --rows 10000 --repeat 10
+
+Paths, each over the same --rows tasks and transactions of one seeded user:
+  jsonable   ORM instances -> response_model validation -> jsonable_encoder ->
+             stdlib json (FastAPI's path before it dumped JSON via Pydantic)
+  pydantic   ORM instances -> response_model validation -> Pydantic dump_json
+             (FastAPI's path today for `response_model=List[...]`)
+  rows       selected columns -> RowSerializer -> FastJSONResponse (the list
+             endpoints' path); rows-stdlib is the same without orjson
+
+Reports median process CPU milliseconds per response, for the query plus
+serialization and for serialization alone. Prints one JSON document.
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import List
+
+from benchmarks.common import use_database
+
+
+def _cpu_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        samples.append(time.process_time() - started)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def run(args) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from app.api.tasks import TASK_COLUMNS, _task_payloads
+    from app.api.transactions import TRANSACTION_COLUMNS, transaction_rows
+    from app.db.database import SessionLocal
+    from app.models.task import Task
+    from app.models.transaction import Transaction
+    from app.models.user import User
+    from app.schemas.task import TaskResponse
+    from app.schemas.transaction import TransactionResponse
+    from app.utils import serialization
+    from app.utils.subtasks import attach_subtasks
+    from benchmarks.seed import seed
+
+    email = seed(1, args.rows, args.rows, args.seed)[0]
+    db = SessionLocal()
+    owner_id = db.scalar(select(User.id).where(User.email == email))
+    orjson = serialization.orjson
+
+    def load(model, columns=None):
+        stmt = select(*columns) if columns else select(model)
+        stmt = stmt.where(model.owner_id == owner_id).order_by(model.created_at.desc(), model.id.desc()).limit(args.rows)
+        result = db.execute(stmt)
+        rows = (result if columns else result.scalars()).all()
+        db.expunge_all()
+        return rows
+
+    def paths(model, schema, columns, payloads):
+        adapter = TypeAdapter(List[schema])
+
+        def instances():
+            rows = load(model)
+            if model is Task:
+                attach_subtasks(db, rows)
+            return rows
+
+        def jsonable(rows):
+            return json.dumps(jsonable_encoder(adapter.validate_python(rows, from_attributes=True))).encode("utf-8")
+
+        def pydantic(rows):
+            return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+        def rows_path(rows):
+            return serialization.dumps(payloads(rows))
+
+        def rows_stdlib(rows):
+            serialization.orjson = None
+            try:
+                return serialization.dumps(payloads(rows))
+            finally:
+                serialization.orjson = orjson
+
+        orm_rows, column_rows = instances(), load(model, columns)
+        result = {}
+        for name, fetch, serialize, fetched in (
+            ("jsonable", instances, jsonable, orm_rows),
+            ("pydantic", instances, pydantic, orm_rows),
+            ("rows", lambda: load(model, columns), rows_path, column_rows),
+            ("rows-stdlib", lambda: load(model, columns), rows_stdlib, column_rows),
+        ):
+            result[name] = {
+                "total_cpu_ms": _cpu_ms(lambda: serialize(fetch()), args.repeat),
+                "serialize_cpu_ms": _cpu_ms(lambda: serialize(fetched), args.repeat),
+                "bytes": len(serialize(fetched)),
+            }
+        return result
+
+    try:
+        return {
+            "tasks": paths(Task, TaskResponse, TASK_COLUMNS, lambda rows: _task_payloads(db, rows)),
+            "transactions": paths(Transaction, TransactionResponse, TRANSACTION_COLUMNS, transaction_rows.dump_all),
+        }
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per path; the median is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file, never the .env database")
+    args = parser.parse_args()
+
+    url = use_database(args.database_url)
+    from app.utils.serialization import orjson
+
+    result = {"config": {"database": url.split("://", 1)[0], "rows": args.rows, "orjson": orjson is not None}}
+    result.update(run(args))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { Plus, Trash2, Check, LogOut, Loader2, Mail, Lock, Sparkles, Wand2, X, Flame, User as UserIcon, DollarSign, TrendingUp, TrendingDown, ArrowRightLeft } from 'lucide-react';
 
 const API_URL = import.meta.env.VITE_API_URL || (window.location.hostname === 'localhost' ? 'http://localhost:8000' : '/api');
+// How often, and for how long, to poll a decomposition job before giving up
+const JOB_POLL_MS = 500;
+const JOB_TIMEOUT_MS = 60000;
 
 function App() {
   const [token, setToken] = useState(localStorage.getItem('token'));
@@ -43,12 +46,24 @@ function App() {
     }
   };
 
+  // List endpoints return one page at a time: follow X-Next-Cursor to the last page
+  const fetchAllPages = async (path) => {
+    const rows = [];
+    let after = null;
+    do {
+      const res = await axios.get(`${API_URL}${path}`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: after ? { limit: 500, after } : { limit: 500 }
+      });
+      rows.push(...res.data);
+      after = res.headers['x-next-cursor'];
+    } while (after);
+    return rows;
+  };
+
   const fetchTasks = async () => {
     try {
-      const res = await axios.get(`${API_URL}/tasks/`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setTasks(res.data);
+      setTasks(await fetchAllPages('/tasks/'));
     } catch (err) {
       console.error(err);
     }
@@ -56,10 +71,7 @@ function App() {
 
   const fetchTransactions = async () => {
     try {
-      const res = await axios.get(`${API_URL}/transactions/`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setTransactions(res.data);
+      setTransactions(await fetchAllPages('/transactions/'));
     } catch (err) {
       console.error(err);
     }
@@ -109,6 +121,7 @@ function App() {
     setUser(null);
     setTasks([]);
     setTransactions([]);
+    setError('');
   };
 
   const handleAddItem = async (e) => {
@@ -172,13 +185,30 @@ function App() {
   };
 
   const decomposeTask = async (id) => {
+    const headers = { Authorization: `Bearer ${token}` };
+    setError('');
     try {
-      const res = await axios.post(`${API_URL}/tasks/${id}/decompose`, {}, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setTasks(tasks.map(t => t.id === id ? res.data : t));
+      // Decomposition runs as a background job (or within the request, on serverless): poll it, then reload the task
+      let { data: job } = await axios.post(`${API_URL}/tasks/${id}/decompose`, {}, { headers });
+      const deadline = Date.now() + JOB_TIMEOUT_MS;
+      while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() >= deadline) {
+          setError('AI Strategy is taking too long. Please try again later.');
+          return;
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_MS));
+        ({ data: job } = await axios.get(`${API_URL}/jobs/${job.id}`, { headers }));
+      }
+      if (job.status !== 'succeeded') {
+        console.error(job.error);
+        setError('AI Strategy failed. Please try again.');
+        return;
+      }
+      const res = await axios.get(`${API_URL}/tasks/${id}`, { headers });
+      setTasks(current => current.map(t => t.id === id ? res.data : t));
     } catch (err) {
       console.error(err);
+      setError(err.response?.data?.detail || 'AI Strategy failed. Please try again.');
     }
   };
 
@@ -274,6 +304,12 @@ function App() {
         </div>
       </header>
 
+      {error && <motion.p
+        initial={{ opacity: 0, y: -10 }}
+        animate={{ opacity: 1, y: 0 }}
+        onClick={() => setError('')}
+        style={{ color: '#f87171', marginBottom: '1rem', fontSize: '0.9rem', cursor: 'pointer' }}>{error}</motion.p>}
+
       <div style={{ display: 'flex', gap: '0.5rem', marginBottom: '1rem', flexWrap: 'wrap' }}>
         <button
           onClick={() => setInputMode('task')}
@@ -513,6 +549,11 @@ function App() {
                     <div style={{ fontSize: '0.65rem', color: '#64748b' }}>BALANCE (UZS)</div>
                   </div>
                 </div>
+                {financeSummary.unconverted?.length > 0 && (
+                  <div style={{ marginTop: '0.75rem', fontSize: '0.7rem', color: '#64748b', textAlign: 'center' }}>
+                    Not included (no exchange rate): {financeSummary.unconverted.map(u => `${u.net_balance.toLocaleString()} ${u.currency}`).join(', ')}
+                  </div>
+                )}
               </div>
 
               <button